@@ -0,0 +1 @@
+# Analytics helpers behind the dashboard routes
@@ -0,0 +1,105 @@
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class DateCache(dict):
+    """Memoizes ``datetime.fromisoformat(value).date()`` per distinct string.
+
+    Attendance dates repeat once per employee per day, so a scan parses each
+    distinct date once instead of once per record (and per pass).
+    """
+
+    def __missing__(self, value: str) -> date:
+        parsed = datetime.fromisoformat(value).date()
+        self[value] = parsed
+        return parsed
+
+
+class UserSummary:
+    """Role and department counts from one pass over the users."""
+
+    def __init__(self, users: Iterable[Dict[str, Any]]):
+        self.total = 0
+        self.roles: Counter = Counter()
+        # department -> user ids, in user order
+        self.departments: Dict[str, List[Any]] = {}
+        for user in users:
+            self.total += 1
+            self.roles[user.get('role')] += 1
+            self.departments.setdefault(user.get('department', 'Unknown'), []).append(user.get('id'))
+
+
+class AttendanceSummary:
+    """Per-day and per-month attendance counts from one pass over the records.
+
+    ``day`` is the date whose presence is broken down by user; ``month`` is
+    a ``(year, month)`` pair whose records are counted.
+    """
+
+    def __init__(self, attendance: Iterable[Dict[str, Any]], day: date,
+                 month: Optional[tuple] = None, dates: Optional[DateCache] = None):
+        dates = dates if dates is not None else DateCache()
+        self.day_records = 0
+        self.day_checked_in = 0
+        self.day_present = 0
+        # user id -> whether that user's first record of the day has a check-in
+        self.day_first_checked_in: Dict[Any, bool] = {}
+        self.month_records = 0
+        self.month_users = set()
+        for record in attendance:
+            parsed = dates[record.get('date', '')]
+            if parsed == day:
+                self.day_records += 1
+                checked_in = bool(record.get('check_in'))
+                if checked_in:
+                    self.day_checked_in += 1
+                    if record.get('check_out'):
+                        self.day_present += 1
+                self.day_first_checked_in.setdefault(record.get('user_id'), checked_in)
+            if month is not None and (parsed.year, parsed.month) == month:
+                self.month_records += 1
+                self.month_users.add(record.get('user_id'))
+
+
+def count_statuses(leaves: Iterable[Dict[str, Any]]) -> Counter:
+    return Counter(leave.get('status') for leave in leaves)
+
+
+def dashboard_stats(users: List[Dict[str, Any]], attendance: List[Dict[str, Any]],
+                    leaves: List[Dict[str, Any]], now: datetime) -> Dict[str, Any]:
+    """The /api/dashboard/stats payload, one pass over each dataset."""
+    today = now.date()
+    user_summary = UserSummary(users)
+    day = AttendanceSummary(attendance, today, month=(now.year, now.month))
+    statuses = count_statuses(leaves)
+
+    total_employees = user_summary.roles['employee']
+    departments = {}
+    for dept, user_ids in user_summary.departments.items():
+        departments[dept] = {
+            'total': len(user_ids),
+            'present': sum(1 for user_id in user_ids if day.day_first_checked_in.get(user_id))
+        }
+
+    return {
+        "total_users": user_summary.total,
+        "total_employees": total_employees,
+        "total_admins": user_summary.roles['admin'],
+        "today": {
+            "present": day.day_present,
+            "absent": total_employees - day.day_checked_in,
+            "total_checked_in": day.day_checked_in
+        },
+        "leaves": {
+            "pending": statuses['pending'],
+            "approved": statuses['approved'],
+            "rejected": statuses['rejected'],
+            "total": len(leaves)
+        },
+        "this_month": {
+            "total_records": day.month_records,
+            "unique_employees": len(day.month_users)
+        },
+        "departments": departments
+    }
@@ -0,0 +1,261 @@
+"""Per-user attendance and leave metrics from column arrays.
+
+Attendance is flattened once into parallel columns (user id, date ordinal,
+has check-in, has check-out) and leaves into (user id, status code); the
+per-user metrics behind /employee-performance and /monthly-report are then
+grouped reductions over those columns instead of a scan of every record for
+every user. NumPy is used when it is installed; otherwise the same columns
+are reduced with plain dict counters.
+
+Archived months (storage/archive.py) are no longer in the columns; their
+per-user counts are passed in as ``archived`` and added to the groups.
+"""
+import threading
+from collections import OrderedDict
+from calendar import monthrange
+from datetime import date
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from analytics.aggregation import DateCache
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised on installs without NumPy
+    np = None
+
+LEAVE_STATUSES = ("pending", "approved", "rejected")
+OTHER_STATUS = len(LEAVE_STATUSES)
+
+
+class AttendanceColumns:
+    def __init__(self, records: List[Dict[str, Any]], dates: Optional[DateCache] = None):
+        dates = dates if dates is not None else DateCache()
+        self.size = len(records)
+        user_ids = [r.get('user_id') for r in records]
+        ordinals = [dates[r.get('date', '')].toordinal() for r in records]
+        check_in = [bool(r.get('check_in')) for r in records]
+        check_out = [bool(r.get('check_out')) for r in records]
+        self.numeric = np is not None and _all_ints(user_ids)
+        if self.numeric:
+            self.user_id = np.array(user_ids, dtype=np.int64)
+            self.ordinal = np.array(ordinals, dtype=np.int64)
+            self.check_in = np.array(check_in, dtype=bool)
+            self.check_out = np.array(check_out, dtype=bool)
+        else:
+            self.user_id, self.ordinal = user_ids, ordinals
+            self.check_in, self.check_out = check_in, check_out
+
+
+class LeaveColumns:
+    def __init__(self, leaves: List[Dict[str, Any]]):
+        user_ids = [l.get('user_id') for l in leaves]
+        codes = [_status_code(l.get('status')) for l in leaves]
+        self.numeric = np is not None and _all_ints(user_ids)
+        if self.numeric:
+            self.user_id = np.array(user_ids, dtype=np.int64)
+            self.status = np.array(codes, dtype=np.int8)
+        else:
+            self.user_id, self.status = user_ids, codes
+
+
+def _all_ints(values: List[Any]) -> bool:
+    return all(type(v) is int for v in values)
+
+
+def _status_code(status: Any) -> int:
+    try:
+        return LEAVE_STATUSES.index(status)
+    except ValueError:
+        return OTHER_STATUS
+
+
+def _group_counts(keys, *masks) -> Dict[Hashable, Tuple[int, ...]]:
+    """For each distinct key: (rows, rows where mask_1, rows where mask_2, ...)."""
+    if not isinstance(keys, list):
+        if len(keys) == 0:
+            return {}
+        unique, inverse = np.unique(keys, return_inverse=True)
+        columns = [np.bincount(inverse, minlength=len(unique))]
+        columns += [np.bincount(inverse, weights=m, minlength=len(unique)).astype(np.int64) for m in masks]
+        return dict(zip(unique.tolist(), zip(*(c.tolist() for c in columns))))
+    result: Dict[Hashable, list] = {}
+    for i, key in enumerate(keys):
+        counts = result.get(key)
+        if counts is None:
+            counts = result[key] = [0] * (len(masks) + 1)
+        counts[0] += 1
+        for j, mask in enumerate(masks, 1):
+            if mask[i]:
+                counts[j] += 1
+    return {k: tuple(v) for k, v in result.items()}
+
+
+def _distinct_days(columns: AttendanceColumns) -> Dict[Hashable, int]:
+    if columns.numeric:
+        if columns.size == 0:
+            return {}
+        # Pack (user, day) into one int64 so a 1-d unique finds the pairs
+        low = columns.ordinal.min()
+        span = int(columns.ordinal.max() - low) + 1
+        pairs = np.unique(columns.user_id * span + (columns.ordinal - low))
+        users, counts = np.unique(pairs // span, return_counts=True)
+        return dict(zip(users.tolist(), counts.tolist()))
+    days: Dict[Hashable, set] = {}
+    for user_id, ordinal in zip(columns.user_id, columns.ordinal):
+        days.setdefault(user_id, set()).add(ordinal)
+    return {k: len(v) for k, v in days.items()}
+
+
+def _present_mask(columns: AttendanceColumns):
+    if columns.numeric:
+        return columns.check_in & columns.check_out
+    return [a and b for a, b in zip(columns.check_in, columns.check_out)]
+
+
+def employee_performance(users: List[Dict[str, Any]], attendance: AttendanceColumns,
+                         leaves: LeaveColumns,
+                         archived: Optional[Dict[Hashable, Tuple[int, int, int]]] = None) -> List[Dict[str, Any]]:
+    """The /api/dashboard/employee-performance payload.
+
+    ``archived`` maps user ids to (records, present, distinct days) over
+    the archived months.
+    """
+    per_user = _group_counts(attendance.user_id, _present_mask(attendance))
+    days = _distinct_days(attendance)
+    if archived:
+        # No day is in both: swipes dated in an archived month are refused
+        # (routes/attendance.py), and a month archived again only counts
+        # each user's day once (storage/archive.py)
+        per_user, days = dict(per_user), dict(days)
+        for user_id, (records, present, archived_days) in archived.items():
+            hot_records, hot_present = per_user.get(user_id, (0, 0))
+            per_user[user_id] = (hot_records + records, hot_present + present)
+            days[user_id] = days.get(user_id, 0) + archived_days
+    if leaves.numeric:
+        leave_masks = [leaves.status == code for code in range(len(LEAVE_STATUSES))]
+    else:
+        leave_masks = [[s == code for s in leaves.status] for code in range(len(LEAVE_STATUSES))]
+    per_user_leaves = _group_counts(leaves.user_id, *leave_masks)
+
+    performance_data = []
+    for user in users:
+        if user.get('role') != 'employee':
+            continue
+        user_id = user.get('id')
+        records, present_days = per_user.get(user_id, (0, 0))
+        total_days = days.get(user_id, 0)
+        _, pending, approved, _ = per_user_leaves.get(user_id, (0, 0, 0, 0))
+        attendance_rate = (present_days / total_days * 100) if total_days > 0 else 0
+        performance_data.append({
+            "user_id": user_id,
+            "name": user.get('name'),
+            "email": user.get('email'),
+            "department": user.get('department'),
+            "total_attendance_records": records,
+            "present_days": present_days,
+            "attendance_rate": round(attendance_rate, 2),
+            "approved_leaves": approved,
+            "pending_leaves": pending
+        })
+    return sorted(performance_data, key=lambda x: x['attendance_rate'], reverse=True)
+
+
+def monthly_report(users: List[Dict[str, Any]], attendance: AttendanceColumns,
+                   month: int, year: int,
+                   archived: Optional[Dict[Hashable, Tuple[int, int, int]]] = None) -> Dict[str, Any]:
+    """The /api/dashboard/monthly-report payload.
+
+    ``archived`` maps user ids to (records, checked in, present) for the
+    month, if it has been archived.
+    """
+    try:
+        first = date(year, month, 1).toordinal()
+        last = first + monthrange(year, month)[1]
+    except ValueError:
+        # No date can fall in a month that does not exist
+        first = last = 0
+    if attendance.numeric:
+        in_month = (attendance.ordinal >= first) & (attendance.ordinal < last)
+        keys = attendance.user_id[in_month]
+        check_in = attendance.check_in[in_month]
+        present = check_in & attendance.check_out[in_month]
+    else:
+        rows = [i for i, o in enumerate(attendance.ordinal) if first <= o < last]
+        keys = [attendance.user_id[i] for i in rows]
+        check_in = [attendance.check_in[i] for i in rows]
+        present = [check_in[n] and attendance.check_out[i] for n, i in enumerate(rows)]
+    per_user = _group_counts(keys, present, check_in)
+    if archived:
+        per_user = dict(per_user)
+        for user_id, (records, checked_in, user_present) in archived.items():
+            rows, hot_present, hot_checked_in = per_user.get(user_id, (0, 0, 0))
+            per_user[user_id] = (rows + records, hot_present + user_present, hot_checked_in + checked_in)
+    total_present = sum(c[1] for c in per_user.values())
+    total_checked_in = sum(c[2] for c in per_user.values())
+
+    report = {
+        "month": month,
+        "year": year,
+        "total_records": sum(c[0] for c in per_user.values()),
+        "unique_employees": len(per_user),
+        "total_present": total_present,
+        "total_absent": len(users) * 20 - total_checked_in,
+        "employee_summary": []
+    }
+    for user in users:
+        if user.get('role') == 'employee':
+            _, user_present, user_checked_in = per_user.get(user.get('id'), (0, 0, 0))
+            report["employee_summary"].append({
+                "name": user.get('name'),
+                "email": user.get('email'),
+                "present": user_present,
+                "absent": 20 - user_checked_in
+            })
+    return report
+
+
+def month_bounds(year: int, month: int) -> Optional[Tuple[str, str]]:
+    """First and last ISO dates of a month, or None if it does not exist."""
+    try:
+        days = monthrange(year, month)[1]
+        return date(year, month, 1).isoformat(), date(year, month, days).isoformat()
+    except ValueError:
+        return None
+
+
+class ColumnCache:
+    """Column arrays for a repository, rebuilt only when its version moves.
+
+    ``get(repository, start_date, end_date)`` builds from just the records in
+    that date range (e.g. one month for /monthly-report); the few most
+    recently used ranges are kept.
+    """
+
+    def __init__(self, build, size: int = 4):
+        self.build = build
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+
+    def get(self, repository, start_date: Optional[str] = None, end_date: Optional[str] = None):
+        version = repository.version()
+        key = (id(repository), start_date, end_date)
+        with self._lock:
+            entry = self._entries.get(key)
+            if version is not None and entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+        if start_date is None and end_date is None:
+            records = repository.list()
+        else:
+            records = list(repository.scan(start_date=start_date, end_date=end_date))
+        columns = self.build(records)
+        with self._lock:
+            self._entries[key] = (version, columns)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return columns
+
+
+attendance_columns = ColumnCache(AttendanceColumns)
+leave_columns = ColumnCache(LeaveColumns)
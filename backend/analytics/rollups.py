@@ -0,0 +1,115 @@
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+from analytics.aggregation import DateCache
+
+# (present, checked_in) for one day
+DayCounts = Tuple[int, int]
+
+
+class DailyRollups:
+    """Per-day present/checked-in counts over the attendance records.
+
+    Registered with a repository's IndexManager, so it is rebuilt whenever
+    the table is (re)loaded and adjusted by every create/update. Absent is
+    not stored: it depends on the current head count, so the chart derives
+    it at query time.
+
+    Days before today are treated as immutable: ranges over them are
+    memoized until a write lands on a past day (which only happens when
+    history is edited, imported or archived), at which point ``past_epoch``
+    moves and the memo is dropped. Both happen under the rollup lock, and a
+    range is read and memoized in one hold of it, so a memo entry never
+    predates a write it should include.
+    """
+
+    HISTORY_CACHE_SIZE = 128
+
+    def __init__(self):
+        self._days: Dict[date, list] = {}
+        self._dates = DateCache()
+        self._lock = threading.Lock()
+        self._history: "OrderedDict[Tuple[date, date], Dict[date, DayCounts]]" = OrderedDict()
+        self.past_epoch = 0
+
+    def empty(self) -> "DailyRollups":
+        return DailyRollups()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._days = {}
+            self._invalidate_history()
+
+    def _invalidate_history(self) -> None:
+        # Callers hold self._lock
+        self._history.clear()
+        self.past_epoch += 1
+
+    def _day(self, record: Dict[str, Any]) -> Optional[date]:
+        try:
+            return self._dates[record.get('date', '')]
+        except (TypeError, ValueError):
+            return None
+
+    def _adjust(self, record: Dict[str, Any], delta: int) -> None:
+        day = self._day(record)
+        if day is None or not record.get('check_in'):
+            return
+        with self._lock:
+            counts = self._days.setdefault(day, [0, 0])
+            counts[1] += delta
+            if record.get('check_out'):
+                counts[0] += delta
+            if day < date.today():
+                self._invalidate_history()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self._adjust(record, 1)
+
+    def remove(self, record: Dict[str, Any]) -> None:
+        self._adjust(record, -1)
+
+    def rebuild(self, records: Iterable[Dict[str, Any]]) -> None:
+        self.clear()
+        for record in records:
+            self.add(record)
+
+    def day(self, day: date) -> DayCounts:
+        counts = self._days.get(day)
+        return (counts[0], counts[1]) if counts else (0, 0)
+
+    def counts(self, start: date, end: date) -> Dict[date, DayCounts]:
+        """Counts for every day from ``start`` to ``end`` inclusive."""
+        result: Dict[date, DayCounts] = {}
+        today = date.today()
+        past_end = min(end, today - timedelta(days=1))
+        with self._lock:
+            # Under the lock, so a concurrent write is seen whole or not at all
+            if start <= past_end:
+                result.update(self._past_counts(start, past_end))
+            day = max(start, today)
+            while day <= end:
+                result[day] = self.day(day)
+                day += timedelta(days=1)
+        return result
+
+    def _past_counts(self, start: date, end: date) -> Dict[date, DayCounts]:
+        # Callers hold self._lock
+        key = (start, end)
+        cached = self._history.get(key)
+        if cached is not None:
+            self._history.move_to_end(key)
+            return cached
+        counts = {}
+        day = start
+        while day <= end:
+            counts[day] = self.day(day)
+            day += timedelta(days=1)
+        self._history[key] = counts
+        while len(self._history) > self.HISTORY_CACHE_SIZE:
+            self._history.popitem(last=False)
+        return counts
+
+    def snapshot(self) -> Dict[date, DayCounts]:
+        return {day: (c[0], c[1]) for day, c in self._days.items() if c != [0, 0]}
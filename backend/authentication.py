@@ -0,0 +1,131 @@
+"""The request authentication dependency shared by every protected route."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Header, HTTPException, Query
+from config import AUTH_CACHE_SIZE, EVENTS_TICKET_S
+from storage import get_users_repository
+from utils import create_access_token, verify_token
+
+# The scope claim of a stream ticket; ordinary access tokens have none
+STREAM_SCOPE = "stream"
+
+
+class TokenCache:
+    """Bounded LRU cache of verified JWT payloads.
+
+    Entries are keyed on a SHA-256 of the token, so raw tokens are never
+    held in memory, and expire at the token's ``exp`` claim: a cached token
+    stops being accepted at exactly the moment ``jwt.decode`` would start
+    rejecting it. Only successful verifications are cached.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+        payload = verify_token(token)
+        if payload and self.max_entries > 0:
+            # verify_token has already rejected tokens past their exp
+            self._put(key, float(payload.get('exp', now)), payload)
+        return payload
+
+    def _put(self, key: bytes, expires_at: float, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+token_cache = TokenCache(AUTH_CACHE_SIZE)
+
+
+def authenticate(token: Optional[str], scope: Optional[str] = None) -> Dict[str, Any]:
+    """The caller behind a bearer token; raises 401 if there is none.
+
+    The token's ``scope`` claim must be ``scope``: access tokens have none,
+    and a stream ticket is accepted nowhere but ``get_stream_user``.
+    """
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    payload = token_cache.verify(token)
+    if not payload or payload.get('scope') != scope:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    user = get_users_repository().get(payload.get('user_id'))
+    if user is None:
+        raise HTTPException(status_code=401, detail="User no longer exists")
+    return {
+        **payload,
+        "id": user['id'],
+        "name": user['name'],
+        "email": user['email'],
+        "role": user['role'],
+        "department": user['department']
+    }
+
+
+def get_current_user(authorization: str = Header(None)) -> Dict[str, Any]:
+    """Authenticate the caller and return their user record.
+
+    The result carries the token claims (``sub``, ``user_id``, ``exp``) plus
+    the user's public fields (``id``, ``name``, ``email``, ``role``,
+    ``department``). FastAPI resolves it once per request however many
+    dependencies ask for it.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return authenticate(authorization.split(" ")[1])
+
+
+def create_stream_ticket(user: Dict[str, Any]) -> str:
+    """A token good only for opening an event stream, for ``EVENTS_TICKET_S``.
+
+    The browser's EventSource cannot send headers, so it passes this in the
+    URL instead of the access token: what ends up in proxy and server logs
+    expires within a minute and cannot call any other endpoint.
+    """
+    return create_access_token(
+        data={"sub": user['email'], "user_id": user['id'], "scope": STREAM_SCOPE},
+        expires_delta=timedelta(seconds=EVENTS_TICKET_S)
+    )
+
+
+def get_stream_user(authorization: str = Header(None), token: Optional[str] = Query(None)) -> Dict[str, Any]:
+    """``get_current_user`` that also takes a stream ticket as ``?token=``."""
+    if authorization and authorization.startswith("Bearer "):
+        return get_current_user(authorization)
+    return authenticate(token, scope=STREAM_SCOPE)
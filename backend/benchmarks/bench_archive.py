@@ -0,0 +1,103 @@
+"""Reports and reads over a hot store holding every year vs a trimmed one.
+
+Generates a dataset with generate_data.py into a scratch directory and
+times, on a freshly opened attendance table:
+
+- loading it (parse and index attendance.json);
+- encoding the full listing (what /api/attendance/all sends);
+- the employee-performance payload (columns over every record);
+- the monthly report of a month from a year ago, and of this month.
+
+It then archives everything older than ``--retention-days`` with
+storage/archive.py and repeats the same work, the reports now adding the
+archived rollups; the payloads must come out identical.
+
+Usage: python benchmarks/bench_archive.py [--users 2000] [--years 3] [--retention-days 180]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def measure(archive, old_month):
+    from analytics.columnar import AttendanceColumns, LeaveColumns, employee_performance, month_bounds, monthly_report
+    from config import ATTENDANCE_FILE, LEAVES_FILE, USERS_FILE
+    from serialization import dumps
+    from storage.json_store import JsonAttendanceRepository
+    from utils import read_json_file
+
+    users, leaves = read_json_file(USERS_FILE), read_json_file(LEAVES_FILE)
+    attendance = JsonAttendanceRepository(ATTENDANCE_FILE)
+    records, load_s = timed(attendance.list)
+    _, dump_s = timed(lambda: dumps(records))
+    performance, performance_s = timed(lambda: employee_performance(
+        users, AttendanceColumns(attendance.list()), LeaveColumns(leaves), archive.user_totals()
+    ))
+    reports, timings = [], []
+    for year, month in (old_month, (date.today().year, date.today().month)):
+        bounds = month_bounds(year, month)
+        report, report_s = timed(lambda: monthly_report(
+            users, AttendanceColumns(list(attendance.scan(start_date=bounds[0], end_date=bounds[1]))),
+            month, year, archive.month_counts(bounds[0][:7])
+        ))
+        reports.append(report)
+        timings.append(report_s)
+    return {
+        "records": len(records),
+        "size": os.path.getsize(ATTENDANCE_FILE),
+        "times": [load_s, dump_s, performance_s] + timings,
+        "payloads": [performance] + reports,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--departments', type=int, default=50)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--retention-days', type=int, default=180)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before any app module reads the configuration
+        os.environ["DATA_DIR"] = tmp
+        import generate_data
+        from storage import get_attendance_archive, get_attendance_repository
+        from storage.archive import cutoff_for
+        generate_data.generate(args.users, args.departments, args.years, args.seed)
+        today = date.today()
+        old_month = (today.year - 1, today.month)
+        archive = get_attendance_archive()
+
+        before = measure(archive, old_month)
+        cutoff = cutoff_for(args.retention_days)
+        archived, archive_s = timed(lambda: archive.archive(get_attendance_repository(), cutoff))
+        after = measure(archive, old_month)
+        segments = sum(os.path.getsize(os.path.join(archive.directory, s['file']))
+                       for s in archive.manifest()['segments'])
+
+        print(f"archived {sum(archived.values())} records of {len(archived)} months before {cutoff} "
+              f"in {archive_s:.2f} s, {segments / 2 ** 20:.1f} MB of segments")
+        print(f"{'':>22} {'all history':>12} {'archived':>12}")
+        print(f"{'hot records':>22} {before['records']:>12} {after['records']:>12}")
+        print(f"{'attendance.json':>22} {before['size'] / 2 ** 20:>9.1f} MB {after['size'] / 2 ** 20:>9.1f} MB")
+        labels = ("load", "encode listing", "employee-performance", "report, year ago", "report, this month")
+        for label, t_before, t_after in zip(labels, before['times'], after['times']):
+            print(f"{label:>22} {t_before * 1000:>9.1f} ms {t_after * 1000:>9.1f} ms")
+        print("payloads identical:", before['payloads'] == after['payloads'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Per-swipe latency of the JSON rewrite path vs the append-only attendance log.
+
+Usage: python benchmarks/bench_attendance_log.py [--sizes 1000 10000 100000] [--swipes 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.event_log import AttendanceEventLog
+from utils import read_json_file, write_json_file
+
+
+def make_history(size):
+    start = date(2020, 1, 1)
+    return [
+        {
+            "id": i + 1,
+            "user_id": i % 500 + 1,
+            "date": (start + timedelta(days=i // 500)).isoformat(),
+            "check_in": "2020-01-01T09:00:00",
+            "check_out": "2020-01-01T17:00:00"
+        }
+        for i in range(size)
+    ]
+
+
+def json_swipe(path, user_id, today, timestamp):
+    records = read_json_file(path)
+    existing = next((a for a in records if a['user_id'] == user_id and a['date'] == today), None)
+    if existing is None:
+        records.append({
+            "id": max((a['id'] for a in records), default=0) + 1,
+            "user_id": user_id,
+            "date": today,
+            "check_in": timestamp,
+            "check_out": None
+        })
+    write_json_file(path, records)
+
+
+def bench(size, swipes):
+    today = "2099-01-01"
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'attendance.json')
+        write_json_file(json_path, make_history(size))
+        start = time.perf_counter()
+        for user_id in range(swipes):
+            json_swipe(json_path, 10_000 + user_id, today, "2099-01-01T09:00:00")
+        json_ms = (time.perf_counter() - start) / swipes * 1000
+
+        snapshot = os.path.join(tmp, 'snapshot.json')
+        write_json_file(snapshot, make_history(size))
+        log = AttendanceEventLog(os.path.join(tmp, 'attendance.log'), snapshot, compact_every=0)
+        log.load()
+        start = time.perf_counter()
+        for user_id in range(swipes):
+            log.check_in(10_000 + user_id, today, "2099-01-01T09:00:00")
+        log_ms = (time.perf_counter() - start) / swipes * 1000
+    return json_ms, log_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--swipes', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'history':>10} {'json ms/swipe':>15} {'log ms/swipe':>15}")
+    for size in args.sizes:
+        json_ms, log_ms = bench(size, args.swipes)
+        print(f"{size:>10} {json_ms:>15.3f} {log_ms:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
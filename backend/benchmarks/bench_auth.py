@@ -0,0 +1,68 @@
+"""Per-request authentication overhead: the original dependency vs the cached one.
+
+"original" is the get_current_user the routes used to copy: parse the
+header and run a full jwt.decode signature check every time. "cached" is
+authentication.get_current_user, which also resolves the caller's user
+record. Both are called directly, with a pool of distinct tokens cycled
+through so the cache sees a realistic mix of callers. The tokens belong to
+the stored users, so run ``python init_data.py`` first.
+
+Usage: python benchmarks/bench_auth.py [--requests 20000] [--tokens 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+
+from authentication import get_current_user, token_cache
+from storage import get_users_repository, open_storage
+from utils import create_access_token, verify_token
+
+
+def original_get_current_user(authorization):
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    token = authorization.split(" ")[1]
+    payload = verify_token(token)
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return payload
+
+
+def bench(label, dependency, headers, requests):
+    start = time.perf_counter()
+    for i in range(requests):
+        dependency(headers[i % len(headers)])
+    elapsed = time.perf_counter() - start
+    print(f"{label:8}: {elapsed / requests * 1e6:8.1f} us/request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--tokens', type=int, default=100)
+    args = parser.parse_args()
+
+    open_storage()
+    users = get_users_repository().list()
+    if not users:
+        sys.exit("no users in this DATA_DIR: run init_data.py first")
+    headers = []
+    for i in range(args.tokens):
+        user = users[i % len(users)]
+        # Distinct "jti" so every token is a separate cache entry
+        token = create_access_token({"sub": user['email'], "user_id": user['id'], "jti": str(i)})
+        headers.append(f"Bearer {token}")
+
+    bench("original", original_get_current_user, headers, args.requests)
+    token_cache.clear()
+    bench("cached", get_current_user, headers, args.requests)
+    print("cache:", token_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
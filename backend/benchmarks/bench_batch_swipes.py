@@ -0,0 +1,68 @@
+"""Swipe throughput: one call per swipe vs /api/attendance/batch.
+
+Replays the same swipes (every user checks in, then out) against the JSON
+attendance repository, first one transaction per swipe the way the
+check-in/check-out routes apply them, then in batches of increasing size
+the way the batch route does. Reports swipes per second and file writes.
+
+Usage: python benchmarks/bench_batch_swipes.py [--users 1000] [--history 50000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_attendance_log import make_history
+from routes.attendance import SwipeEvent, apply_swipe, swipe_time
+from storage.json_store import JsonAttendanceRepository
+from utils import write_json_file
+
+
+def make_swipes(users):
+    start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    check_ins = [
+        SwipeEvent(user_id=u, action="check_in", timestamp=start + timedelta(seconds=u))
+        for u in range(1, users + 1)
+    ]
+    check_outs = [
+        SwipeEvent(user_id=u, action="check_out", timestamp=start + timedelta(hours=8, seconds=u))
+        for u in range(1, users + 1)
+    ]
+    return check_ins + check_outs
+
+
+def replay(path, swipes, batch_size):
+    repository = JsonAttendanceRepository(path)
+    start = time.perf_counter()
+    for i in range(0, len(swipes), batch_size):
+        batch = swipes[i:i + batch_size]
+        times = [swipe_time(event) for event in batch]
+        with repository.transaction_for(t.strftime("%Y-%m-%d") for t in times):
+            for event, timestamp in zip(batch, times):
+                assert apply_swipe(repository, event, timestamp)[0] == "applied"
+    elapsed = time.perf_counter() - start
+    stats = repository.writer.stats()
+    label = "per swipe" if batch_size == 1 else f"batch {batch_size}"
+    print(f"{label:>10}: {len(swipes) / elapsed:8.0f} swipes/s, {stats['writes']} writes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--history', type=int, default=50000)
+    args = parser.parse_args()
+
+    swipes = make_swipes(args.users)
+    with tempfile.TemporaryDirectory() as tmp:
+        for batch_size in (1, 10, 100, 1000):
+            path = os.path.join(tmp, f'attendance-{batch_size}.json')
+            write_json_file(path, make_history(args.history))
+            replay(path, swipes, batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Columnar employee-performance / monthly-report vs the original per-user scans.
+
+Checks the NumPy and pure-Python paths both reproduce the original payloads,
+then times each.
+
+Usage: python benchmarks/bench_columnar.py [--users 2000] [--days 60]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics.columnar as columnar
+from bench_dashboard_stats import make_data
+
+
+def legacy_employee_performance(users, attendance, leaves):
+    performance_data = []
+    for user in users:
+        if user.get('role') == 'employee':
+            user_attendance = [a for a in attendance if a.get('user_id') == user.get('id')]
+            user_leaves = [l for l in leaves if l.get('user_id') == user.get('id')]
+            total_days = len(set(
+                datetime.fromisoformat(a.get('date', '')).date()
+                for a in user_attendance
+            ))
+            present_days = len([a for a in user_attendance if a.get('check_in') and a.get('check_out')])
+            approved_leaves = len([l for l in user_leaves if l.get('status') == 'approved'])
+            attendance_rate = (present_days / total_days * 100) if total_days > 0 else 0
+            performance_data.append({
+                "user_id": user.get('id'),
+                "name": user.get('name'),
+                "email": user.get('email'),
+                "department": user.get('department'),
+                "total_attendance_records": len(user_attendance),
+                "present_days": present_days,
+                "attendance_rate": round(attendance_rate, 2),
+                "approved_leaves": approved_leaves,
+                "pending_leaves": len([l for l in user_leaves if l.get('status') == 'pending'])
+            })
+    return sorted(performance_data, key=lambda x: x['attendance_rate'], reverse=True)
+
+
+def legacy_monthly_report(users, attendance, month, year):
+    monthly_data = [
+        a for a in attendance
+        if datetime.fromisoformat(a.get('date', '')).month == month
+        and datetime.fromisoformat(a.get('date', '')).year == year
+    ]
+    report = {
+        "month": month,
+        "year": year,
+        "total_records": len(monthly_data),
+        "unique_employees": len(set(a.get('user_id') for a in monthly_data)),
+        "total_present": len([a for a in monthly_data if a.get('check_in') and a.get('check_out')]),
+        "total_absent": len(users) * 20 - len([a for a in monthly_data if a.get('check_in')]),
+        "employee_summary": []
+    }
+    for user in users:
+        if user.get('role') == 'employee':
+            user_monthly = [a for a in monthly_data if a.get('user_id') == user.get('id')]
+            report["employee_summary"].append({
+                "name": user.get('name'),
+                "email": user.get('email'),
+                "present": len([a for a in user_monthly if a.get('check_in') and a.get('check_out')]),
+                "absent": 20 - len([a for a in user_monthly if a.get('check_in')])
+            })
+    return report
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_columnar(users, attendance, leaves, now):
+    attendance_cols = columnar.AttendanceColumns(attendance)
+    leave_cols = columnar.LeaveColumns(leaves)
+    return (
+        columnar.employee_performance(users, attendance_cols, leave_cols),
+        columnar.monthly_report(users, attendance_cols, now.month, now.year)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=60)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    users, attendance, leaves = make_data(args.users, args.days, now, random.Random(0))
+    print(f"{len(users)} users, {len(attendance)} attendance records, {len(leaves)} leaves")
+
+    def legacy():
+        return (
+            legacy_employee_performance(users, attendance, leaves),
+            legacy_monthly_report(users, attendance, now.month, now.year)
+        )
+
+    expected, legacy_ms = timed(legacy)
+    print(f"original per-user scans:       {legacy_ms:9.1f} ms")
+
+    numpy_module = columnar.np
+    paths = [("numpy", numpy_module)] if numpy_module is not None else []
+    paths.append(("pure python", None))
+    for label, module in paths:
+        columnar.np = module
+        result, ms = timed(run_columnar, users, attendance, leaves, now)
+        assert result == expected, f"{label} columnar output differs from the original"
+        attendance_cols = columnar.AttendanceColumns(attendance)
+        leave_cols = columnar.LeaveColumns(leaves)
+        _, query_ms = timed(columnar.employee_performance, users, attendance_cols, leave_cols)
+        print(f"columnar ({label:>11}): build+query {ms:9.1f} ms, cached columns {query_ms:7.1f} ms")
+    columnar.np = numpy_module
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""The single-pass dashboard_stats engine vs the original multi-pass endpoint.
+
+Checks both produce the same payload, then times them.
+
+Usage: python benchmarks/bench_dashboard_stats.py [--users 5000] [--days 60]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics.aggregation import dashboard_stats
+
+
+def legacy_dashboard_stats(users, attendance, leaves, now):
+    """get_dashboard_stats as it was before the aggregation engine."""
+    today = now.date()
+    total_users = len(users)
+    total_employees = len([u for u in users if u.get('role') == 'employee'])
+    total_admins = len([u for u in users if u.get('role') == 'admin'])
+    today_attendance = [a for a in attendance if datetime.fromisoformat(a.get('date', '')).date() == today]
+    present_today = len([a for a in today_attendance if a.get('check_in') and a.get('check_out')])
+    absent_today = total_employees - len([a for a in today_attendance if a.get('check_in')])
+    pending_leaves = len([l for l in leaves if l.get('status') == 'pending'])
+    approved_leaves = len([l for l in leaves if l.get('status') == 'approved'])
+    rejected_leaves = len([l for l in leaves if l.get('status') == 'rejected'])
+    this_month_attendance = [
+        a for a in attendance
+        if datetime.fromisoformat(a.get('date', '')).month == now.month
+        and datetime.fromisoformat(a.get('date', '')).year == now.year
+    ]
+    departments = {}
+    for user in users:
+        dept = user.get('department', 'Unknown')
+        if dept not in departments:
+            departments[dept] = {'total': 0, 'present': 0}
+        departments[dept]['total'] += 1
+        user_attendance = [a for a in today_attendance if a.get('user_id') == user.get('id')]
+        if user_attendance and user_attendance[0].get('check_in'):
+            departments[dept]['present'] += 1
+    return {
+        "total_users": total_users,
+        "total_employees": total_employees,
+        "total_admins": total_admins,
+        "today": {
+            "present": present_today,
+            "absent": absent_today,
+            "total_checked_in": len([a for a in today_attendance if a.get('check_in')])
+        },
+        "leaves": {
+            "pending": pending_leaves,
+            "approved": approved_leaves,
+            "rejected": rejected_leaves,
+            "total": len(leaves)
+        },
+        "this_month": {
+            "total_records": len(this_month_attendance),
+            "unique_employees": len(set(a.get('user_id') for a in this_month_attendance))
+        },
+        "departments": departments
+    }
+
+
+def make_data(n_users, n_days, now, rng):
+    users = [
+        {"id": i, "name": f"User {i}", "email": f"u{i}@example.com",
+         "role": "admin" if i % 100 == 0 else "employee", "department": f"Dept {i % 50}"}
+        for i in range(1, n_users + 1)
+    ]
+    attendance = []
+    for day in range(n_days):
+        date = (now - timedelta(days=day)).strftime("%Y-%m-%d")
+        for user in users:
+            if rng.random() < 0.9:
+                attendance.append({
+                    "id": len(attendance) + 1, "user_id": user['id'], "date": date,
+                    "check_in": f"{date}T09:00:00",
+                    "check_out": f"{date}T17:00:00" if rng.random() < 0.8 else None
+                })
+    leaves = [
+        {"id": i, "user_id": rng.randrange(1, n_users + 1),
+         "status": rng.choice(["pending", "approved", "rejected"])}
+        for i in range(1, n_users // 2)
+    ]
+    return users, attendance, leaves
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=60)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    users, attendance, leaves = make_data(args.users, args.days, now, random.Random(0))
+    print(f"{len(users)} users, {len(attendance)} attendance records, {len(leaves)} leaves")
+
+    new, new_s = timed(dashboard_stats, users, attendance, leaves, now)
+    old, old_s = timed(legacy_dashboard_stats, users, attendance, leaves, now)
+    assert new == old, "aggregation engine output differs from the original endpoint"
+    print(f"original: {old_s * 1000:.1f} ms  single-pass: {new_s * 1000:.1f} ms  "
+          f"({old_s / new_s:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
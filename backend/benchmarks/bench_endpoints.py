@@ -0,0 +1,258 @@
+"""Latency, throughput and memory of every router against a generated dataset.
+
+Generates a dataset with generate_data.py into a scratch data directory (or
+reuses ``--data-dir``), starts the app in-process and drives it through the
+ASGI interface, like uvicorn would: login, check-in, check-out, the four
+/api/dashboard endpoints, /api/attendance/all pages, /api/leaves/pending,
+who is on leave in a week and leave approval. Each scenario runs ``--concurrency`` requests at a time.
+
+Prints a JSON report (``--output`` writes it to a file): per scenario the
+request and error counts, the first (cold cache) request, p50/p95/p99/mean/max
+latency in ms, throughput and peak RSS so far, plus the dataset, settings
+and commit. ``--compare`` prints the change from an earlier report.
+
+Usage: python benchmarks/bench_endpoints.py [--users 2000] [--departments 50]
+           [--years 1] [--requests 200] [--logins 50] [--concurrency 8]
+           [--data-dir DIR] [--output FILE] [--compare FILE]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20, 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenario(client, requests, concurrency):
+    """Issue ``requests`` (method, url, kwargs) tuples; returns the stats."""
+    latencies = [None] * len(requests)
+    errors = 0
+    position = 0
+
+    async def worker():
+        nonlocal errors, position
+        while position < len(requests):
+            index = position
+            position += 1
+            method, url, kwargs = requests[index]
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies[index] = time.perf_counter() - start
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(requests)))))
+    elapsed = time.perf_counter() - start
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "first_ms": round(ms[0], 2),
+        "p50_ms": round(percentile(ms, 0.50), 2),
+        "p95_ms": round(percentile(ms, 0.95), 2),
+        "p99_ms": round(percentile(ms, 0.99), 2),
+        "mean_ms": round(sum(ms) / len(ms), 2),
+        "max_ms": round(max(ms), 2),
+        "throughput_rps": round(len(ms) / elapsed, 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def build_scenarios(args, rng, admin_headers):
+    from storage import get_attendance_repository, get_leaves_repository, get_users_repository
+
+    users = get_users_repository().list()
+    attendance = get_attendance_repository()
+    today = date.today().isoformat()
+    # Only people who have not swiped today, so re-runs on one dataset work
+    swipers = [u['id'] for u in users if attendance.find(u['id'], today) is None]
+    swipers = rng.sample(swipers, min(args.requests, len(swipers)))
+    pending = [leave['id'] for leave in get_leaves_repository().scan(status='pending')]
+    pending = rng.sample(pending, min(args.requests, len(pending)))
+    max_id = max((r['id'] for r in attendance.scan()), default=0)
+    n = args.requests
+    return {
+        "login": [
+            ("POST", "/api/auth/login", {"json": {"email": u['email'], "password": "password"}})
+            for u in rng.choices(users, k=args.logins)
+        ],
+        "check_in": [
+            ("POST", "/api/attendance/check-in", {"json": {"user_id": uid}, "headers": admin_headers})
+            for uid in swipers
+        ],
+        "check_out": [
+            ("POST", "/api/attendance/check-out", {"json": {"user_id": uid}, "headers": admin_headers})
+            for uid in swipers
+        ],
+        "dashboard_stats": [("GET", "/api/dashboard/stats", {"headers": admin_headers})] * n,
+        "dashboard_attendance_chart": [
+            ("GET", "/api/dashboard/attendance-chart?days=30", {"headers": admin_headers})
+        ] * n,
+        "dashboard_employee_performance": [
+            ("GET", "/api/dashboard/employee-performance", {"headers": admin_headers})
+        ] * n,
+        "dashboard_monthly_report": [
+            ("GET", "/api/dashboard/monthly-report", {"headers": admin_headers})
+        ] * n,
+        "attendance_all_page": [
+            ("GET", f"/api/attendance/all?limit=1000&after_id={rng.randrange(max(max_id, 1))}",
+             {"headers": admin_headers})
+            for _ in range(n)
+        ],
+        "leaves_pending_page": [
+            ("GET", "/api/leaves/pending?limit=100", {"headers": admin_headers})
+        ] * n,
+        "leaves_on_leave_week": [
+            ("GET", f"/api/leaves/on-leave?start_date={day}&end_date={day + timedelta(days=6)}",
+             {"headers": admin_headers})
+            for day in (date.today() - timedelta(days=rng.randrange(365)) for _ in range(n))
+        ],
+        "leave_approve": [
+            ("POST", f"/api/leaves/approve/{leave_id}", {"headers": admin_headers})
+            for leave_id in pending
+        ],
+    }
+
+
+async def benchmark(args, dataset):
+    import httpx
+    import main as app_module
+    from config import ATTENDANCE_STORAGE, JSON_FILE_FORMAT, STORAGE_BACKEND
+    from serialization import backend
+    from storage import get_users_repository
+    from utils import create_access_token
+    from warmup import is_ready
+
+    started = time.perf_counter()
+    app_module.startup()
+    while not is_ready():
+        await asyncio.sleep(0.05)
+    startup_s = time.perf_counter() - started
+
+    admin = get_users_repository().get_by_email("admin@example.com")
+    token = create_access_token({"sub": admin['email'], "user_id": admin['id']})
+    scenarios = build_scenarios(args, random.Random(args.seed), {"Authorization": f"Bearer {token}"})
+
+    results = {}
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, requests in scenarios.items():
+            if not requests:
+                continue
+            results[name] = await run_scenario(client, requests, args.concurrency)
+            print(f"{name:>32}: p50 {results[name]['p50_ms']:8.2f} ms  "
+                  f"p99 {results[name]['p99_ms']:8.2f} ms  "
+                  f"{results[name]['throughput_rps']:8.1f} req/s  "
+                  f"{results[name]['errors']} errors", file=sys.stderr)
+    app_module.shutdown()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "settings": {
+            "storage_backend": STORAGE_BACKEND,
+            "attendance_storage": ATTENDANCE_STORAGE,
+            "json_file_format": JSON_FILE_FORMAT,
+            "serialization": backend(),
+            "concurrency": args.concurrency,
+        },
+        "dataset": dataset,
+        "startup_s": round(startup_s, 2),
+        "scenarios": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(report, baseline):
+    print(f"compared with {baseline.get('commit')}:", file=sys.stderr)
+    for name, current in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        changes = "  ".join(
+            f"{key} {before[key]:g} -> {current[key]:g} ({(current[key] / before[key] - 1) * 100:+.0f}%)"
+            for key in ("p50_ms", "p99_ms", "throughput_rps") if before[key]
+        )
+        print(f"{name:>32}: {changes}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--departments', type=int, default=50)
+    parser.add_argument('--years', type=float, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per scenario")
+    parser.add_argument('--logins', type=int, default=50, help="Logins (each costs a bcrypt check)")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--data-dir', help="Generate into (or reuse) this directory instead of a scratch one")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    parser.add_argument('--compare', help="An earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    scratch = None
+    if args.data_dir is None:
+        scratch = tempfile.TemporaryDirectory()
+        args.data_dir = scratch.name
+    # Before any app module reads the configuration
+    os.environ["DATA_DIR"] = os.path.abspath(args.data_dir)
+
+    import generate_data
+    from storage import get_users_repository
+
+    dataset = {"users": len(get_users_repository().list())}
+    if not dataset["users"]:
+        started = time.perf_counter()
+        dataset = generate_data.generate(args.users, args.departments, args.years, args.seed)
+        dataset["generate_s"] = round(time.perf_counter() - started, 1)
+    try:
+        report = asyncio.run(benchmark(args, dataset))
+    finally:
+        if scratch is not None:
+            scratch.cleanup()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Streaming CSV exports vs building the listing in memory.
+
+Generates a dataset with generate_data.py into a scratch directory, starts
+the app in-process and calls it through the ASGI interface directly, so
+the time of the first body chunk is visible (an HTTP client that buffers
+the response would hide it). For the whole attendance table and for one
+month it compares:
+
+- /api/attendance/all (a JSON list built in full before it is sent);
+- /api/export/attendance (CSV, plain and gzip-compressed).
+
+Reports time to first byte, total time, response size and the peak of
+Python allocations while the response is produced (tracemalloc, in a
+second, slower run).
+
+Usage: python benchmarks/bench_export.py [--users 2000] [--years 1]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def call(app, path, query, headers):
+    """(seconds to first body byte, total seconds, body bytes) of one GET."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "server": ("bench", 80), "client": ("127.0.0.1", 1), "root_path": "",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    first, size, status = None, 0, None
+    requested, done = False, asyncio.Event()
+    start = time.perf_counter()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Streaming responses listen for a disconnect while they send
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first, size, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if first is None:
+                first = time.perf_counter() - start
+            size += len(message["body"])
+
+    await app(scope, receive, send)
+    done.set()
+    if status != 200:
+        raise RuntimeError(f"{path}?{query}: HTTP {status}")
+    return first or 0.0, time.perf_counter() - start, size
+
+
+async def benchmark():
+    import main as app_module
+    from storage import get_users_repository
+    from utils import create_access_token
+    from warmup import is_ready
+
+    app_module.startup()
+    while not is_ready():
+        await asyncio.sleep(0.05)
+    admin = get_users_repository().get_by_email("admin@example.com")
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": admin['email'], "user_id": admin['id']})}
+    month = date.today().strftime("%Y-%m")
+    start_date, end_date = f"{month}-01", date.today().isoformat()
+    cases = [
+        ("all: /attendance/all", "/api/attendance/all", ""),
+        ("all: export csv", "/api/export/attendance", ""),
+        ("all: export csv.gz", "/api/export/attendance", "gzip=true"),
+        ("month: /attendance/all", "/api/attendance/all", f"start_date={start_date}&end_date={end_date}"),
+        ("month: export csv", "/api/export/attendance", f"month={month}"),
+        ("month: export csv.gz", "/api/export/attendance", f"month={month}&gzip=true"),
+    ]
+    # Load and index everything before timing anything
+    await call(app_module.app, "/api/attendance/all", "limit=1", headers)
+
+    print(f"{'':>24} {'first byte':>11} {'total':>9} {'size':>10} {'peak alloc':>11}")
+    for label, path, query in cases:
+        first, total, size = await call(app_module.app, path, query, headers)
+        tracemalloc.start()
+        await call(app_module.app, path, query, headers)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:>24} {first * 1000:8.1f} ms {total:7.2f} s {size / 2 ** 20:7.1f} MB "
+              f"{peak / 2 ** 20:8.1f} MB")
+    app_module.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--departments', type=int, default=50)
+    parser.add_argument('--years', type=float, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before any app module reads the configuration
+        os.environ["DATA_DIR"] = tmp
+        import generate_data
+        dataset = generate_data.generate(args.users, args.departments, args.years, args.seed)
+        print(f"{dataset['attendance']} attendance records, {dataset['users']} users")
+        asyncio.run(benchmark())
+
+
+if __name__ == "__main__":
+    main()
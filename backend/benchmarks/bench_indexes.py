@@ -0,0 +1,154 @@
+"""Indexed lookups vs linear scans, plus an index consistency check.
+
+Runs a random mix of create/update/delete against the JSON repositories and
+verifies after every step that the in-memory indexes match a rebuild from
+the file on disk, then times the hot lookups: an attendance (user_id, date)
+lookup, and over generated leaves (five a year for ``--users`` people) who
+is on leave on a day or in a week, and a user's overlap check.
+
+Usage: python benchmarks/bench_indexes.py [--records 50000] [--ops 500] [--users 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_data import generate_leaves, generate_users, joining_dates
+from storage.base import ACTIVE_LEAVE_STATUSES
+from storage.json_store import JsonAttendanceRepository, JsonLeavesRepository, JsonUsersRepository
+from utils import read_json_file, write_json_file
+
+
+def check(repository):
+    on_disk = read_json_file(repository.file_path)
+    assert repository.list() == on_disk, "in-memory records differ from the file"
+    assert repository.indexes.verify(on_disk), "indexes differ from a rebuild"
+
+
+def churn(tmp, ops, rng):
+    users = JsonUsersRepository(os.path.join(tmp, 'users.json'))
+    attendance = JsonAttendanceRepository(os.path.join(tmp, 'attendance.json'))
+    leaves = JsonLeavesRepository(os.path.join(tmp, 'leaves.json'))
+    for _ in range(ops):
+        choice = rng.random()
+        user_ids = [u['id'] for u in users.list()]
+        if choice < 0.4 or not user_ids:
+            users.create({
+                "name": "u", "email": f"u{rng.randrange(10**9)}@example.com",
+                "password": "x", "role": "employee", "department": "D"
+            })
+        elif choice < 0.55:
+            users.update(rng.choice(user_ids), {"email": f"v{rng.randrange(10**9)}@example.com"})
+        elif choice < 0.65:
+            users.delete(rng.choice(user_ids))
+        elif choice < 0.8:
+            user_id, day = rng.choice(user_ids), f"2026-01-{rng.randint(1, 28):02d}"
+            existing = attendance.find(user_id, day)
+            if existing:
+                attendance.update(existing['id'], {"check_out": "2026-01-01T17:00:00"})
+            else:
+                attendance.create({"user_id": user_id, "date": day, "check_in": "t", "check_out": None})
+        else:
+            pending = leaves.list_by_status('pending')
+            if pending and rng.random() < 0.5:
+                leaves.update(rng.choice(pending)['id'], {"status": rng.choice(['approved', 'rejected'])})
+            else:
+                leaves.create({
+                    "user_id": rng.choice(user_ids), "start_date": "2026-02-01",
+                    "end_date": "2026-02-02", "reason": "r", "status": "pending"
+                })
+        for repository in (users, attendance, leaves):
+            check(repository)
+
+
+def time_lookups(tmp, size, rng):
+    path = os.path.join(tmp, 'big_attendance.json')
+    write_json_file(path, [
+        {"id": i + 1, "user_id": i % 1000, "date": f"day-{i // 1000}", "check_in": "t", "check_out": None}
+        for i in range(size)
+    ])
+    repository = JsonAttendanceRepository(path)
+    repository.list()
+    keys = [(rng.randrange(1000), f"day-{rng.randrange(size // 1000)}") for _ in range(200)]
+
+    start = time.perf_counter()
+    for user_id, day in keys:
+        repository.find(user_id, day)
+    indexed_us = (time.perf_counter() - start) / len(keys) * 1e6
+
+    records = repository.list()
+    start = time.perf_counter()
+    for user_id, day in keys:
+        next((a for a in records if a['user_id'] == user_id and a['date'] == day), None)
+    scan_us = (time.perf_counter() - start) / len(keys) * 1e6
+    return indexed_us, scan_us
+
+
+def time_leave_queries(tmp, n_users, rng):
+    today = date.today()
+    users = generate_users(n_users, 50, rng)
+    leaves = generate_leaves(users, joining_dates(users, today - timedelta(days=3 * 365), today, rng), today, rng)
+    path = os.path.join(tmp, 'big_leaves.json')
+    write_json_file(path, leaves)
+    repository = JsonLeavesRepository(path)
+    start = time.perf_counter()
+    repository.list()
+    load_s = time.perf_counter() - start
+
+    def scan(start_date, end_date, user_id=None):
+        return [
+            l for l in repository.list()
+            if (user_id is None or l['user_id'] == user_id) and l['status'] in ACTIVE_LEAVE_STATUSES
+            and l['start_date'] <= end_date and l['end_date'] >= start_date
+        ]
+
+    days = [(today + timedelta(days=rng.randrange(-1000, 90))) for _ in range(100)]
+    queries = {
+        "on leave on a day": [(d.isoformat(), d.isoformat(), None) for d in days],
+        "on leave in a week": [(d.isoformat(), (d + timedelta(days=6)).isoformat(), None) for d in days],
+        "user overlap check": [
+            (d.isoformat(), (d + timedelta(days=2)).isoformat(), rng.randrange(1, n_users + 1)) for d in days
+        ],
+    }
+    results = {}
+    for name, args in queries.items():
+        for a in args:
+            assert repository.overlapping(*a) == sorted(scan(*a), key=lambda l: (l['start_date'], l['id']))
+        timings = []
+        for fn in (repository.overlapping, scan):
+            start = time.perf_counter()
+            for a in args:
+                fn(*a)
+            timings.append((time.perf_counter() - start) / len(args) * 1e6)
+        results[name] = timings
+    return len(leaves), load_s, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=50_000)
+    parser.add_argument('--ops', type=int, default=500)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        churn(tmp, args.ops, rng)
+        print(f"indexes consistent after {args.ops} random writes")
+        indexed_us, scan_us = time_lookups(tmp, args.records, rng)
+        n_leaves, load_s, leave_results = time_leave_queries(tmp, args.users, rng)
+    print(f"(user_id, date) lookup over {args.records} records: "
+          f"indexed {indexed_us:.2f} us, scan {scan_us:.2f} us")
+    print(f"{n_leaves} leaves loaded and indexed in {load_s:.2f}s")
+    for name, (indexed_us, scan_us) in leave_results.items():
+        print(f"{name}: indexed {indexed_us:.1f} us, scan {scan_us:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""p99 latency of GET /api/attendance/{user_id} while logins run concurrently.
+
+"before" mounts the original login handler, which verifies the bcrypt hash
+on the event loop; "after" uses the current /api/auth/login, which runs it
+on the password process pool. Requests go through the ASGI app in-process,
+so the event loop is shared exactly as it is under uvicorn.
+
+It logs in as the seeded employee, so run ``python init_data.py`` first.
+
+Usage: python benchmarks/bench_login_latency.py [--logins 50] [--reads 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from executors import executor_stats, shutdown_executors, start_executors, warm_password_pool
+from routes import attendance, auth
+from routes.auth import LoginRequest
+from storage import get_users_repository, open_storage
+from utils import create_access_token, verify_password
+
+EMAIL = "emp@example.com"
+PASSWORD = "password"
+READ_INTERVAL_S = 0.005
+
+
+def build_app():
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api/auth")
+    app.include_router(attendance.router, prefix="/api/attendance")
+
+    @app.post("/legacy/login")
+    async def legacy_login(request: LoginRequest):
+        user = get_users_repository().get_by_email(request.email)
+        if not user or not verify_password(request.password, user['password']):
+            raise HTTPException(status_code=401, detail="Invalid email or password")
+        return {"token": create_access_token({"sub": user['email'], "user_id": user['id']})}
+
+    return app
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run(client, login_path, logins, reads, headers, user_id):
+    latencies = []
+
+    async def login():
+        response = await client.post(login_path, json={"email": EMAIL, "password": PASSWORD})
+        response.raise_for_status()
+
+    async def reader():
+        # Reads are due every READ_INTERVAL_S and timed from when they were
+        # due: a read held up by a blocked event loop counts that wait
+        first = time.perf_counter()
+        for i in range(reads):
+            due = first + i * READ_INTERVAL_S
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            response = await client.get(f"/api/attendance/{user_id}", headers=headers)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - due)
+
+    start = time.perf_counter()
+    await asyncio.gather(reader(), *(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    return elapsed, latencies
+
+
+async def main_async(args):
+    open_storage()
+    user = get_users_repository().get_by_email(EMAIL)
+    if user is None:
+        sys.exit(f"{EMAIL} does not exist in this DATA_DIR: run init_data.py first")
+    start_executors()
+    warm_password_pool()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': EMAIL, 'user_id': user['id']})}"}
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for label, path in (("before", "/legacy/login"), ("after", "/api/auth/login")):
+            elapsed, latencies = await run(client, path, args.logins, args.reads, headers, user['id'])
+            print(f"{label:6}: {args.logins} logins + {len(latencies)} reads in {elapsed:6.2f} s, "
+                  f"read p50 {percentile(latencies, 0.50) * 1000:7.1f} ms, "
+                  f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms")
+    print("executors:", executor_stats())
+    shutdown_executors()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--reads', type=int, default=200)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Memory per record: dict records vs the compact ones of storage/records.py.
+
+Generates an attendance and leaves dataset (generate_data.py), writes it
+to a scratch directory and loads it in a fresh process per representation
+(``COMPACT_RECORDS=0`` and ``=1``), reporting the resident memory each
+table adds, scaled to a million records:
+
+- records: the parsed records alone, as the repository holds them;
+- table: the loaded repository, i.e. the records plus their indexes.
+
+Each child also times the load and encoding every record back to JSON
+(what a full-table response or file write does).
+
+Usage: python benchmarks/bench_memory.py [--users 2000] [--years 3]
+"""
+import argparse
+import gc
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+
+def rss() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def child(table: str, path: str, what: str) -> None:
+    from serialization import dumps
+    from storage.json_store import JsonAttendanceRepository, JsonLeavesRepository
+    from utils import FrozenDict, FrozenList, read_json_file, read_json_records
+    repository_type = JsonAttendanceRepository if table == "attendance" else JsonLeavesRepository
+    gc.collect()
+    before = rss()
+    start = time.perf_counter()
+    if what == "records":
+        if repository_type.record_type is FrozenDict:
+            records = FrozenList(read_json_file(path, readonly=True))
+        else:
+            records = FrozenList(read_json_records(path, repository_type.record_type))
+    else:
+        repository = repository_type(path)
+        records = repository.list()
+        if table == "leaves":
+            repository.overlapping("2000-01-01", "2000-01-01")  # builds the interval tree
+    load_s = time.perf_counter() - start
+    gc.collect()
+    grown = rss() - before
+    start = time.perf_counter()
+    dumps(records)
+    dump_s = time.perf_counter() - start
+    print(len(records), grown, load_s, dump_s)
+
+
+def measure(table: str, path: str, what: str, compact: bool):
+    env = dict(os.environ, COMPACT_RECORDS="1" if compact else "0", DATA_DIR=os.path.dirname(path))
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", table, path, what],
+        env=env, cwd=BACKEND, check=True, capture_output=True, text=True
+    ).stdout.split()
+    count, grown, load_s, dump_s = int(out[0]), int(out[1]), float(out[2]), float(out[3])
+    return count, grown / count * 1_000_000 / 2 ** 20, load_s, dump_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--child', nargs=3, metavar=("TABLE", "PATH", "WHAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATA_DIR"] = tmp
+        from generate_data import generate_attendance, generate_leaves, generate_users, joining_dates
+        from utils import write_json_file
+        rng = random.Random(args.seed)
+        today = date.today()
+        start = today - timedelta(days=round(365 * args.years))
+        users = generate_users(args.users, 50, rng)
+        joined = joining_dates(users, start, today, rng)
+        leaves = generate_leaves(users, joined, today, rng)
+        paths = {
+            "attendance": os.path.join(tmp, 'attendance.json'),
+            "leaves": os.path.join(tmp, 'leaves.json'),
+        }
+        write_json_file(paths["leaves"], leaves)
+        write_json_file(paths["attendance"], list(generate_attendance(users, joined, leaves, start, today, rng)))
+
+        print(f"{'':>22} {'records':>9} {'dicts':>12} {'compact':>12} {'load s':>15} {'encode s':>15}")
+        for table, path in paths.items():
+            for what in ("records", "table"):
+                count, before_mb, before_load, before_dump = measure(table, path, what, compact=False)
+                _, after_mb, after_load, after_dump = measure(table, path, what, compact=True)
+                print(f"{table + ' ' + what:>22} {count:>9} {before_mb:>8.0f} MB/M {after_mb:>8.0f} MB/M "
+                      f"{before_load:>7.2f}/{after_load:<7.2f} {before_dump:>7.2f}/{after_dump:<7.2f}")
+
+
+if __name__ == "__main__":
+    main()
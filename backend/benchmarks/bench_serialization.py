@@ -0,0 +1,100 @@
+"""Data-file and response encoding: the original stdlib paths vs serialization.py.
+
+Builds N attendance records and times:
+
+- writing and parsing a data file the original way (``json.dump`` with
+  ``indent=2``, ``json.load``) and through ``utils.write_json_file`` /
+  ``serialization.loads`` in both ``JSON_FILE_FORMAT`` modes, with file
+  sizes, plus the full cache load (parse and freeze into read-only
+  records) before and after;
+- encoding them as a response the way FastAPI did for a returned list
+  (``jsonable_encoder`` then ``JSONResponse``) and with ``FastJSONResponse``.
+
+``--stdlib`` hides orjson to measure the fallback.
+
+Usage: python benchmarks/bench_serialization.py [--records 1000000] [--stdlib]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--records', type=int, default=1_000_000)
+parser.add_argument('--stdlib', action='store_true', help="measure without orjson")
+args = parser.parse_args()
+if args.stdlib:
+    sys.modules['orjson'] = None
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import utils
+from bench_attendance_log import make_history
+from serialization import FastJSONResponse, backend, loads
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:>34}: {time.perf_counter() - start:7.2f}s")
+    return result
+
+
+def legacy_dump(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+
+
+def legacy_load(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def legacy_freeze(value):
+    if isinstance(value, dict):
+        return utils.FrozenDict((k, legacy_freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return utils.FrozenList(legacy_freeze(v) for v in value)
+    return value
+
+
+def load(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def main():
+    records = [{**r, "user_name": f"Employee {r['user_id']}"} for r in make_history(args.records)]
+    print(f"{len(records)} records, serialization backend: {backend()}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("data files")
+        path = os.path.join(tmp, 'legacy.json')
+        timed("before: json.dump indent=2", lambda: legacy_dump(path, records))
+        before = timed("before: json.load", lambda: legacy_load(path))
+        timed("before: json.load + freeze", lambda: legacy_freeze(legacy_load(path)))
+        print(f"{'size':>34}: {os.path.getsize(path) / 1e6:7.1f} MB")
+        for file_format in ("indented", "compact"):
+            utils.JSON_FILE_FORMAT = file_format
+            path = os.path.join(tmp, f'{file_format}.json')
+            timed(f"after: write_json_file {file_format}", lambda: utils.write_json_file(path, records))
+            after = timed(f"after: loads {file_format}", lambda: load(path))
+            timed(f"after: loads + freeze {file_format}", lambda: utils.json_cache.get(path))
+            print(f"{'size':>34}: {os.path.getsize(path) / 1e6:7.1f} MB")
+            assert after == before
+            utils.json_cache.invalidate(path)
+
+        print("responses")
+        legacy = timed("before: jsonable_encoder+JSONResponse",
+                       lambda: JSONResponse(jsonable_encoder(records)).body)
+        fast = timed("after: FastJSONResponse", lambda: FastJSONResponse(records).body)
+        assert json.loads(legacy) == json.loads(fast)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Worker start-up time of ``uvicorn main:app``.
+
+Starts the server repeatedly and reports how long it takes until it answers
+``/health`` at all (listening) and until it reports ready (caches warm).
+For comparison it also times the three bcrypt hashes the old import-time
+seeding did on every start, before the server could even listen.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--port 8765]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from utils import hash_password
+
+
+def health_status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def start_once(port, timeout=60):
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR
+    )
+    listening = None
+    try:
+        while time.perf_counter() - start < timeout:
+            status = health_status(url)
+            if status is not None and listening is None:
+                listening = time.perf_counter() - start
+            if status == 200:
+                return listening, time.perf_counter() - start
+            time.sleep(0.01)
+        raise RuntimeError("server did not become ready")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    for run in range(args.runs):
+        listening, ready = start_once(args.port)
+        print(f"run {run + 1}: listening after {listening * 1000:6.0f} ms, ready after {ready * 1000:6.0f} ms")
+
+    start = time.perf_counter()
+    for _ in range(3):
+        hash_password("password")
+    print(f"old import-time seeding (3 bcrypt hashes): {(time.perf_counter() - start) * 1000:6.0f} ms per start")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Concurrent check-in burst against the JSON attendance repository.
+
+Many threads check users in at once, the way the check-in route does
+(find today's record, then create it, inside one transaction). Afterwards
+the file is re-read from disk by a fresh repository and every check-in must
+be there exactly once. Reports swipes per second and how many file writes
+the group commit needed.
+
+Usage: python benchmarks/stress_checkins.py [--threads 200] [--users 2000] [--history 50000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_attendance_log import make_history
+from storage.json_store import JsonAttendanceRepository
+from utils import write_json_file
+
+
+def check_in(repository, user_id, today):
+    with repository.transaction():
+        if repository.find(user_id, today) is None:
+            repository.create({
+                "user_id": user_id,
+                "date": today,
+                "check_in": f"{today}T09:00:00",
+                "check_out": None
+            })
+
+
+def burst(path, threads, users, window):
+    repository = JsonAttendanceRepository(path)
+    repository.writer.window = window
+    today = date.today().isoformat()
+    # Every user swipes twice, so duplicates must be rejected too
+    swipes = [user_id for user_id in range(1, users + 1)] * 2
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not swipes:
+                    return
+                user_id = swipes.pop()
+            check_in(repository, user_id, today)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    on_disk = [r for r in JsonAttendanceRepository(path).list() if r['date'] == today]
+    per_user = {}
+    for record in on_disk:
+        per_user[record['user_id']] = per_user.get(record['user_id'], 0) + 1
+    lost = users - len(per_user)
+    duplicated = sum(1 for count in per_user.values() if count > 1)
+    stats = repository.writer.stats()
+    print(f"window {window * 1000:4.1f} ms: {2 * users / elapsed:8.0f} swipes/s, "
+          f"{stats['mutations']} check-ins in {stats['writes']} writes, "
+          f"lost {lost}, duplicated {duplicated}")
+    return lost + duplicated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=200)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--history', type=int, default=50000)
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for window in (0.0, 0.002, 0.01):
+            path = os.path.join(tmp, f'attendance-{window}.json')
+            write_json_file(path, make_history(args.history))
+            failures += burst(path, args.threads, args.users, window)
+    if failures:
+        sys.exit("check-ins were lost or duplicated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Several worker processes writing the same data files at once.
+
+For each attendance storage mode, ``--processes`` processes with
+``--threads`` threads each all try to check in every user (exactly one
+attempt per user may succeed), then each process checks out its own share
+of the users. Afterwards every user must have exactly one record, with both
+check-in and check-out set: a lost write or a lost update would show up as
+a missing record or a missing check-out.
+
+The parent keeps a repository loaded throughout, so it also checks that a
+hot, long-lived worker sees the other processes' writes, and measures how
+long a write takes to become visible to it.
+
+Usage: python benchmarks/stress_multiprocess.py [--processes 4] [--threads 8] [--users 500]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.event_log import AttendanceEventLog
+from storage.json_store import JsonAttendanceRepository, LoggedAttendanceRepository
+from storage.partitioned import PartitionedAttendanceRepository
+
+MODES = ("json", "log", "partitioned")
+
+
+def open_repository(mode, directory):
+    if mode == "log":
+        # Compact often so processes also have to follow each other's compactions
+        return LoggedAttendanceRepository(AttendanceEventLog(
+            os.path.join(directory, 'attendance.log'), os.path.join(directory, 'attendance.json'),
+            compact_every=200
+        ))
+    if mode == "partitioned":
+        return PartitionedAttendanceRepository(os.path.join(directory, 'attendance'))
+    return JsonAttendanceRepository(os.path.join(directory, 'attendance.json'))
+
+
+def check_in(repository, user_id, today):
+    with repository.transaction():
+        if repository.find(user_id, today) is None:
+            repository.create({
+                "user_id": user_id,
+                "date": today,
+                "check_in": f"{today}T09:00:00",
+                "check_out": None
+            })
+            return True
+    return False
+
+
+def check_out(repository, user_id, today):
+    with repository.transaction():
+        record = repository.find(user_id, today)
+        repository.update(record['id'], {"check_out": f"{today}T17:00:00"})
+
+
+def run_threads(threads, items, fn):
+    lock = threading.Lock()
+    results = []
+
+    def worker():
+        while True:
+            with lock:
+                if not items:
+                    return
+                item = items.pop()
+            result = fn(item)
+            with lock:
+                results.append(result)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return results
+
+
+def worker_process(mode, directory, index, processes, threads, users, barrier, created):
+    repository = open_repository(mode, directory)
+    today = date.today().isoformat()
+    barrier.wait()
+    user_ids = list(range(1, users + 1))
+    random.shuffle(user_ids)
+    wins = run_threads(threads, user_ids, lambda u: check_in(repository, u, today))
+    created.put(sum(wins))
+    # Every check-in must be in before anyone checks out
+    barrier.wait()
+    mine = [u for u in range(1, users + 1) if u % processes == index]
+    run_threads(threads, mine, lambda u: check_out(repository, u, today))
+
+
+def writer_process(mode, directory, count, interval):
+    repository = open_repository(mode, directory)
+    for i in range(count):
+        repository.create({
+            "user_id": 1_000_000 + i,
+            "date": date.today().isoformat(),
+            "check_in": repr(time.time()),
+            "check_out": None
+        })
+        time.sleep(interval)
+
+
+def measure_visibility(mode, directory, hot, count=50, interval=0.01):
+    """Delays until the hot repository sees another process's writes."""
+    today = date.today().isoformat()
+    writer = multiprocessing.Process(target=writer_process, args=(mode, directory, count, interval))
+    writer.start()
+    delays = []
+    for i in range(count):
+        while True:
+            record = hot.find(1_000_000 + i, today)
+            if record is not None:
+                delays.append(time.time() - float(record['check_in']))
+                break
+            time.sleep(0.0005)
+    writer.join()
+    return delays
+
+
+def stress(mode, processes, threads, users):
+    today = date.today().isoformat()
+    with tempfile.TemporaryDirectory() as tmp:
+        hot = open_repository(mode, tmp)
+        hot.list()
+        barrier = multiprocessing.Barrier(processes)
+        created = multiprocessing.Queue()
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(
+                target=worker_process,
+                args=(mode, tmp, i, processes, threads, users, barrier, created)
+            )
+            for i in range(processes)
+        ]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+        elapsed = time.perf_counter() - start
+        wins = sum(created.get() for _ in range(processes))
+
+        failures = 0
+        for label, repository in (("hot", hot), ("fresh", open_repository(mode, tmp))):
+            records = [r for r in repository.scan(start_date=today, end_date=today)]
+            per_user = {}
+            for record in records:
+                per_user.setdefault(record['user_id'], []).append(record)
+            missing = users - len(per_user)
+            duplicated = sum(1 for rs in per_user.values() if len(rs) > 1)
+            not_out = sum(1 for rs in per_user.values() if not rs[0].get('check_out'))
+            ids = [r['id'] for r in records]
+            duplicate_ids = len(ids) - len(set(ids))
+            failures += missing + duplicated + not_out + duplicate_ids
+            print(f"{mode:11} {label:5}: missing {missing}, duplicated {duplicated}, "
+                  f"not checked out {not_out}, duplicate ids {duplicate_ids}")
+        failures += abs(wins - users)
+
+        delays = sorted(measure_visibility(mode, tmp, hot))
+        print(f"{mode:11}: {processes}x{threads} workers, {users} users in {elapsed:.2f} s, "
+              f"{wins} successful check-ins; another process's write visible after "
+              f"max {delays[-1] * 1000:.1f} ms (median {delays[len(delays) // 2] * 1000:.1f} ms)")
+        return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    args = parser.parse_args()
+
+    failures = sum(stress(mode, args.processes, args.threads, args.users) for mode in args.modes)
+    if failures:
+        sys.exit("writes were lost, duplicated or not seen across processes")
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method("spawn")
+    main()
@@ -1,13 +1,73 @@
 import os
 from datetime import timedelta
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+# Where the data files live; benchmarks point it at a scratch directory
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(__file__), 'data'))
 USERS_FILE = os.path.join(DATA_DIR, 'users.json')
 ATTENDANCE_FILE = os.path.join(DATA_DIR, 'attendance.json')
 LEAVES_FILE = os.path.join(DATA_DIR, 'leaves.json')
 
+# Storage backend: "json" (the files above) or "sqlite" (see storage/migrate.py)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
+SQLITE_FILE = os.getenv("SQLITE_FILE", os.path.join(DATA_DIR, 'attendance.db'))
+
+# Attendance storage mode: "json" rewrites attendance.json on every change,
+# "log" appends to attendance.log and periodically compacts into attendance.json,
+# "partitioned" keeps one file per month under attendance/ (see storage/partition.py)
+ATTENDANCE_STORAGE = os.getenv("ATTENDANCE_STORAGE", "json")
+ATTENDANCE_LOG_FILE = os.path.join(DATA_DIR, 'attendance.log')
+ATTENDANCE_LOG_COMPACT_EVERY = int(os.getenv("ATTENDANCE_LOG_COMPACT_EVERY", "5000"))
+ATTENDANCE_PARTITION_DIR = os.path.join(DATA_DIR, 'attendance')
+# Month partitions kept parsed in memory; the current month always is
+ATTENDANCE_PARTITIONS_LOADED = int(os.getenv("ATTENDANCE_PARTITIONS_LOADED", "3"))
+
+# Attendance older than this many days (rounded down to whole months) is moved
+# into compressed month segments under archive/ by `python -m storage.archive_cli`
+ATTENDANCE_RETENTION_DAYS = int(os.getenv("ATTENDANCE_RETENTION_DAYS", "365"))
+ATTENDANCE_ARCHIVE_DIR = os.path.join(DATA_DIR, 'archive')
+
+# How long a JSON write waits for concurrent mutations to join it (group commit)
+JSON_GROUP_COMMIT_MS = float(os.getenv("JSON_GROUP_COMMIT_MS", "2"))
+
+# Ids each worker reserves from a table's sequence at a time (see storage/sequences.py)
+ID_BLOCK_SIZE = int(os.getenv("ID_BLOCK_SIZE", "32"))
+
+# Layout of the JSON data files: "indented" (two spaces per level) or "compact"
+# (no whitespace: smaller files, faster to write and parse). Either one reads back.
+JSON_FILE_FORMAT = os.getenv("JSON_FILE_FORMAT", "indented")
+
+# Keep attendance and leave records in memory as compact slotted objects
+# (see storage/records.py) instead of dicts; "0" goes back to dicts
+COMPACT_RECORDS = os.getenv("COMPACT_RECORDS", "1") == "1"
+
+# Upper bound on the total size of JSON files kept parsed in memory
+JSON_CACHE_MAX_BYTES = int(os.getenv("JSON_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Upper bound on the total size of dashboard responses kept serialized in memory
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Change feed behind /api/events (see events.py)
+EVENTS_FILE = os.path.join(DATA_DIR, 'events.log')
+EVENTS_KEEP = int(os.getenv("EVENTS_KEEP", "1000"))
+EVENTS_POLL_MS = float(os.getenv("EVENTS_POLL_MS", "200"))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+EVENTS_HEARTBEAT_S = float(os.getenv("EVENTS_HEARTBEAT_S", "15"))
+EVENTS_MAX_STREAM_S = float(os.getenv("EVENTS_MAX_STREAM_S", "300"))
+# Lifetime of the ticket an EventSource passes as ?token= (see authentication.py)
+EVENTS_TICKET_S = int(os.getenv("EVENTS_TICKET_S", "60"))
+
+# Worker threads for storage I/O and processes for password hashing (see executors.py)
+IO_THREADS = int(os.getenv("IO_THREADS", "40"))
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))
+
 SECRET_KEY = "your-secret-key-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Verified token payloads kept in memory (see authentication.py)
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+# Let admins profile a request with the X-Profile: 1 header (see profiling.py)
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING", "0") == "1"
+
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -0,0 +1,239 @@
+"""Change feed for live dashboards, served as Server-Sent Events.
+
+Routes ``publish()`` a small delta after each successful write (a check-in,
+an approved leave, a changed user, ...). Deltas go to an append-only journal
+in the data directory under an InterProcessLock, which gives them ids that
+increase across every worker process. Each worker tails the journal every
+``EVENTS_POLL_MS`` and fans new events out to its connected clients.
+
+Every client has a bounded queue. A client too slow to keep up is
+disconnected, not buffered without limit; the browser reconnects with
+``Last-Event-ID`` and is replayed from the last ``EVENTS_KEEP`` events.
+Clients further behind than that get a ``reset`` event telling them to
+reload their lists.
+"""
+import asyncio
+import logging
+import os
+from collections import deque
+from threading import Lock
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+from config import (
+    EVENTS_FILE, EVENTS_HEARTBEAT_S, EVENTS_KEEP, EVENTS_MAX_STREAM_S, EVENTS_POLL_MS,
+    EVENTS_QUEUE_SIZE
+)
+from executors import run_io
+from serialization import dumps, loads
+from storage.locks import InterProcessLock
+
+logger = logging.getLogger(__name__)
+
+# Event types published by the routes
+CHECK_IN = "check_in"
+CHECK_OUT = "check_out"
+ATTENDANCE_BATCH = "attendance_batch"
+LEAVE_REQUESTED = "leave_requested"
+LEAVE_APPROVED = "leave_approved"
+LEAVE_REJECTED = "leave_rejected"
+USER_CHANGED = "user_changed"
+USER_DELETED = "user_deleted"
+
+
+class EventJournal:
+    """The shared, append-only event file and the most recent events in it.
+
+    The file is rewritten down to the last ``keep`` events once it holds
+    twice that many. Readers notice from its first line (inode numbers get
+    reused) and re-read it, skipping the ids they already have.
+    """
+
+    def __init__(self, path: str, keep: int):
+        self.path = path
+        self.keep = keep
+        self.file_lock = InterProcessLock(path)
+        self._lock = Lock()
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._last_id = 0
+        self._head = None
+        self._offset = 0
+        self._lines = 0
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        with self.file_lock:
+            with self._lock:
+                # Catch up first: the next id follows every worker's events
+                self._read()
+                event = {"id": self._last_id + 1, "type": event_type, "data": data}
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, 'ab') as f:
+                    prefix = b'\n' if f.tell() > self._offset else b''
+                    f.write(prefix + dumps(event) + b'\n')
+                self._read()
+                if self._lines >= 2 * self.keep:
+                    self._rotate()
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Events appended since the last call, by any process."""
+        with self._lock:
+            return self._read()
+
+    def since(self, last_id: int) -> Optional[List[Dict[str, Any]]]:
+        """Events after ``last_id``, or None if they are no longer all kept."""
+        with self._lock:
+            if last_id > self._last_id:
+                # An id from before the journal was reset
+                return None
+            events = [e for e in self._recent if e['id'] > last_id]
+            if last_id < self._last_id and (not events or events[0]['id'] != last_id + 1):
+                return None
+            return events
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def _read(self) -> List[Dict[str, Any]]:
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return []
+        with f:
+            head = f.readline()
+            if head != self._head:
+                # First read, or rotated: start over at the top
+                self._head, self._offset, self._lines = head, 0, 0
+            f.seek(self._offset)
+            data = f.read()
+        new = []
+        position = 0
+        while True:
+            end = data.find(b'\n', position)
+            if end < 0:
+                break
+            line = data[position:end]
+            position = end + 1
+            self._lines += 1
+            try:
+                event = loads(line)
+            except ValueError:
+                # A torn line from a crash mid-append
+                continue
+            if event['id'] > self._last_id:
+                self._last_id = event['id']
+                self._recent.append(event)
+                new.append(event)
+        self._offset += position
+        return new
+
+    def _rotate(self) -> None:
+        tmp_path = self.path + '.tmp'
+        lines = [dumps(event) + b'\n' for event in self._recent]
+        with open(tmp_path, 'wb') as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.path)
+        self._head = lines[0]
+        self._offset = sum(len(line) for line in lines)
+        self._lines = len(lines)
+
+
+class Subscriber:
+    def __init__(self):
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class EventHub:
+    """Fans journal events out to this worker's connected clients."""
+
+    def __init__(self, journal: EventJournal):
+        self.journal = journal
+        self.subscribers: Set[Subscriber] = set()
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_polling(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def _refresh(self) -> None:
+        """Read new journal events and hand them to every client."""
+        for event in await run_io(self.journal.poll):
+            for subscriber in list(self.subscribers):
+                try:
+                    subscriber.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Too slow: it will reconnect and resume from its last id
+                    subscriber.overflowed = True
+                    self.subscribers.discard(subscriber)
+                    self.dropped += 1
+
+    async def _poll(self) -> None:
+        while self.subscribers:
+            try:
+                await self._refresh()
+            except Exception:
+                logger.exception("reading the event journal failed")
+            await asyncio.sleep(EVENTS_POLL_MS / 1000)
+
+    async def stream(self, last_event_id: Optional[int]) -> AsyncIterator[str]:
+        """The SSE body for one client: backlog, live events, heartbeats."""
+        subscriber = Subscriber()
+        self.subscribers.add(subscriber)
+        self._ensure_polling()
+        try:
+            # Subscribed before catching up, so nothing falls in between;
+            # events that arrive both ways are skipped by id below
+            await self._refresh()
+            sent = self.journal.last_id if last_event_id is None else last_event_id
+            yield "retry: 3000\n\n"
+            if last_event_id is not None:
+                backlog = self.journal.since(last_event_id)
+                if backlog is None:
+                    sent = self.journal.last_id
+                    yield _format({"id": sent, "type": "reset", "data": {}})
+                else:
+                    for event in backlog:
+                        sent = event['id']
+                        yield _format(event)
+            deadline = asyncio.get_running_loop().time() + EVENTS_MAX_STREAM_S
+            while not subscriber.overflowed or not subscriber.queue.empty():
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    # Long-lived responses hold up worker shutdown; the client
+                    # reconnects with Last-Event-ID and misses nothing
+                    break
+                try:
+                    event = await asyncio.wait_for(
+                        subscriber.queue.get(), min(EVENTS_HEARTBEAT_S, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if event['id'] > sent:
+                    sent = event['id']
+                    yield _format(event)
+        finally:
+            self.subscribers.discard(subscriber)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "clients": len(self.subscribers),
+            "dropped": self.dropped,
+            "last_id": self.journal.last_id,
+        }
+
+
+def _format(event: Dict[str, Any]) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {dumps(event['data']).decode()}\n\n"
+
+
+journal = EventJournal(EVENTS_FILE, EVENTS_KEEP)
+hub = EventHub(journal)
+
+
+def publish(event_type: str, data: Dict[str, Any]) -> None:
+    """Publish a delta after a successful write; never fails the request."""
+    try:
+        journal.publish(event_type, dict(data))
+    except Exception:
+        logger.exception("could not publish %s event", event_type)
@@ -0,0 +1,123 @@
+"""Where blocking work runs, so it never stalls the event loop.
+
+Storage I/O runs on AnyIO's worker threads, the same pool FastAPI uses for
+plain ``def`` handlers, bounded to ``IO_THREADS``. Password hashing runs on
+a dedicated pool of ``PASSWORD_WORKERS`` processes: bcrypt is deliberately
+slow CPU work and should not compete with request handling for the GIL.
+With ``PASSWORD_WORKERS=0`` it falls back to the I/O threads.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import anyio.to_thread
+from starlette.concurrency import run_in_threadpool
+from config import IO_THREADS, PASSWORD_WORKERS
+from metrics import PASSWORD_SECONDS
+from utils import hash_password
+
+_password_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_password_pending = 0
+_password_completed = 0
+
+
+def start_executors() -> None:
+    """Size the I/O thread pool.
+
+    Must be called from the event loop (the app's startup handler).
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = IO_THREADS
+
+
+def warm_password_pool() -> None:
+    """Spawn the password processes now rather than on the first login."""
+    if PASSWORD_WORKERS > 0:
+        call_password(hash_password, "warm-up")
+
+
+def shutdown_executors() -> None:
+    global _password_pool
+    with _pool_lock:
+        pool, _password_pool = _password_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _password_pool
+    with _pool_lock:
+        if _password_pool is None:
+            # spawn, not fork: the server process has threads running
+            _password_pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _password_pool
+
+
+def _password_done(future: Future) -> None:
+    global _password_pending, _password_completed
+    with _pool_lock:
+        _password_pending -= 1
+        _password_completed += 1
+
+
+def _submit_password(fn: Callable, *args) -> Future:
+    global _password_pending
+    pool = _pool()
+    # Count before submitting so the done callback can never run first
+    with _pool_lock:
+        _password_pending += 1
+    try:
+        future = pool.submit(fn, *args)
+    except BaseException:
+        with _pool_lock:
+            _password_pending -= 1
+        raise
+    future.add_done_callback(_password_done)
+    return future
+
+
+async def run_io(fn: Callable, *args, **kwargs) -> Any:
+    """Run blocking storage work on the I/O thread pool."""
+    return await run_in_threadpool(fn, *args, **kwargs)
+
+
+async def run_password(fn: Callable, *args) -> Any:
+    """Await ``fn(*args)`` (hash_password/verify_password) on the password pool."""
+    start = time.perf_counter()
+    try:
+        if PASSWORD_WORKERS <= 0:
+            return await run_io(fn, *args)
+        return await asyncio.wrap_future(_submit_password(fn, *args))
+    finally:
+        PASSWORD_SECONDS.observe(time.perf_counter() - start, operation=fn.__name__)
+
+
+def call_password(fn: Callable, *args) -> Any:
+    """``run_password`` for handlers that already run on an I/O thread."""
+    with PASSWORD_SECONDS.time(operation=fn.__name__):
+        if PASSWORD_WORKERS <= 0:
+            return fn(*args)
+        return _submit_password(fn, *args).result()
+
+
+def executor_stats() -> Dict[str, Dict[str, int]]:
+    """Queue depth and utilisation of both pools; call from the event loop."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    with _pool_lock:
+        password = {
+            "workers": PASSWORD_WORKERS,
+            "pending": _password_pending,
+            "completed": _password_completed,
+        }
+    return {
+        "io": {
+            "threads": int(limiter.total_tokens),
+            "active": limiter.borrowed_tokens,
+            "queued": limiter.statistics().tasks_waiting,
+        },
+        "password": password,
+    }
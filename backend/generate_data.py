@@ -0,0 +1,253 @@
+"""Generate a realistic synthetic dataset at a configurable scale.
+
+Usage: python generate_data.py [--users 10000] [--departments 50] [--years 3]
+                               [--seed 0] [--force]
+
+Writes users, leaves and attendance history into the configured data files:
+one attendance file per month when ATTENDANCE_STORAGE=partitioned, else
+attendance.json, imported into SQLite afterwards when STORAGE_BACKEND=sqlite.
+At the default scale (about 7M attendance records) use the partitioned or
+SQLite storage; plain JSON keeps the whole history in memory.
+
+- ``admin@example.com`` is an admin, as is one member of every department;
+  everyone else is an employee. Every account's password is ``password``.
+- Attendance covers weekdays up to yesterday, so today is left to live
+  traffic. Some people join partway through; on a working day a person is
+  absent now and then, checks in around 9:00, stays about 8.5 hours and
+  occasionally forgets to check out.
+- Leaves come in every status: past ones mostly approved, some rejected and
+  a few left pending, upcoming ones mostly pending. Nobody attends on an
+  approved leave day.
+
+The same ``--seed`` produces the same data on the same day. The store must
+be empty; ``--force`` empties it first (see init_data.reset_data).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Set
+from config import (
+    ATTENDANCE_FILE, ATTENDANCE_PARTITION_DIR, ATTENDANCE_STORAGE, LEAVES_FILE,
+    SQLITE_FILE, STORAGE_BACKEND, USERS_FILE
+)
+from init_data import reset_data
+from storage import get_users_repository
+from utils import hash_password, write_json_file
+
+FIRST_NAMES = [
+    "Aisha", "Ben", "Carlos", "Dana", "Elif", "Farid", "Grace", "Hiro", "Ines", "Jamal",
+    "Kavya", "Liam", "Mei", "Nikolai", "Olga", "Priya", "Quentin", "Rosa", "Sven", "Tariq",
+    "Uma", "Victor", "Wen", "Yusuf", "Zoe",
+]
+LAST_NAMES = [
+    "Anders", "Bauer", "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Haddad", "Ivanova",
+    "Jensen", "Kim", "Lopez", "Mensah", "Novak", "Okafor", "Patel", "Rossi", "Schmidt",
+    "Tanaka", "Wright",
+]
+DEPARTMENTS = [
+    "Management", "Engineering", "HR", "Sales", "Marketing", "Finance", "Support",
+    "Operations", "Legal", "Research", "Design", "Procurement", "Logistics", "Quality",
+    "Facilities", "Security", "IT", "Training", "Compliance", "Product",
+]
+LEAVE_REASONS = [
+    "Annual vacation", "Medical appointment", "Family event", "Sick leave", "Moving house",
+    "Personal matters", "Conference", "Childcare", "Wedding", "Bereavement",
+]
+
+
+def department_names(count: int) -> List[str]:
+    """``count`` department names: the base list, then numbered copies of it."""
+    return [
+        DEPARTMENTS[i % len(DEPARTMENTS)] + (f" {i // len(DEPARTMENTS) + 1}" if i >= len(DEPARTMENTS) else "")
+        for i in range(count)
+    ]
+
+
+def weekdays(start: date, end: date) -> Iterator[date]:
+    """Monday-to-Friday dates from ``start`` up to but excluding ``end``."""
+    day = start
+    while day < end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def generate_users(n_users: int, n_departments: int, rng: random.Random) -> List[dict]:
+    password = hash_password("password")
+    departments = department_names(n_departments)
+    users = [{
+        "id": 1,
+        "name": "Admin User",
+        "email": "admin@example.com",
+        "password": password,
+        "role": "admin",
+        "department": departments[0]
+    }]
+    has_admin = {departments[0]}
+    for user_id in range(2, n_users + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        department = departments[rng.randrange(n_departments)]
+        users.append({
+            "id": user_id,
+            "name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}.{user_id}@example.com",
+            "password": password,
+            "role": "employee" if department in has_admin else "admin",
+            "department": department
+        })
+        has_admin.add(department)
+    return users
+
+
+def joining_dates(users: List[dict], start: date, today: date, rng: random.Random) -> Dict[int, date]:
+    """When each user starts to show up: most from the beginning, some later."""
+    span = (today - start).days
+    return {
+        user['id']: start if rng.random() < 0.7 else start + timedelta(days=rng.randrange(span))
+        for user in users
+    }
+
+
+def generate_leaves(users: List[dict], joined: Dict[int, date], today: date,
+                    rng: random.Random) -> List[dict]:
+    now = datetime.now()
+    horizon = today + timedelta(days=90)
+    leaves = []
+    for user in users:
+        first = joined[user['id']]
+        # About five requests a year, upcoming ones included
+        count = max(1, round(rng.gauss(5, 2) * (horizon - first).days / 365))
+        taken: Set[date] = set()
+        for _ in range(count):
+            start_date = first + timedelta(days=rng.randrange((horizon - first).days))
+            length = rng.choice([1, 1, 1, 2, 2, 3, 5, 10])
+            end_date = start_date + timedelta(days=length - 1)
+            days = {start_date + timedelta(days=i) for i in range(length)}
+            if days & taken:
+                continue
+            taken |= days
+            created = min(
+                datetime.combine(start_date, datetime.min.time()) - timedelta(days=rng.randint(3, 30), minutes=rng.randrange(600)),
+                now - timedelta(minutes=rng.randrange(1, 600))
+            )
+            if end_date < today:
+                status = rng.choices(["approved", "rejected", "pending"], [80, 15, 5])[0]
+            elif start_date <= today:
+                status = "approved"
+            else:
+                status = rng.choices(["pending", "approved", "rejected"], [60, 30, 10])[0]
+            leave = {
+                "user_id": user['id'],
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "reason": rng.choice(LEAVE_REASONS),
+                "status": status,
+                "created_at": created.isoformat()
+            }
+            if status != "pending":
+                decided = min(created + timedelta(hours=rng.randint(1, 72)), now)
+                leave[f"{status}_at"] = decided.isoformat()
+            leaves.append(leave)
+    # Ids in the order the requests were made, as the API would have assigned them
+    leaves.sort(key=lambda leave: leave['created_at'])
+    return [{"id": leave_id, **leave} for leave_id, leave in enumerate(leaves, 1)]
+
+
+def generate_attendance(users: List[dict], joined: Dict[int, date], leaves: List[dict],
+                        start: date, today: date, rng: random.Random) -> Iterator[dict]:
+    """Attendance records day by day, ids in date order."""
+    on_leave: Dict[date, Set[int]] = {}
+    for leave in leaves:
+        if leave['status'] == "approved":
+            day = date.fromisoformat(leave['start_date'])
+            while day <= date.fromisoformat(leave['end_date']):
+                on_leave.setdefault(day, set()).add(leave['user_id'])
+                day += timedelta(days=1)
+    record_id = 0
+    for day in weekdays(start, today):
+        away = on_leave.get(day, ())
+        midnight = datetime.combine(day, datetime.min.time())
+        for user in users:
+            user_id = user['id']
+            if joined[user_id] > day or user_id in away or rng.random() < 0.04:
+                continue
+            check_in = midnight + timedelta(minutes=min(max(rng.gauss(540, 20), 420), 720), seconds=rng.randrange(60))
+            check_out = check_in + timedelta(minutes=max(rng.gauss(510, 30), 120))
+            record_id += 1
+            yield {
+                "id": record_id,
+                "user_id": user_id,
+                "date": day.isoformat(),
+                "check_in": check_in.isoformat(),
+                "check_out": None if rng.random() < 0.02 else check_out.isoformat()
+            }
+
+
+def write_attendance(records: Iterator[dict]) -> int:
+    if ATTENDANCE_STORAGE != "partitioned" or STORAGE_BACKEND == "sqlite":
+        attendance = list(records)
+        write_json_file(ATTENDANCE_FILE, attendance)
+        return len(attendance)
+    count = 0
+    month, batch = None, []
+    for record in records:
+        if record['date'][:7] != month:
+            if batch:
+                write_json_file(os.path.join(ATTENDANCE_PARTITION_DIR, f"{month}.json"), batch)
+            month, batch = record['date'][:7], []
+        batch.append(record)
+        count += 1
+    if batch:
+        write_json_file(os.path.join(ATTENDANCE_PARTITION_DIR, f"{month}.json"), batch)
+    with open(os.path.join(ATTENDANCE_PARTITION_DIR, 'meta.json'), 'w') as f:
+        json.dump({"max_id": count}, f)
+    return count
+
+
+def generate(n_users: int = 10000, n_departments: int = 50, years: float = 3,
+             seed: int = 0) -> Dict[str, int]:
+    """Write a generated dataset into the empty configured store; returns counts."""
+    rng = random.Random(seed)
+    today = date.today()
+    start = today - timedelta(days=round(365 * years))
+    users = generate_users(n_users, n_departments, rng)
+    joined = joining_dates(users, start, today, rng)
+    leaves = generate_leaves(users, joined, today, rng)
+    write_json_file(USERS_FILE, users)
+    write_json_file(LEAVES_FILE, leaves)
+    counts = {
+        "users": len(users),
+        "departments": n_departments,
+        "leaves": len(leaves),
+        "attendance": write_attendance(generate_attendance(users, joined, leaves, start, today, rng)),
+    }
+    if STORAGE_BACKEND == "sqlite":
+        from storage.migrate import migrate
+        migrate()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--departments", type=int, default=50)
+    parser.add_argument("--years", type=float, default=3, help="Years of attendance history")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--force", action="store_true", help="Empty the data files first")
+    args = parser.parse_args()
+    if args.force:
+        reset_data()
+        if STORAGE_BACKEND == "sqlite":
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(SQLITE_FILE + suffix):
+                    os.remove(SQLITE_FILE + suffix)
+    elif get_users_repository().list():
+        sys.exit("The store already has users; pass --force to replace them")
+    started = time.perf_counter()
+    counts = generate(args.users, args.departments, args.years, args.seed)
+    print(", ".join(f"{count} {name}" for name, count in counts.items()),
+          f"in {time.perf_counter() - started:.1f} s")
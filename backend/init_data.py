@@ -1,53 +1,77 @@
+"""Seed the demo users and leave requests.
+
+Usage: python init_data.py [--reset]
+
+Seeding only happens while there are no users, so it is safe to run on every
+deploy; the API itself never seeds. ``--reset`` first empties the JSON data
+files (and any attendance log, partitions, archive or id sequences) to start
+over from the demo data.
+"""
+import argparse
 import json
 import os
+import shutil
 from datetime import datetime, timedelta
-from config import USERS_FILE, ATTENDANCE_FILE, LEAVES_FILE
+from config import (
+    USERS_FILE, ATTENDANCE_ARCHIVE_DIR, ATTENDANCE_FILE, ATTENDANCE_LOG_FILE, ATTENDANCE_PARTITION_DIR,
+    LEAVES_FILE
+)
+from storage import close_storage, get_leaves_repository, get_users_repository
+from storage.sequences import sequence_path
 from utils import hash_password
 
-def initialize_data():
+def reset_data():
     os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
+    for file_path in (USERS_FILE, ATTENDANCE_FILE, LEAVES_FILE):
+        with open(file_path, 'w') as f:
+            json.dump([], f, indent=2)
+        if os.path.exists(sequence_path(file_path)):
+            os.remove(sequence_path(file_path))
+    if os.path.exists(ATTENDANCE_LOG_FILE):
+        os.remove(ATTENDANCE_LOG_FILE)
+    shutil.rmtree(ATTENDANCE_PARTITION_DIR, ignore_errors=True)
+    # Archived months would otherwise still be added to the new reports
+    shutil.rmtree(ATTENDANCE_ARCHIVE_DIR, ignore_errors=True)
+
+def initialize_data(reset: bool = False) -> bool:
+    """Seed the demo data into an empty store; returns whether it did."""
+    if reset:
+        reset_data()
     today = datetime.now()
-    
-    users = [
-        {
-            "id": 1,
-            "name": "Admin User",
-            "email": "admin@example.com",
-            "password": hash_password("password"),
-            "role": "admin",
-            "department": "Management"
-        },
-        {
-            "id": 2,
-            "name": "John Doe",
-            "email": "emp@example.com",
-            "password": hash_password("password"),
-            "role": "employee",
-            "department": "Engineering"
-        },
-        {
-            "id": 3,
-            "name": "Jane Smith",
-            "email": "jane@example.com",
-            "password": hash_password("password"),
-            "role": "employee",
-            "department": "HR"
-        }
-    ]
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
-    print(f"Users initialized: {len(users)} users created")
-    
-    # Initialize with empty attendance records for functional check-in/check-out
-    with open(ATTENDANCE_FILE, 'w') as f:
-        json.dump([], f, indent=2)
-    print("Attendance file initialized - ready for functional check-in/check-out")
-    
-    # Initialize with sample leave requests for demo
+    users = get_users_repository()
+
+    with users.transaction():
+        if users.list():
+            return False
+        _, john, jane = [users.create(user) for user in [
+            {
+                "name": "Admin User",
+                "email": "admin@example.com",
+                "password": hash_password("password"),
+                "role": "admin",
+                "department": "Management"
+            },
+            {
+                "name": "John Doe",
+                "email": "emp@example.com",
+                "password": hash_password("password"),
+                "role": "employee",
+                "department": "Engineering"
+            },
+            {
+                "name": "Jane Smith",
+                "email": "jane@example.com",
+                "password": hash_password("password"),
+                "role": "employee",
+                "department": "HR"
+            }
+        ]]
+    print("Users initialized: 3 users created")
+
+    # Sample leave requests for demo; attendance starts empty
     sample_leaves = [
         {
-            "id": 1,
-            "user_id": 2,
+            "user_id": john['id'],
             "start_date": (today + timedelta(days=5)).strftime("%Y-%m-%d"),
             "end_date": (today + timedelta(days=7)).strftime("%Y-%m-%d"),
             "reason": "Annual vacation",
@@ -55,8 +79,7 @@ def initialize_data():
             "created_at": today.isoformat()
         },
         {
-            "id": 2,
-            "user_id": 3,
+            "user_id": jane['id'],
             "start_date": (today + timedelta(days=3)).strftime("%Y-%m-%d"),
             "end_date": (today + timedelta(days=4)).strftime("%Y-%m-%d"),
             "reason": "Medical appointment",
@@ -64,11 +87,19 @@ def initialize_data():
             "created_at": today.isoformat()
         }
     ]
-    
-    with open(LEAVES_FILE, 'w') as f:
-        json.dump(sample_leaves, f, indent=2)
-    print(f"Leaves file initialized with {len(sample_leaves)} sample requests")
+
+    leaves = get_leaves_repository()
+    for leave in sample_leaves:
+        leaves.create(leave)
+    print(f"Leaves initialized with {len(sample_leaves)} sample requests")
+    return True
 
 if __name__ == "__main__":
-    initialize_data()
-    print("Data initialized successfully")
+    parser = argparse.ArgumentParser(description="Seed the demo data into an empty store")
+    parser.add_argument("--reset", action="store_true", help="Empty the JSON data files first")
+    args = parser.parse_args()
+    if initialize_data(reset=args.reset):
+        print("Data initialized successfully")
+    else:
+        print("Users already exist; nothing seeded")
+    close_storage()
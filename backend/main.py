@@ -1,16 +1,27 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
-from routes import auth, attendance, leaves, users, dashboard
-from init_data import initialize_data
-
-initialize_data()
+from routes import auth, attendance, leaves, users, dashboard, events, export
+from authentication import token_cache
+from config import REQUEST_PROFILING
+from storage import close_storage
+from storage.base import DuplicateRecordError
+from executors import executor_stats, shutdown_executors, start_executors
+from warmup import start_warmup, warmup_stats
+from response_cache import response_cache
+from events import hub
+from metrics import MetricsMiddleware, registry
+from serialization import FastJSONResponse, backend as json_backend
+from utils import json_cache_stats
+import profiling
 
 app = FastAPI(
     title="Smart Attendance & Leave Management API",
     description="Production-grade attendance and leave management system",
-    version="1.1.0"
+    version="1.1.0",
+    default_response_class=FastJSONResponse
 )
 
 app.add_middleware(
@@ -19,21 +30,68 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cross-origin clients can only read headers listed here
+    expose_headers=["X-Next-After-Id"],
 )
 
+if REQUEST_PROFILING:
+    app.add_middleware(profiling.ProfilingMiddleware)
+# Outermost, so it times everything else
+app.add_middleware(MetricsMiddleware)
+
+registry.add_stats("json_cache", "JSON file cache statistics", json_cache_stats)
+registry.add_stats("response_cache", "Dashboard response cache statistics", response_cache.stats)
+registry.add_stats("token_cache", "Verified token cache statistics", token_cache.stats)
+registry.add_stats("executors", "I/O thread and password process pool statistics", executor_stats)
+registry.add_stats("events", "Live event stream statistics", hub.stats)
+
+@app.exception_handler(DuplicateRecordError)
+def duplicate_record(request: Request, exc: DuplicateRecordError):
+    # Two writers raced past the same existence check; the loser gets the
+    # 400 it would have got had it run second
+    return FastJSONResponse({"detail": str(exc)}, status_code=400)
+
+@app.on_event("startup")
+def startup():
+    start_executors()
+    start_warmup()
+
+@app.on_event("shutdown")
+def shutdown():
+    close_storage()
+    shutdown_executors()
+
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(attendance.router, prefix="/api/attendance", tags=["attendance"])
 app.include_router(leaves.router, prefix="/api/leaves", tags=["leaves"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
+app.include_router(export.router, prefix="/api/export", tags=["export"])
 
 @app.get("/")
 def read_root():
     return {"message": "Smart Attendance & Leave Management API"}
 
 @app.get("/health")
-def health_check():
-    return {"status": "healthy"}
+async def health_check(response: Response):
+    warmup = warmup_stats()
+    if not warmup["ready"]:
+        # Not ready for traffic until the caches are warm
+        response.status_code = 503
+    return {
+        "status": "healthy" if warmup["ready"] else "warming",
+        "warmup": warmup,
+        "executors": executor_stats(),
+        "response_cache": response_cache.stats(),
+        "events": hub.stats(),
+        "json": json_backend()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics for this worker process"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,138 @@
+"""Sampled profiles of single requests, for admins.
+
+With ``REQUEST_PROFILING=1`` an admin request that carries ``X-Profile: 1``
+is answered with a profile (``text/plain``, the functions with the most
+cumulative time) instead of its usual body; the first line gives the real
+status, body size and time. Any other request is untouched, and with the
+setting off the middleware is not added at all.
+
+FastAPI runs plain ``def`` handlers and dependencies on its thread pool,
+where a cProfile started by the middleware would not see them. So while a
+profiled request runs, a sampler thread records the stack of every thread
+in the process each ``PROFILE_INTERVAL_S``; threads idling in the event
+loop's selector or a pool's queue are left out. Other requests served in
+the meantime show up too, so profile a quiet worker.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Tuple
+from fastapi import HTTPException
+from authentication import authenticate
+from executors import run_io
+
+# Functions listed in a profile
+PROFILE_LINES = 40
+# Seconds between stack samples
+PROFILE_INTERVAL_S = 0.001
+
+# A thread whose innermost frame is in one of these is waiting for work
+_IDLE_FILES = {"selectors.py", "threading.py", "queue.py"}
+
+Function = Tuple[str, int, str]
+
+
+class _Sampler(threading.Thread):
+    def __init__(self):
+        super().__init__(name="request-profiler", daemon=True)
+        self.stopped = threading.Event()
+        self.samples = 0
+        self.own: Dict[Function, int] = Counter()
+        self.cumulative: Dict[Function, int] = Counter()
+
+    def run(self) -> None:
+        while not self.stopped.wait(PROFILE_INTERVAL_S):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident or os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                self.own[_function(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    seen.add(_function(frame))
+                    frame = frame.f_back
+                for function in seen:
+                    self.cumulative[function] += 1
+
+    def report(self, elapsed: float) -> str:
+        per_sample = elapsed / self.samples if self.samples else 0.0
+        lines = [f"{'cum ms':>10} {'own ms':>10}  function"]
+        for function, count in sorted(self.cumulative.items(), key=lambda item: -item[1])[:PROFILE_LINES]:
+            filename, line, name = function
+            lines.append(
+                f"{count * per_sample * 1000:10.1f} {self.own[function] * per_sample * 1000:10.1f}  "
+                f"{filename}:{line}({name})"
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _function(frame) -> Function:
+    code = frame.f_code
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+async def _caller_is_admin(headers: dict) -> bool:
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if not authorization.startswith("Bearer "):
+        return False
+    try:
+        # The user lookup reads storage, so not on the event loop
+        return (await run_io(authenticate, authorization[7:]))["role"] == "admin"
+    except HTTPException:
+        return False
+
+
+class ProfilingMiddleware:
+    """Answers admin requests marked ``X-Profile: 1`` with their profile."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") != b"1" or not await _caller_is_admin(headers):
+            await self.app(scope, receive, send)
+            return
+
+        status, size = None, 0
+
+        async def capture(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+
+        sampler = _Sampler()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            sampler.stopped.set()
+            sampler.join()
+        elapsed = time.perf_counter() - start
+
+        summary = (
+            f"{scope['method']} {scope['path']} -> {status}, {size} bytes in {elapsed * 1000:.1f} ms "
+            f"({sampler.samples} samples)\n"
+        )
+        await _send_text(send, 200, summary + sampler.report(elapsed))
+
+
+async def _send_text(send, status: int, text: str) -> None:
+    body = text.encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
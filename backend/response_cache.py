@@ -0,0 +1,118 @@
+"""Versioned response cache and conditional GET for read-mostly endpoints.
+
+A payload is cached under the endpoint's key (name, parameters, today's
+date) together with the versions of the repositories it was computed from,
+and is recomputed only once one of those versions moves. The ETag is a hash
+of the same key and versions, so a client that already has the current
+payload gets a 304 without anything being computed or serialized.
+
+JSON repository versions are counters local to this process (SQLite ones
+are shared through the database), so ETags carry a per-process id: a client
+moving between workers gets a fresh 200, never a wrong 304. Repositories
+whose version is None (they cannot tell when they change) are never cached.
+"""
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from fastapi import Request, Response
+from config import RESPONSE_CACHE_MAX_BYTES
+from serialization import dumps
+
+_BOOT_ID = uuid.uuid4().hex
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class ResponseCache:
+    """Serialized payloads keyed by endpoint key, validated by data versions.
+
+    The total size of the cached bodies is bounded by ``max_bytes``; least
+    recently used entries are evicted first.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def respond(self, request: Request, key: Hashable, repositories: Iterable[Any],
+                compute: Callable[[], Any]) -> Response:
+        """The endpoint's response: a 304, a cached body or a fresh one.
+
+        Versions are read before computing, so a write that lands during
+        the computation leaves the entry stale rather than wrong.
+        """
+        versions = tuple(repository.version() for repository in repositories)
+        if any(version is None for version in versions):
+            return self._response(self._encode(compute()), None)
+        etag = '"' + hashlib.sha1(repr((_BOOT_ID, key, versions)).encode()).hexdigest() + '"'
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers=self._headers(etag))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._response(entry[1], etag)
+            self.misses += 1
+        body = self._encode(compute())
+        self._put(key, versions, body)
+        return self._response(body, etag)
+
+    def _encode(self, payload: Any) -> bytes:
+        return dumps(payload)
+
+    def _headers(self, etag: Optional[str]) -> Dict[str, str]:
+        # Authenticated data: browsers may keep it but must revalidate
+        headers = {"Cache-Control": "private, no-cache"}
+        if etag is not None:
+            headers["ETag"] = etag
+        return headers
+
+    def _response(self, body: bytes, etag: Optional[str]) -> Response:
+        return Response(content=body, media_type="application/json", headers=self._headers(etag))
+
+    def _put(self, key: Hashable, versions: Tuple, body: bytes) -> None:
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[key] = (versions, body)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
@@ -1,17 +1,28 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Header
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
-from config import ATTENDANCE_FILE
-from utils import (
-    read_json_file, write_json_file, get_next_id, verify_token
-)
+from typing import List, Literal, Optional, Tuple
+from authentication import get_current_user
+from storage import get_attendance_archive, get_attendance_repository, get_users_repository
+from streaming import DEFAULT_PAGE_SIZE, LISTING_FORMATS, MAX_PAGE_SIZE, listing_response
+from events import ATTENDANCE_BATCH, CHECK_IN, CHECK_OUT, publish
 
 router = APIRouter()
 
+# Largest number of swipes accepted in one /batch call
+MAX_BATCH_SIZE = 5000
+
 class AttendanceRequest(BaseModel):
     user_id: int
 
+class SwipeEvent(BaseModel):
+    user_id: int
+    action: Literal["check_in", "check_out"]
+    timestamp: datetime
+
+class SwipeBatch(BaseModel):
+    events: List[SwipeEvent] = Field(..., max_length=MAX_BATCH_SIZE)
+
 class AttendanceResponse(BaseModel):
     id: int
     user_id: int
@@ -19,98 +30,168 @@ class AttendanceResponse(BaseModel):
     check_in: Optional[str] = None
     check_out: Optional[str] = None
 
-def get_current_user(authorization: str = Header(None)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    token = authorization.split(" ")[1]
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return payload
-
 @router.post("/check-in")
-async def check_in(request: AttendanceRequest, current_user: dict = Depends(get_current_user)):
-    attendance_records = read_json_file(ATTENDANCE_FILE)
+def check_in(request: AttendanceRequest, current_user: dict = Depends(get_current_user)):
+    attendance = get_attendance_repository()
     today = datetime.now().strftime("%Y-%m-%d")
     
-    existing = next(
-        (a for a in attendance_records if a['user_id'] == request.user_id and a['date'] == today),
-        None
-    )
-    
-    if existing and existing.get('check_in'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Already checked in today"
-        )
-    
-    if existing:
-        existing['check_in'] = datetime.now().isoformat()
-    else:
-        new_record = {
-            "id": get_next_id(attendance_records),
-            "user_id": request.user_id,
-            "date": today,
-            "check_in": datetime.now().isoformat(),
-            "check_out": None
-        }
-        attendance_records.append(new_record)
+    with attendance.transaction():
+        existing = attendance.find(request.user_id, today)
+        
+        if existing and existing.get('check_in'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Already checked in today"
+            )
+        
+        if existing:
+            record = attendance.update(existing['id'], {"check_in": datetime.now().isoformat()})
+        else:
+            record = attendance.create({
+                "user_id": request.user_id,
+                "date": today,
+                "check_in": datetime.now().isoformat(),
+                "check_out": None
+            })
     
-    write_json_file(ATTENDANCE_FILE, attendance_records)
+    publish(CHECK_IN, record)
     return {"message": "Checked in successfully"}
 
 @router.post("/check-out")
-async def check_out(request: AttendanceRequest, current_user: dict = Depends(get_current_user)):
-    attendance_records = read_json_file(ATTENDANCE_FILE)
+def check_out(request: AttendanceRequest, current_user: dict = Depends(get_current_user)):
+    attendance = get_attendance_repository()
     today = datetime.now().strftime("%Y-%m-%d")
     
-    existing = next(
-        (a for a in attendance_records if a['user_id'] == request.user_id and a['date'] == today),
-        None
-    )
+    with attendance.transaction():
+        existing = attendance.find(request.user_id, today)
+        
+        if not existing or not existing.get('check_in'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Must check in first"
+            )
+        
+        if existing.get('check_out'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Already checked out today"
+            )
+        
+        record = attendance.update(existing['id'], {"check_out": datetime.now().isoformat()})
     
-    if not existing or not existing.get('check_in'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Must check in first"
-        )
+    publish(CHECK_OUT, record)
+    return {"message": "Checked out successfully"}
+
+def swipe_time(event: SwipeEvent) -> datetime:
+    """The swipe's time as naive local time, like datetime.now() in check-in."""
+    if event.timestamp.tzinfo is not None:
+        return event.timestamp.astimezone().replace(tzinfo=None)
+    return event.timestamp
+
+def apply_swipe(attendance, event: SwipeEvent, timestamp: datetime) -> Tuple[str, Optional[dict]]:
+    """Apply one swipe at its own timestamp.
+
+    Returns the per-event result and, if it was applied, the updated record.
+    """
+    day = timestamp.strftime("%Y-%m-%d")
+    existing = attendance.find(event.user_id, day)
     
+    if event.action == "check_in":
+        if existing and existing.get('check_in'):
+            return "duplicate", None
+        if existing:
+            record = attendance.update(existing['id'], {"check_in": timestamp.isoformat()})
+        else:
+            record = attendance.create({
+                "user_id": event.user_id,
+                "date": day,
+                "check_in": timestamp.isoformat(),
+                "check_out": None
+            })
+        return "applied", record
+    
+    if not existing or not existing.get('check_in'):
+        return "must_check_in_first", None
     if existing.get('check_out'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Already checked out today"
-        )
+        return "duplicate", None
+    return "applied", attendance.update(existing['id'], {"check_out": timestamp.isoformat()})
+
+@router.post("/batch")
+def batch_swipes(batch: SwipeBatch, current_user: dict = Depends(get_current_user)):
+    """Apply a gateway's buffered swipes in one pass and one write.
+
+    Swipes are applied in timestamp order, so a check-out buffered ahead of
+    its check-in still pairs up; results come back in request order.
+    Swipes dated in an archived month are refused as ``archived``: the
+    reports already hold that month's counts and would count the day twice.
+    """
+    attendance = get_attendance_repository()
+    cutoff = get_attendance_archive().cutoff()
+    times = [swipe_time(event) for event in batch.events]
+    results = [None] * len(batch.events)
+    pending = []
+    for i, t in enumerate(times):
+        if cutoff is not None and t.strftime("%Y-%m-%d") < cutoff:
+            results[i] = "archived"
+        else:
+            pending.append(i)
     
-    existing['check_out'] = datetime.now().isoformat()
-    write_json_file(ATTENDANCE_FILE, attendance_records)
-    return {"message": "Checked out successfully"}
+    # Changed records by id: a check-in and check-out of the same day
+    # leave only the final version
+    applied = {}
+    
+    with attendance.transaction_for(times[i].strftime("%Y-%m-%d") for i in pending):
+        for i in sorted(pending, key=times.__getitem__):
+            results[i], record = apply_swipe(attendance, batch.events[i], times[i])
+            if record is not None:
+                applied[record['id']] = record
+    
+    if applied:
+        # One event for the whole batch, not one per swipe
+        publish(ATTENDANCE_BATCH, {"ids": list(applied), "records": list(applied.values())})
+    
+    return {
+        "applied": results.count("applied"),
+        "results": [
+            {"user_id": event.user_id, "action": event.action, "status": result}
+            for event, result in zip(batch.events, results)
+        ]
+    }
 
 @router.get("/all")
-async def get_all_attendance(current_user: dict = Depends(get_current_user)):
-    from config import USERS_FILE
-    attendance_records = read_json_file(ATTENDANCE_FILE)
-    users = read_json_file(USERS_FILE)
+def get_all_attendance(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    format: str = Query("json", pattern=LISTING_FORMATS),
+    current_user: dict = Depends(get_current_user)
+):
+    if limit is None and format == "json" and user_id is None and start_date is None and end_date is None:
+        # The whole history in one JSON body is too big to build; page it.
+        # The streaming formats never hold it all, so they stay unbounded.
+        limit = DEFAULT_PAGE_SIZE
+    
+    users = get_users_repository().list()
     
     user_map = {u['id']: u['name'] for u in users}
     
-    result = []
-    for record in attendance_records:
-        result.append({
+    records = (
+        {
             **record,
             "user_name": user_map.get(record['user_id'], 'Unknown')
-        })
+        }
+        for record in get_attendance_repository().scan(after_id, user_id, start_date, end_date)
+    )
     
-    return result
+    return listing_response(records, limit, format)
 
 @router.get("/{user_id}")
-async def get_today_attendance(user_id: int, current_user: dict = Depends(get_current_user)):
-    attendance_records = read_json_file(ATTENDANCE_FILE)
+def get_today_attendance(user_id: int, current_user: dict = Depends(get_current_user)):
     today = datetime.now().strftime("%Y-%m-%d")
     
-    record = next(
-        (a for a in attendance_records if a['user_id'] == user_id and a['date'] == today),
-        None
-    )
+    record = get_attendance_repository().find(user_id, today)
     
     if not record:
         return {
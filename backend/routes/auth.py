@@ -1,11 +1,11 @@
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 from datetime import timedelta
-from config import USERS_FILE, ACCESS_TOKEN_EXPIRE_MINUTES
-from utils import (
-    hash_password, verify_password, create_access_token,
-    read_json_file, write_json_file, get_next_id
-)
+from config import ACCESS_TOKEN_EXPIRE_MINUTES
+from utils import hash_password, verify_password, create_access_token
+from storage import get_users_repository
+from executors import call_password, run_io, run_password
+from events import USER_CHANGED, publish
 
 router = APIRouter()
 
@@ -19,10 +19,8 @@ class LoginResponse(BaseModel):
 
 @router.post("/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
-    users = read_json_file(USERS_FILE)
-    
-    user = next((u for u in users if u['email'] == request.email), None)
-    if not user or not verify_password(request.password, user['password']):
+    user = await run_io(get_users_repository().get_by_email, request.email)
+    if not user or not await run_password(verify_password, request.password, user['password']):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -48,25 +46,30 @@ async def login(request: LoginRequest):
     }
 
 @router.post("/register")
-async def register(request: LoginRequest):
-    users = read_json_file(USERS_FILE)
-    
-    if any(u['email'] == request.email for u in users):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    new_user = {
-        "id": get_next_id(users),
-        "name": request.email.split('@')[0],
-        "email": request.email,
-        "password": hash_password(request.password),
-        "role": "employee",
-        "department": "General"
-    }
+def register(request: LoginRequest):
+    users = get_users_repository()
+    password = call_password(hash_password, request.password)
     
-    users.append(new_user)
-    write_json_file(USERS_FILE, users)
+    with users.transaction():
+        if users.get_by_email(request.email):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+        
+        user = users.create({
+            "name": request.email.split('@')[0],
+            "email": request.email,
+            "password": password,
+            "role": "employee",
+            "department": "General"
+        })
     
+    publish(USER_CHANGED, {
+        "id": user['id'],
+        "name": user['name'],
+        "email": user['email'],
+        "role": user['role'],
+        "department": user['department']
+    })
     return {"message": "User registered successfully"}
@@ -1,191 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from datetime import datetime, timedelta
 import json
 import os
-from config import USERS_FILE, ATTENDANCE_FILE, LEAVES_FILE
-from utils import verify_token, load_json_file
+from authentication import get_current_user
+from response_cache import response_cache
+from storage import (
+    get_attendance_archive, get_attendance_repository, get_leaves_repository, get_users_repository
+)
+from analytics.aggregation import dashboard_stats
+from analytics.columnar import (
+    AttendanceColumns, attendance_columns, leave_columns, employee_performance,
+    month_bounds, monthly_report
+)
 
 router = APIRouter()
 
 @router.get("/stats")
-def get_dashboard_stats(current_user: dict = Depends(verify_token)):
+def get_dashboard_stats(request: Request, current_user: dict = Depends(get_current_user)):
     """Get dashboard statistics for admin"""
     try:
-        users = load_json_file(USERS_FILE)
-        attendance = load_json_file(ATTENDANCE_FILE)
-        leaves = load_json_file(LEAVES_FILE)
-        
-        today = datetime.now().date()
-        
-        # Calculate statistics
-        total_users = len(users)
-        total_employees = len([u for u in users if u.get('role') == 'employee'])
-        total_admins = len([u for u in users if u.get('role') == 'admin'])
-        
-        # Today's attendance
-        today_attendance = [a for a in attendance if datetime.fromisoformat(a.get('date', '')).date() == today]
-        present_today = len([a for a in today_attendance if a.get('check_in') and a.get('check_out')])
-        absent_today = total_employees - len([a for a in today_attendance if a.get('check_in')])
-        
-        # Leave statistics
-        pending_leaves = len([l for l in leaves if l.get('status') == 'pending'])
-        approved_leaves = len([l for l in leaves if l.get('status') == 'approved'])
-        rejected_leaves = len([l for l in leaves if l.get('status') == 'rejected'])
-        
-        # This month's attendance
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        this_month_attendance = [
-            a for a in attendance 
-            if datetime.fromisoformat(a.get('date', '')).month == current_month 
-            and datetime.fromisoformat(a.get('date', '')).year == current_year
-        ]
-        
-        # Department-wise statistics
-        departments = {}
-        for user in users:
-            dept = user.get('department', 'Unknown')
-            if dept not in departments:
-                departments[dept] = {'total': 0, 'present': 0}
-            departments[dept]['total'] += 1
-            
-            user_attendance = [a for a in today_attendance if a.get('user_id') == user.get('id')]
-            if user_attendance and user_attendance[0].get('check_in'):
-                departments[dept]['present'] += 1
-        
-        return {
-            "total_users": total_users,
-            "total_employees": total_employees,
-            "total_admins": total_admins,
-            "today": {
-                "present": present_today,
-                "absent": absent_today,
-                "total_checked_in": len([a for a in today_attendance if a.get('check_in')])
-            },
-            "leaves": {
-                "pending": pending_leaves,
-                "approved": approved_leaves,
-                "rejected": rejected_leaves,
-                "total": len(leaves)
-            },
-            "this_month": {
-                "total_records": len(this_month_attendance),
-                "unique_employees": len(set(a.get('user_id') for a in this_month_attendance))
-            },
-            "departments": departments
-        }
+        now = datetime.now()
+        users, attendance, leaves = get_users_repository(), get_attendance_repository(), get_leaves_repository()
+        # Only this month's attendance feeds the stats
+        start_date, end_date = month_bounds(now.year, now.month)
+        return response_cache.respond(
+            request, ("stats", now.date()), (users, attendance, leaves),
+            lambda: dashboard_stats(
+                users.list(),
+                attendance.scan(start_date=start_date, end_date=end_date),
+                leaves.list(),
+                now
+            )
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/attendance-chart")
-def get_attendance_chart(days: int = 7, current_user: dict = Depends(verify_token)):
+def get_attendance_chart(request: Request, days: int = 7, current_user: dict = Depends(get_current_user)):
     """Get attendance data for chart visualization"""
     try:
-        attendance = load_json_file(ATTENDANCE_FILE)
-        users = load_json_file(USERS_FILE)
+        users, attendance, archive = get_users_repository(), get_attendance_repository(), get_attendance_archive()
+        today = datetime.now().date()
         
-        chart_data = []
-        for i in range(days):
-            date = (datetime.now() - timedelta(days=i)).date()
-            day_attendance = [
-                a for a in attendance 
-                if datetime.fromisoformat(a.get('date', '')).date() == date
-            ]
-            
-            present = len([a for a in day_attendance if a.get('check_in') and a.get('check_out')])
-            absent = len(users) - len([a for a in day_attendance if a.get('check_in')])
+        def chart():
+            total_users = len(users.list())
+            start = today - timedelta(days=days - 1)
+            counts = attendance.daily_counts(start, today) if days > 0 else {}
+            if days > 0 and archive.cutoff() is not None and start.isoformat() < archive.cutoff():
+                # Archived days only have their rollups; rows written to an
+                # archived month since then are still in the hot store
+                counts = dict(counts)
+                for date, (present, checked_in) in archive.daily_counts(start, today).items():
+                    hot_present, hot_checked_in = counts.get(date, (0, 0))
+                    counts[date] = (hot_present + present, hot_checked_in + checked_in)
             
-            chart_data.append({
-                "date": str(date),
-                "present": present,
-                "absent": absent,
-                "checked_in": len([a for a in day_attendance if a.get('check_in')])
-            })
+            chart_data = []
+            for i in range(days - 1, -1, -1):
+                date = today - timedelta(days=i)
+                present, checked_in = counts.get(date, (0, 0))
+                chart_data.append({
+                    "date": str(date),
+                    "present": present,
+                    "absent": total_users - checked_in,
+                    "checked_in": checked_in
+                })
+            return chart_data
         
-        return sorted(chart_data, key=lambda x: x['date'])
+        return response_cache.respond(
+            request, ("attendance-chart", today, days), (users, attendance, archive), chart
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/employee-performance")
-def get_employee_performance(current_user: dict = Depends(verify_token)):
+def get_employee_performance(request: Request, current_user: dict = Depends(get_current_user)):
     """Get employee performance metrics"""
     try:
-        users = load_json_file(USERS_FILE)
-        attendance = load_json_file(ATTENDANCE_FILE)
-        leaves = load_json_file(LEAVES_FILE)
-        
-        performance_data = []
-        
-        for user in users:
-            if user.get('role') == 'employee':
-                user_attendance = [a for a in attendance if a.get('user_id') == user.get('id')]
-                user_leaves = [l for l in leaves if l.get('user_id') == user.get('id')]
-                
-                total_days = len(set(
-                    datetime.fromisoformat(a.get('date', '')).date() 
-                    for a in user_attendance
-                ))
-                
-                present_days = len([a for a in user_attendance if a.get('check_in') and a.get('check_out')])
-                
-                approved_leaves = len([l for l in user_leaves if l.get('status') == 'approved'])
-                
-                attendance_rate = (present_days / total_days * 100) if total_days > 0 else 0
-                
-                performance_data.append({
-                    "user_id": user.get('id'),
-                    "name": user.get('name'),
-                    "email": user.get('email'),
-                    "department": user.get('department'),
-                    "total_attendance_records": len(user_attendance),
-                    "present_days": present_days,
-                    "attendance_rate": round(attendance_rate, 2),
-                    "approved_leaves": approved_leaves,
-                    "pending_leaves": len([l for l in user_leaves if l.get('status') == 'pending'])
-                })
-        
-        return sorted(performance_data, key=lambda x: x['attendance_rate'], reverse=True)
+        users, attendance, leaves = get_users_repository(), get_attendance_repository(), get_leaves_repository()
+        archive = get_attendance_archive()
+        return response_cache.respond(
+            request, ("employee-performance",), (users, attendance, leaves, archive),
+            lambda: employee_performance(
+                users.list(),
+                attendance_columns.get(attendance),
+                leave_columns.get(leaves),
+                archive.user_totals()
+            )
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/monthly-report")
-def get_monthly_report(month: int = None, year: int = None, current_user: dict = Depends(verify_token)):
+def get_monthly_report(request: Request, month: int = None, year: int = None, current_user: dict = Depends(get_current_user)):
     """Get monthly attendance report"""
     try:
         if month is None:
             month = datetime.now().month
         if year is None:
             year = datetime.now().year
-        
-        attendance = load_json_file(ATTENDANCE_FILE)
-        users = load_json_file(USERS_FILE)
-        
-        monthly_data = [
-            a for a in attendance
-            if datetime.fromisoformat(a.get('date', '')).month == month
-            and datetime.fromisoformat(a.get('date', '')).year == year
-        ]
-        
-        report = {
-            "month": month,
-            "year": year,
-            "total_records": len(monthly_data),
-            "unique_employees": len(set(a.get('user_id') for a in monthly_data)),
-            "total_present": len([a for a in monthly_data if a.get('check_in') and a.get('check_out')]),
-            "total_absent": len(users) * 20 - len([a for a in monthly_data if a.get('check_in')]),
-            "employee_summary": []
-        }
-        
-        for user in users:
-            if user.get('role') == 'employee':
-                user_monthly = [a for a in monthly_data if a.get('user_id') == user.get('id')]
-                report["employee_summary"].append({
-                    "name": user.get('name'),
-                    "email": user.get('email'),
-                    "present": len([a for a in user_monthly if a.get('check_in') and a.get('check_out')]),
-                    "absent": 20 - len([a for a in user_monthly if a.get('check_in')])
-                })
-        
-        return report
+        users, attendance, archive = get_users_repository(), get_attendance_repository(), get_attendance_archive()
+        
+        def report():
+            bounds = month_bounds(year, month)
+            if bounds is None:
+                columns, archived = AttendanceColumns([]), None
+            else:
+                columns = attendance_columns.get(attendance, *bounds)
+                archived = archive.month_counts(bounds[0][:7])
+            return monthly_report(users.list(), columns, month, year, archived)
+        
+        return response_cache.respond(
+            request, ("monthly-report", month, year), (users, attendance, archive), report
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from authentication import create_stream_ticket, get_current_user, get_stream_user
+from config import EVENTS_TICKET_S
+from events import hub
+
+router = APIRouter()
+
+@router.post("/ticket")
+def get_stream_ticket(current_user: dict = Depends(get_current_user)):
+    """A short-lived token to open the stream with, as ?token="""
+    return {"token": create_stream_ticket(current_user), "expires_in": EVENTS_TICKET_S}
+
+@router.get("")
+async def stream_events(
+    last_event_id: Optional[int] = Header(None),
+    last_id: Optional[int] = Query(None),
+    current_user: dict = Depends(get_stream_user)
+):
+    """Live deltas (check-ins, leaves, users) as Server-Sent Events
+
+    A new EventSource cannot send Last-Event-ID, so ?last_id= stands in for it
+    when the client reconnects with a fresh ticket.
+    """
+    return StreamingResponse(
+        hub.stream(last_event_id if last_event_id is not None else last_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,138 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from datetime import date, datetime
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from authentication import get_current_user
+from storage import get_attendance_archive, get_attendance_repository, get_users_repository
+from streaming import csv_response
+from analytics.columnar import month_bounds
+
+router = APIRouter()
+
+ATTENDANCE_COLUMNS = (
+    "id", "date", "user_id", "user_name", "department", "check_in", "check_out", "hours"
+)
+REPORT_COLUMNS = (
+    "user_id", "name", "email", "department", "records", "checked_in", "present", "absent"
+)
+# Working days a month is counted against, as in /api/dashboard/monthly-report
+WORKING_DAYS = 20
+
+def _month(value: str) -> Tuple[int, int]:
+    """The (year, month) of a ``YYYY-MM`` parameter; 400 if it is not one."""
+    try:
+        year, month = (int(part) for part in value.split("-"))
+        bounds = month_bounds(year, month)
+    except ValueError:
+        bounds = None
+    if bounds is None:
+        raise HTTPException(status_code=400, detail="month must be YYYY-MM")
+    return year, month
+
+def _user_index(department: Optional[str]) -> Dict[int, Dict[str, Any]]:
+    """Users by id, for joining names and departments onto rows."""
+    return {
+        user['id']: user for user in get_users_repository().list()
+        if department is None or user.get('department') == department
+    }
+
+def _hours(check_in: Optional[str], check_out: Optional[str]) -> Optional[float]:
+    if not check_in or not check_out:
+        return None
+    try:
+        worked = datetime.fromisoformat(check_out) - datetime.fromisoformat(check_in)
+    except (TypeError, ValueError):
+        return None
+    return round(worked.total_seconds() / 3600, 2)
+
+def _attendance_rows(records: Iterable[Dict[str, Any]], users: Dict[int, Dict[str, Any]],
+                     department: Optional[str]) -> Iterator[Tuple]:
+    for record in records:
+        user = users.get(record['user_id'])
+        if user is None:
+            if department is not None:
+                continue
+            user = {}
+        check_in, check_out = record.get('check_in'), record.get('check_out')
+        yield (
+            record['id'], record['date'], record['user_id'],
+            user.get('name', 'Unknown'), user.get('department'),
+            check_in, check_out, _hours(check_in, check_out)
+        )
+
+def _report_rows(records: Iterable[Dict[str, Any]], users: Dict[int, Dict[str, Any]],
+                 user_id: Optional[int], archived: Dict[Any, Tuple[int, int, int]]) -> Iterator[Tuple]:
+    # records, checked in, present per user; one pass, nothing else kept.
+    # An archived month starts from its rollups instead of its rows
+    counts: Dict[Any, list] = {k: list(v) for k, v in archived.items()}
+    for record in records:
+        if record['user_id'] not in users:
+            continue
+        user_counts = counts.setdefault(record['user_id'], [0, 0, 0])
+        user_counts[0] += 1
+        if record.get('check_in'):
+            user_counts[1] += 1
+            if record.get('check_out'):
+                user_counts[2] += 1
+    for user in users.values():
+        if user.get('role') != 'employee' or (user_id is not None and user['id'] != user_id):
+            continue
+        records_count, checked_in, present = counts.get(user['id'], (0, 0, 0))
+        yield (
+            user['id'], user.get('name'), user.get('email'), user.get('department'),
+            records_count, checked_in, present, WORKING_DAYS - checked_in
+        )
+
+@router.get("/attendance")
+def export_attendance(
+    month: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    department: Optional[str] = None,
+    user_id: Optional[int] = None,
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Attendance records as CSV, streamed (by month or date range, department, user)"""
+    if month is not None:
+        if start_date is not None or end_date is not None:
+            raise HTTPException(status_code=400, detail="Give either month or start_date/end_date")
+        year, month_number = _month(month)
+        start, end = month_bounds(year, month_number)
+        # From the parsed values: the raw parameter goes into a header
+        filename = f"attendance-{year:04d}-{month_number:02d}.csv"
+    else:
+        if start_date is not None and end_date is not None and end_date < start_date:
+            raise HTTPException(status_code=400, detail="end_date is before start_date")
+        start = start_date.isoformat() if start_date else None
+        end = end_date.isoformat() if end_date else None
+        filename = f"attendance-{start or 'start'}-{end or 'end'}.csv" if start or end else "attendance.csv"
+
+    users = _user_index(department)
+    records = get_attendance_repository().scan(user_id=user_id, start_date=start, end_date=end)
+    archive = get_attendance_archive()
+    if archive.cutoff() is not None and (start is None or start < archive.cutoff()):
+        # Older rows are read back from the archive segments, first
+        records = chain(archive.scan(user_id=user_id, start_date=start, end_date=end), records)
+    return csv_response(ATTENDANCE_COLUMNS, _attendance_rows(records, users, department), filename, gzip)
+
+@router.get("/monthly-report")
+def export_monthly_report(
+    month: Optional[int] = Query(None, ge=1, le=12),
+    year: Optional[int] = Query(None, ge=1, le=9999),
+    department: Optional[str] = None,
+    user_id: Optional[int] = None,
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Per-employee monthly attendance summary as CSV, streamed"""
+    today = datetime.now()
+    month = month or today.month
+    year = year or today.year
+    start, end = month_bounds(year, month)
+
+    users = _user_index(department)
+    records = get_attendance_repository().scan(user_id=user_id, start_date=start, end_date=end)
+    archived = get_attendance_archive().month_counts(start[:7])
+    filename = f"monthly-report-{year:04d}-{month:02d}.csv"
+    return csv_response(REPORT_COLUMNS, _report_rows(records, users, user_id, archived), filename, gzip)
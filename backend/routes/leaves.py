@@ -1,14 +1,17 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Header
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
-from config import LEAVES_FILE, USERS_FILE
-from utils import (
-    read_json_file, write_json_file, get_next_id, verify_token
-)
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from authentication import get_current_user
+from storage import get_leaves_repository, get_users_repository
+from streaming import LISTING_FORMATS, MAX_PAGE_SIZE, listing_response
+from events import LEAVE_APPROVED, LEAVE_REJECTED, LEAVE_REQUESTED, publish
 
 router = APIRouter()
 
+# Longest range the leave calendar covers in one call
+MAX_CALENDAR_DAYS = 366
+
 class LeaveRequest(BaseModel):
     user_id: int
     start_date: str
@@ -23,82 +26,171 @@ class LeaveResponse(BaseModel):
     reason: str
     status: str
 
-def get_current_user(authorization: str = Header(None)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    token = authorization.split(" ")[1]
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return payload
+def _parse_range(start_date: str, end_date: str) -> None:
+    try:
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    if end < start:
+        raise HTTPException(status_code=400, detail="Leave ends before it starts")
 
 @router.post("/request")
-async def request_leave(request: LeaveRequest, current_user: dict = Depends(get_current_user)):
-    leaves = read_json_file(LEAVES_FILE)
-    
-    new_leave = {
-        "id": get_next_id(leaves),
-        "user_id": request.user_id,
-        "start_date": request.start_date,
-        "end_date": request.end_date,
-        "reason": request.reason,
-        "status": "pending",
-        "created_at": datetime.now().isoformat()
-    }
+def request_leave(request: LeaveRequest, current_user: dict = Depends(get_current_user)):
+    _parse_range(request.start_date, request.end_date)
+    leaves = get_leaves_repository()
     
-    leaves.append(new_leave)
-    write_json_file(LEAVES_FILE, leaves)
+    with leaves.transaction():
+        overlapping = leaves.overlapping(request.start_date, request.end_date, user_id=request.user_id)
+        if overlapping:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Overlaps leave request {overlapping[0]['id']} "
+                       f"({overlapping[0]['start_date']} to {overlapping[0]['end_date']}, {overlapping[0]['status']})"
+            )
+        
+        new_leave = leaves.create({
+            "user_id": request.user_id,
+            "start_date": request.start_date,
+            "end_date": request.end_date,
+            "reason": request.reason,
+            "status": "pending",
+            "created_at": datetime.now().isoformat()
+        })
     
+    publish(LEAVE_REQUESTED, new_leave)
     return {"message": "Leave request submitted successfully", "id": new_leave['id']}
 
 @router.get("/user/{user_id}")
-async def get_user_leaves(user_id: int, current_user: dict = Depends(get_current_user)):
-    leaves = read_json_file(LEAVES_FILE)
-    user_leaves = [l for l in leaves if l['user_id'] == user_id]
-    return user_leaves
+def get_user_leaves(
+    user_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after_id: Optional[int] = None,
+    format: str = Query("json", pattern=LISTING_FORMATS),
+    current_user: dict = Depends(get_current_user)
+):
+    user_leaves = get_leaves_repository().scan(after_id, user_id=user_id)
+    return listing_response(user_leaves, limit, format)
 
 @router.get("/pending")
-async def get_pending_leaves(current_user: dict = Depends(get_current_user)):
-    leaves = read_json_file(LEAVES_FILE)
-    users = read_json_file(USERS_FILE)
+def get_pending_leaves(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after_id: Optional[int] = None,
+    format: str = Query("json", pattern=LISTING_FORMATS),
+    current_user: dict = Depends(get_current_user)
+):
+    users = get_users_repository().list()
     
     user_map = {u['id']: u['name'] for u in users}
     
-    pending_leaves = [l for l in leaves if l['status'] == 'pending']
+    pending_leaves = (
+        {
+            **leave,
+            "user_name": user_map.get(leave['user_id'], 'Unknown')
+        }
+        for leave in get_leaves_repository().scan(after_id, status='pending')
+    )
     
+    return listing_response(pending_leaves, limit, format)
+
+def _on_leave(leaves: Iterable[Dict[str, Any]], include_pending: bool) -> List[Dict[str, Any]]:
+    users = get_users_repository()
     result = []
-    for leave in pending_leaves:
+    for leave in leaves:
+        if leave['status'] != "approved" and not include_pending:
+            continue
+        user = users.get(leave['user_id']) or {}
         result.append({
             **leave,
-            "user_name": user_map.get(leave['user_id'], 'Unknown')
+            "user_name": user.get('name', 'Unknown'),
+            "department": user.get('department')
         })
-    
     return result
 
-@router.post("/approve/{leave_id}")
-async def approve_leave(leave_id: int, current_user: dict = Depends(get_current_user)):
-    leaves = read_json_file(LEAVES_FILE)
+@router.get("/on-leave/{day}")
+def get_on_leave_on(
+    day: date,
+    include_pending: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Who is on leave on one day"""
+    day = day.isoformat()
+    return _on_leave(get_leaves_repository().overlapping(day, day), include_pending)
+
+@router.get("/on-leave")
+def get_on_leave_between(
+    start_date: date,
+    end_date: date,
+    include_pending: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Leaves overlapping an inclusive date range, by start date"""
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    leaves = get_leaves_repository().overlapping(start_date.isoformat(), end_date.isoformat())
+    return _on_leave(leaves, include_pending)
+
+@router.get("/calendar")
+def get_leave_calendar(
+    department: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    include_pending: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Who in a department is away on each day of a range (default: the next 7 days)"""
+    start_date = start_date or date.today()
+    end_date = end_date or start_date + timedelta(days=6)
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    if (end_date - start_date).days >= MAX_CALENDAR_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CALENDAR_DAYS} days per calendar")
     
-    leave = next((l for l in leaves if l['id'] == leave_id), None)
+    leaves = get_leaves_repository().overlapping(start_date.isoformat(), end_date.isoformat())
+    days = {
+        (start_date + timedelta(days=i)).isoformat(): []
+        for i in range((end_date - start_date).days + 1)
+    }
+    for leave in _on_leave(leaves, include_pending):
+        if leave['department'] != department:
+            continue
+        day = max(date.fromisoformat(leave['start_date']), start_date)
+        last = min(date.fromisoformat(max(leave['start_date'], leave['end_date'])), end_date)
+        while day <= last:
+            days[day.isoformat()].append({
+                "leave_id": leave['id'],
+                "user_id": leave['user_id'],
+                "user_name": leave['user_name'],
+                "status": leave['status']
+            })
+            day += timedelta(days=1)
+    
+    return {
+        "department": department,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "days": days
+    }
+
+@router.post("/approve/{leave_id}")
+def approve_leave(leave_id: int, current_user: dict = Depends(get_current_user)):
+    leave = get_leaves_repository().update(leave_id, {
+        "status": "approved",
+        "approved_at": datetime.now().isoformat()
+    })
     if not leave:
         raise HTTPException(status_code=404, detail="Leave request not found")
     
-    leave['status'] = 'approved'
-    leave['approved_at'] = datetime.now().isoformat()
-    
-    write_json_file(LEAVES_FILE, leaves)
+    publish(LEAVE_APPROVED, leave)
     return {"message": "Leave approved successfully"}
 
 @router.post("/reject/{leave_id}")
-async def reject_leave(leave_id: int, current_user: dict = Depends(get_current_user)):
-    leaves = read_json_file(LEAVES_FILE)
-    
-    leave = next((l for l in leaves if l['id'] == leave_id), None)
+def reject_leave(leave_id: int, current_user: dict = Depends(get_current_user)):
+    leave = get_leaves_repository().update(leave_id, {
+        "status": "rejected",
+        "rejected_at": datetime.now().isoformat()
+    })
     if not leave:
         raise HTTPException(status_code=404, detail="Leave request not found")
     
-    leave['status'] = 'rejected'
-    leave['rejected_at'] = datetime.now().isoformat()
-    
-    write_json_file(LEAVES_FILE, leaves)
+    publish(LEAVE_REJECTED, leave)
     return {"message": "Leave rejected successfully"}
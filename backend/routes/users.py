@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Header
+from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel
-from config import USERS_FILE
-from utils import read_json_file, write_json_file, verify_token, hash_password, get_next_id
+from utils import hash_password
+from authentication import get_current_user
+from executors import call_password
+from events import USER_CHANGED, USER_DELETED, publish
+from storage import get_users_repository
 
 router = APIRouter()
 
@@ -18,18 +21,9 @@ class UserUpdate(BaseModel):
     role: str
     department: str
 
-def get_current_user(authorization: str = Header(None)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    token = authorization.split(" ")[1]
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return payload
-
 @router.get("")
-async def get_all_users(current_user: dict = Depends(get_current_user)):
-    users = read_json_file(USERS_FILE)
+def get_all_users(current_user: dict = Depends(get_current_user)):
+    users = get_users_repository().list()
     return [
         {
             "id": u['id'],
@@ -42,9 +36,8 @@ async def get_all_users(current_user: dict = Depends(get_current_user)):
     ]
 
 @router.get("/{user_id}")
-async def get_user(user_id: int, current_user: dict = Depends(get_current_user)):
-    users = read_json_file(USERS_FILE)
-    user = next((u for u in users if u['id'] == user_id), None)
+def get_user(user_id: int, current_user: dict = Depends(get_current_user)):
+    user = get_users_repository().get(user_id)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -58,80 +51,82 @@ async def get_user(user_id: int, current_user: dict = Depends(get_current_user))
     }
 
 @router.post("")
-async def create_user(user_data: UserCreate, current_user: dict = Depends(get_current_user)):
-    users = read_json_file(USERS_FILE)
-    
-    # Check if email already exists
-    existing_user = next((u for u in users if u['email'] == user_data.email), None)
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already exists")
+def create_user(user_data: UserCreate, current_user: dict = Depends(get_current_user)):
+    users = get_users_repository()
     
-    # Create new user
-    new_user = {
-        "id": get_next_id(users),
-        "name": user_data.name,
-        "email": user_data.email,
-        "password": hash_password(user_data.password),
-        "role": user_data.role,
-        "department": user_data.department
-    }
+    password = call_password(hash_password, user_data.password)
+    with users.transaction():
+        # Check if email already exists
+        existing_user = users.get_by_email(user_data.email)
+        if existing_user:
+            raise HTTPException(status_code=400, detail="Email already exists")
+        
+        # Create new user
+        new_user = users.create({
+            "name": user_data.name,
+            "email": user_data.email,
+            "password": password,
+            "role": user_data.role,
+            "department": user_data.department
+        })
     
-    users.append(new_user)
-    write_json_file(USERS_FILE, users)
-    
-    return {
+    public = {
         "id": new_user['id'],
         "name": new_user['name'],
         "email": new_user['email'],
         "role": new_user['role'],
         "department": new_user['department']
     }
+    publish(USER_CHANGED, public)
+    return public
 
 @router.put("/{user_id}")
-async def update_user(user_id: int, user_data: UserUpdate, current_user: dict = Depends(get_current_user)):
-    users = read_json_file(USERS_FILE)
-    user_index = next((i for i, u in enumerate(users) if u['id'] == user_id), None)
+def update_user(user_id: int, user_data: UserUpdate, current_user: dict = Depends(get_current_user)):
+    users = get_users_repository()
     
-    if user_index is None:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Check if email already exists (excluding current user)
-    existing_user = next((u for i, u in enumerate(users) if u['email'] == user_data.email and i != user_index), None)
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already exists")
+    with users.transaction():
+        if users.get(user_id) is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        # Check if email already exists (excluding current user)
+        existing_user = users.get_by_email(user_data.email)
+        if existing_user and existing_user['id'] != user_id:
+            raise HTTPException(status_code=400, detail="Email already exists")
+        
+        # Update user
+        user = users.update(user_id, {
+            "name": user_data.name,
+            "email": user_data.email,
+            "role": user_data.role,
+            "department": user_data.department
+        })
     
-    # Update user
-    users[user_index].update({
-        "name": user_data.name,
-        "email": user_data.email,
-        "role": user_data.role,
-        "department": user_data.department
-    })
-    
-    write_json_file(USERS_FILE, users)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
     
-    return {
-        "id": users[user_index]['id'],
-        "name": users[user_index]['name'],
-        "email": users[user_index]['email'],
-        "role": users[user_index]['role'],
-        "department": users[user_index]['department']
+    public = {
+        "id": user['id'],
+        "name": user['name'],
+        "email": user['email'],
+        "role": user['role'],
+        "department": user['department']
     }
+    publish(USER_CHANGED, public)
+    return public
 
 @router.delete("/{user_id}")
-async def delete_user(user_id: int, current_user: dict = Depends(get_current_user)):
-    users = read_json_file(USERS_FILE)
-    user_index = next((i for i, u in enumerate(users) if u['id'] == user_id), None)
-    
-    if user_index is None:
-        raise HTTPException(status_code=404, detail="User not found")
+def delete_user(user_id: int, current_user: dict = Depends(get_current_user)):
+    users = get_users_repository()
     
     # Prevent admin from deleting themselves
     if current_user['id'] == user_id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
-    deleted_user = users.pop(user_index)
-    write_json_file(USERS_FILE, users)
+    # None when another request deleted the user first
+    deleted_user = users.delete(user_id)
+    if deleted_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    publish(USER_DELETED, {"id": deleted_user['id']})
     
     return {
         "id": deleted_user['id'],
@@ -0,0 +1,66 @@
+"""JSON encoding and decoding for the data files and API responses.
+
+Uses orjson when it is installed and the standard library otherwise. Both
+produce the same documents: values JSON cannot represent (datetimes
+included) are written with ``str()``, as ``json.dumps(default=str)``
+always has, so files written by either one read back the same. Compact
+records (storage/records.py) are written as the dicts they stand for.
+"""
+import json
+from typing import Any, Union
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library is used instead
+    orjson = None
+
+# Raised by loads() on malformed input; orjson's error subclasses it
+JSONDecodeError = json.JSONDecodeError
+
+def _default(value: Any) -> Any:
+    to_dict = getattr(value, "to_dict", None)
+    if to_dict is not None:
+        return to_dict()
+    return str(value)
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(value: Any, indent: bool = False) -> bytes:
+        """UTF-8 encoded JSON; ``indent`` spaces it out two per level."""
+        options = _OPTIONS | orjson.OPT_INDENT_2 if indent else _OPTIONS
+        return orjson.dumps(value, default=_default, option=options)
+
+    def loads(data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+else:
+    def dumps(value: Any, indent: bool = False) -> bytes:
+        """UTF-8 encoded JSON; ``indent`` spaces it out two per level."""
+        if indent:
+            text = json.dumps(value, default=_default, ensure_ascii=False, indent=2)
+        else:
+            text = json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":"))
+        return text.encode()
+
+    def loads(data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+def backend() -> str:
+    return "orjson" if orjson is not None else "json"
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with ``dumps``.
+
+    The app's default response class. Returning one directly from a route
+    also skips FastAPI's ``jsonable_encoder`` pass, which for long lists
+    of plain dicts costs more than the encoding itself.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,92 @@
+"""Repositories for users, attendance and leaves.
+
+Routes get their repositories from the ``get_*_repository()`` functions
+below; ``STORAGE_BACKEND`` ("json" or "sqlite") picks the implementation.
+Archived attendance (storage/archive.py) sits beside either one.
+"""
+from typing import Dict
+from config import (
+    STORAGE_BACKEND, SQLITE_FILE, USERS_FILE, ATTENDANCE_FILE, LEAVES_FILE,
+    ATTENDANCE_STORAGE, ATTENDANCE_LOG_FILE, ATTENDANCE_LOG_COMPACT_EVERY,
+    ATTENDANCE_PARTITION_DIR, ATTENDANCE_PARTITIONS_LOADED, ATTENDANCE_ARCHIVE_DIR
+)
+from storage.archive import AttendanceArchive
+from storage.base import AttendanceRepository, LeavesRepository, Repository, UsersRepository
+from storage.event_log import AttendanceEventLog
+from storage.json_store import (
+    JsonAttendanceRepository, JsonLeavesRepository, JsonUsersRepository,
+    LoggedAttendanceRepository
+)
+from storage.partitioned import PartitionedAttendanceRepository
+from storage.sequences import release_sequences
+from storage.sqlite_store import (
+    SqliteAttendanceRepository, SqliteDatabase, SqliteLeavesRepository,
+    SqliteUsersRepository
+)
+
+_repositories: Dict[str, Repository] = {}
+_archive = AttendanceArchive(ATTENDANCE_ARCHIVE_DIR)
+
+
+def _build_repositories() -> Dict[str, Repository]:
+    if STORAGE_BACKEND == "sqlite":
+        db = SqliteDatabase(SQLITE_FILE)
+        return {
+            "users": SqliteUsersRepository(db),
+            "attendance": SqliteAttendanceRepository(db),
+            "leaves": SqliteLeavesRepository(db),
+        }
+    if STORAGE_BACKEND != "json":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+    if ATTENDANCE_STORAGE == "log":
+        attendance = LoggedAttendanceRepository(
+            AttendanceEventLog(ATTENDANCE_LOG_FILE, ATTENDANCE_FILE, ATTENDANCE_LOG_COMPACT_EVERY)
+        )
+    elif ATTENDANCE_STORAGE == "partitioned":
+        attendance = PartitionedAttendanceRepository(ATTENDANCE_PARTITION_DIR, ATTENDANCE_PARTITIONS_LOADED)
+    else:
+        attendance = JsonAttendanceRepository(ATTENDANCE_FILE)
+    return {
+        "users": JsonUsersRepository(USERS_FILE),
+        "attendance": attendance,
+        "leaves": JsonLeavesRepository(LEAVES_FILE),
+    }
+
+
+def _repository(name: str) -> Repository:
+    if not _repositories:
+        _repositories.update(_build_repositories())
+    return _repositories[name]
+
+
+def get_users_repository() -> UsersRepository:
+    return _repository("users")
+
+
+def get_attendance_repository() -> AttendanceRepository:
+    return _repository("attendance")
+
+
+def get_leaves_repository() -> LeavesRepository:
+    return _repository("leaves")
+
+
+def get_attendance_archive() -> AttendanceArchive:
+    return _archive
+
+
+def open_storage() -> None:
+    """Load whatever state the configured backend keeps in memory."""
+    attendance = get_attendance_repository()
+    if isinstance(attendance, LoggedAttendanceRepository):
+        attendance.load()
+    # An archive run that stopped half way must not leave rows counted twice
+    _archive.recover(attendance)
+
+
+def close_storage() -> None:
+    attendance = _repositories.get("attendance")
+    if isinstance(attendance, LoggedAttendanceRepository):
+        attendance.log.compact()
+    # Hand back unused reserved ids so a restart does not leave a gap
+    release_sequences()
@@ -0,0 +1,350 @@
+"""Move old attendance into compressed, immutable month segments.
+
+Run it with ``python -m storage.archive_cli`` (see there for the options).
+
+Attendance dated before the first day of the month containing
+``today - ATTENDANCE_RETENTION_DAYS`` leaves the hot store for
+``<archive dir>/attendance-YYYY-MM.<batch>.ndjson.gz``: one JSON record per
+line, gzip-compressed, never rewritten. Before the records go, per-user and
+per-day counts for every archived month are added to ``manifest.json``.
+/employee-performance, /monthly-report and /attendance-chart merge those
+counts with what they compute from the hot store, so their numbers do not
+change, while every other endpoint that reads attendance only carries the
+recent months.
+
+Only whole months are archived. Swipes dated in an archived month are
+refused, but rows can still reach one some other way (an import, a restored
+file); the next run archives them as a further batch of that month, adding
+to its counts and counting each user's day once.
+
+A run is safe to interrupt. The segments are written under temporary names
+and renamed once complete; the manifest listing them, with the batch marked
+pending, is the commit point; then the archived ids are deleted from the
+hot store and the mark is cleared. Until it is, ``recover()`` (at startup
+and before every run) deletes the pending batch's ids again. A run that
+dies before the commit leaves segment files the next run overwrites.
+"""
+import gzip
+import os
+import threading
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from serialization import dumps, loads
+from utils import file_signature, write_json_file
+from storage.base import AttendanceRepository, attendance_matches
+from storage.locks import InterProcessLock
+from storage.partitioned import month_key
+from storage.records import CompactRecord
+
+# Lines buffered per month before they go through the compressor
+WRITE_BATCH = 1000
+
+# records, checked in, present, distinct days; per user and month
+UserMonth = Tuple[int, int, int, int]
+# present, checked in; per day
+DayCounts = Tuple[int, int]
+
+
+def cutoff_for(retention_days: int, today: Optional[date] = None) -> str:
+    """First day of the month containing ``today - retention_days``."""
+    oldest = (today or date.today()) - timedelta(days=retention_days)
+    return oldest.replace(day=1).isoformat()
+
+
+class _SegmentWriter:
+    """One month's segment, written to a temporary file until ``commit``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self._file = open(self.tmp_path, 'wb')
+        # mtime=0 keeps the bytes a function of the records alone
+        self._gzip = gzip.GzipFile(fileobj=self._file, mode='wb', compresslevel=6, mtime=0)
+        self._lines: List[bytes] = []
+        self.records = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._lines.append(dumps(record))
+        self.records += 1
+        if len(self._lines) >= WRITE_BATCH:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._lines:
+            self._gzip.write(b'\n'.join(self._lines) + b'\n')
+            self._lines = []
+
+    def commit(self) -> None:
+        self._flush()
+        self._gzip.close()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._gzip.close()
+        self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+class AttendanceArchive:
+    """The archived months: their segments and per-user rollups.
+
+    ``manifest.json`` holds::
+
+        {"cutoff": "2025-10-01", "batch": 3,
+         "segments": [{"month": "2025-09", "file": "...", "records": 41230, "batch": 3}, ...],
+         "months": {"2025-09": [[user_id, records, checked_in, present, days], ...]},
+         "days": {"2025-09": [["2025-09-01", present, checked_in], ...]},
+         "pending": null}
+
+    Archives written before ``days`` existed get those counts from their
+    segments, read once per manifest version.
+
+    It is re-read whenever its file signature changes, so every worker
+    sees a run made by another process; ``version()`` is that signature,
+    for caches of reports that include the rollups.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.file_lock = InterProcessLock(self.manifest_path)
+        self._lock = threading.Lock()
+        self._signature = None
+        self._manifest: Dict[str, Any] = {}
+        self._totals: Optional[Dict[Any, Tuple[int, int, int]]] = None
+        self._days: Optional[Dict[date, DayCounts]] = None
+
+    def manifest(self) -> Dict[str, Any]:
+        signature = file_signature(self.manifest_path)
+        with self._lock:
+            if signature != self._signature:
+                if signature is None:
+                    manifest = {}
+                else:
+                    with open(self.manifest_path, 'rb') as f:
+                        manifest = loads(f.read())
+                self._manifest, self._signature, self._totals, self._days = manifest, signature, None, None
+            return self._manifest
+
+    def version(self) -> Tuple:
+        self.manifest()
+        return self._signature or ()
+
+    def cutoff(self) -> Optional[str]:
+        """Everything dated before this day is archived (None: nothing is)."""
+        return self.manifest().get('cutoff')
+
+    def months(self) -> List[str]:
+        return sorted(self.manifest().get('months', {}))
+
+    def month_counts(self, month: str) -> Dict[Any, Tuple[int, int, int]]:
+        """(records, checked_in, present) per user for an archived ``YYYY-MM``."""
+        rows = self.manifest().get('months', {}).get(month, [])
+        return {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+    def user_totals(self) -> Dict[Any, Tuple[int, int, int]]:
+        """(records, present, distinct days) per user over all archived months."""
+        manifest = self.manifest()
+        with self._lock:
+            if self._totals is None:
+                totals: Dict[Any, list] = {}
+                for rows in manifest.get('months', {}).values():
+                    for user_id, records, _, present, days in rows:
+                        counts = totals.setdefault(user_id, [0, 0, 0])
+                        counts[0] += records
+                        counts[1] += present
+                        counts[2] += days
+                self._totals = {k: tuple(v) for k, v in totals.items()}
+            return self._totals
+
+    def daily_counts(self, start: date, end: date) -> Dict[date, DayCounts]:
+        """(present, checked_in) for the archived days from ``start`` to ``end``."""
+        manifest = self.manifest()
+        with self._lock:
+            if self._days is None:
+                self._days = {
+                    date.fromisoformat(day): (present, checked_in)
+                    for rows in self._day_rows(manifest).values() for day, present, checked_in in rows
+                }
+            days = self._days
+        return {day: counts for day, counts in days.items() if start <= day <= end}
+
+    def _day_rows(self, manifest: Dict[str, Any]) -> Dict[str, List[list]]:
+        """The manifest's ``days``, with any month it lacks counted from its segments."""
+        rows = dict(manifest.get('days', {}))
+        counted: Dict[str, Dict[str, list]] = {}
+        for segment in manifest.get('segments', []):
+            if segment['month'] in rows:
+                continue
+            days = counted.setdefault(segment['month'], {})
+            for record in self._read(segment['file']):
+                if record.get('check_in'):
+                    counts = days.setdefault(record['date'], [0, 0])
+                    counts[0] += bool(record.get('check_out'))
+                    counts[1] += 1
+        for month, days in counted.items():
+            rows[month] = [[day] + counts for day, counts in sorted(days.items())]
+        return rows
+
+    def scan(self, user_id: Optional[int] = None, start_date: Optional[str] = None,
+             end_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Archived records for one user and/or an inclusive date range.
+
+        Segments are read one at a time, oldest month first; within a
+        segment records are in the order they were archived (by id).
+        """
+        segments = self.manifest().get('segments', [])
+        for segment in sorted(segments, key=lambda s: (s['month'], s['batch'])):
+            if start_date is not None and segment['month'] < month_key(start_date):
+                continue
+            if end_date is not None and segment['month'] > month_key(end_date):
+                continue
+            for record in self._read(segment['file']):
+                if attendance_matches(record, user_id, start_date, end_date):
+                    yield record
+
+    def _read(self, name: str) -> Iterator[Dict[str, Any]]:
+        with gzip.open(os.path.join(self.directory, name), 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+
+    def _save(self, manifest: Dict[str, Any]) -> None:
+        write_json_file(self.manifest_path, manifest)
+        self.manifest()
+
+    def recover(self, attendance: AttendanceRepository) -> int:
+        """Finish deleting a batch whose run stopped after its commit point."""
+        with self.file_lock:
+            manifest = self.manifest()
+            pending = manifest.get('pending')
+            if not pending:
+                return 0
+            ids = [r['id'] for name in pending['files'] for r in self._read(name)]
+            removed = attendance.delete_many(ids)
+            self._save({**manifest, 'pending': None})
+            return removed
+
+    def archive(self, attendance: AttendanceRepository, cutoff: str,
+                dry_run: bool = False) -> Dict[str, int]:
+        """Move every record dated before ``cutoff`` into the archive.
+
+        Returns the number of records archived per month. The months being
+        archived are locked for the whole run (see transaction_for), so
+        check-ins wait for it in the single-file modes: run it off-peak.
+        """
+        last = (date.fromisoformat(cutoff) - timedelta(days=1)).isoformat()
+        with self.file_lock:
+            self.recover(attendance)
+            if dry_run:
+                counts: Dict[str, int] = {}
+                for record in attendance.scan(end_date=last):
+                    month = month_key(record['date'])
+                    counts[month] = counts.get(month, 0) + 1
+                return dict(sorted(counts.items()))
+            dates = {r['date'] for r in attendance.scan(end_date=last)}
+            if not dates:
+                return {}
+            months = {month_key(day) for day in dates}
+            manifest = self.manifest()
+            batch = manifest.get('batch', 0) + 1
+            os.makedirs(self.directory, exist_ok=True)
+            with attendance.transaction_for(dates):
+                ids, writers, summaries, days = self._write_segments(
+                    attendance, last, months, batch, self._archived_days(manifest, months)
+                )
+                segments = [
+                    {"month": month, "file": os.path.basename(w.path), "records": w.records, "batch": batch}
+                    for month, w in sorted(writers.items())
+                ]
+                # The commit point: from here on the rows count as archived
+                self._save({
+                    "cutoff": max(cutoff, manifest.get('cutoff') or cutoff),
+                    "batch": batch,
+                    "segments": manifest.get('segments', []) + segments,
+                    "months": self._merge(manifest.get('months', {}), summaries),
+                    "days": self._merge(self._day_rows(manifest), days),
+                    "pending": {"batch": batch, "files": [s['file'] for s in segments]},
+                })
+                attendance.delete_many(ids)
+            # The transaction wrote the deletions on its way out
+            self._save({**self.manifest(), 'pending': None})
+            return {s['month']: s['records'] for s in segments}
+
+    def _archived_days(self, manifest: Dict[str, Any], months: Iterable[str]) -> Set[Tuple[Any, str]]:
+        """(user_id, date) of every record already archived in ``months``."""
+        months = set(months)
+        return {
+            (record['user_id'], record['date'])
+            for segment in manifest.get('segments', []) if segment['month'] in months
+            for record in self._read(segment['file'])
+        }
+
+    def _write_segments(self, attendance: AttendanceRepository, last: str,
+                        months: Iterable[str], batch: int, archived_days: Set[Tuple[Any, str]]):
+        writers: Dict[str, _SegmentWriter] = {}
+        # user -> [records, checked_in, present, set of days], per month
+        summaries: Dict[str, Dict[Any, list]] = {}
+        # day -> [present, checked_in], per month
+        days: Dict[str, Dict[str, list]] = {}
+        ids = []
+        try:
+            for record in attendance.scan(end_date=last):
+                if isinstance(record, CompactRecord):
+                    # Decoded once here rather than field by field below
+                    record = record.to_dict()
+                month = month_key(record['date'])
+                if month not in months:
+                    # A month created after the transaction locked the
+                    # others; it waits for the next run
+                    continue
+                writer = writers.get(month)
+                if writer is None:
+                    name = f"attendance-{month}.{batch}.ndjson.gz"
+                    writer = writers[month] = _SegmentWriter(os.path.join(self.directory, name))
+                writer.write(record)
+                ids.append(record['id'])
+                counts = summaries.setdefault(month, {}).get(record['user_id'])
+                if counts is None:
+                    counts = summaries[month][record['user_id']] = [0, 0, 0, set()]
+                counts[0] += 1
+                if record.get('check_in'):
+                    counts[1] += 1
+                    day = days.setdefault(month, {}).setdefault(record['date'], [0, 0])
+                    day[1] += 1
+                    if record.get('check_out'):
+                        counts[2] += 1
+                        day[0] += 1
+                if (record['user_id'], record['date']) not in archived_days:
+                    # A month archived again must not count a user's day twice
+                    counts[3].add(record['date'])
+            for writer in writers.values():
+                writer.commit()
+        except BaseException:
+            for writer in writers.values():
+                writer.abort()
+            raise
+        return ids, writers, {
+            month: {user_id: (c[0], c[1], c[2], len(c[3])) for user_id, c in users.items()}
+            for month, users in summaries.items()
+        }, {month: {day: tuple(c) for day, c in sorted(counts.items())} for month, counts in days.items()}
+
+    @staticmethod
+    def _merge(months: Dict[str, List[list]], summaries: Dict[str, Dict[Any, tuple]]) -> Dict[str, List[list]]:
+        """Add per-month rollup rows (keyed by user or by day) to the manifest's."""
+        merged = dict(months)
+        for month, keyed in summaries.items():
+            # A month archived again (rows written after an earlier run) adds up
+            rows = {row[0]: list(row[1:]) for row in merged.get(month, [])}
+            for key, counts in keyed.items():
+                previous = rows.get(key, [0] * len(counts))
+                rows[key] = [a + b for a, b in zip(previous, counts)]
+            merged[month] = [[key] + counts for key, counts in rows.items()]
+        return dict(sorted(merged.items()))
+
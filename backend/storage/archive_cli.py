@@ -0,0 +1,31 @@
+"""Archive attendance older than the retention window.
+
+Usage: python -m storage.archive_cli [--retention-days N] [--dry-run]
+
+See storage/archive.py for what a run does. The command lives in its own
+module because ``storage`` imports ``storage.archive`` itself, and running
+an already-imported module with ``-m`` makes Python warn.
+"""
+import argparse
+from config import ATTENDANCE_RETENTION_DAYS
+from storage import close_storage, get_attendance_archive, get_attendance_repository, open_storage
+from storage.archive import cutoff_for
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive attendance older than the retention window")
+    parser.add_argument("--retention-days", type=int, default=ATTENDANCE_RETENTION_DAYS,
+                        help="Keep this many days (rounded down to whole months) in the hot store")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+    args = parser.parse_args()
+    open_storage()
+    cutoff = cutoff_for(args.retention_days)
+    archived = get_attendance_archive().archive(get_attendance_repository(), cutoff, args.dry_run)
+    close_storage()
+    for month, count in archived.items():
+        print(f"{month}: {count} records{' to archive' if args.dry_run else ' archived'}")
+    print(f"Hot store keeps attendance from {cutoff} on")
+
+
+if __name__ == "__main__":
+    main()
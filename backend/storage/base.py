@@ -0,0 +1,163 @@
+import threading
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class DuplicateRecordError(ValueError):
+    """A write would give two records the same unique key.
+
+    The message is what the API reports to the client (as a 400).
+    """
+
+
+class Repository(ABC):
+    """CRUD access to one table of id-keyed records.
+
+    Records are plain dicts in the same shape the JSON files have always
+    used, so route code does not care which backend is configured.
+    """
+
+    @abstractmethod
+    def list(self) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def create(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a record, assigning the next id."""
+
+    @abstractmethod
+    def update(self, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge ``fields`` into a record; returns None if it does not exist."""
+
+    @abstractmethod
+    def delete(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """Remove a record; returns the removed record or None."""
+
+    def scan(self, after_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Records with id greater than ``after_id``, in id order.
+
+        This is the keyset-pagination primitive: a page ends at some id and
+        the next one starts after it, with no offset to skip over.
+        """
+        for record in self.list():
+            if after_id is None or record['id'] > after_id:
+                yield record
+
+    def transaction(self):
+        """Context manager making a read-then-write sequence atomic.
+
+        Other writers in this process are held off until it exits, so e.g.
+        "find today's record, then create it" cannot race. Nested
+        transactions join the outer one.
+        """
+        return self.__dict__.setdefault('_transaction_lock', threading.RLock())
+
+    def version(self) -> Optional[Any]:
+        """A token that changes whenever the table's contents change.
+
+        Derived data (column arrays, rollups) can be cached against it.
+        None means the backend cannot tell, and nothing should be cached.
+        """
+        return None
+
+    def delete_many(self, record_ids: Iterable[int]) -> int:
+        """Remove every record in ``record_ids``; returns how many existed.
+
+        Backends override it to apply the whole batch in one write.
+        """
+        with self.transaction():
+            return sum(self.delete(record_id) is not None for record_id in record_ids)
+
+
+class UsersRepository(Repository):
+    @abstractmethod
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        ...
+
+
+class AttendanceRepository(Repository):
+    @abstractmethod
+    def find(self, user_id: int, date: str) -> Optional[Dict[str, Any]]:
+        """The attendance record of a user on a ``YYYY-MM-DD`` date."""
+
+    @abstractmethod
+    def daily_counts(self, start: date, end: date) -> Dict[date, Tuple[int, int]]:
+        """(present, checked_in) for each day from ``start`` to ``end``.
+
+        Days without records may be missing from the result.
+        """
+
+    def scan(self, after_id: Optional[int] = None, user_id: Optional[int] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Records after ``after_id`` for one user and/or an inclusive date range."""
+        for record in super().scan(after_id):
+            if attendance_matches(record, user_id, start_date, end_date):
+                yield record
+
+    def transaction_for(self, dates: Iterable[str]):
+        """A transaction covering writes to records on any of ``dates``.
+
+        Batches of swipes use it so every change lands in one write, even
+        when the swipes are not all from today.
+        """
+        return self.transaction()
+
+
+class LeavesRepository(Repository):
+    @abstractmethod
+    def list_by_user(self, user_id: int) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def list_by_status(self, status: str) -> List[Dict[str, Any]]:
+        ...
+
+    def scan(self, after_id: Optional[int] = None, user_id: Optional[int] = None,
+             status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        for record in super().scan(after_id):
+            if (user_id is None or record['user_id'] == user_id) and \
+                    (status is None or record['status'] == status):
+                yield record
+
+    def overlapping(self, start_date: str, end_date: str,
+                    user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Pending and approved leaves overlapping an inclusive date range.
+
+        Ordered by start date, then id; ``user_id`` limits it to one user.
+        """
+        found = [
+            leave for leave in self.scan(user_id=user_id)
+            if leave['status'] in ACTIVE_LEAVE_STATUSES
+            and leave_dates(leave)[0] <= end_date and leave_dates(leave)[1] >= start_date
+        ]
+        return sorted(found, key=lambda leave: (leave['start_date'], leave['id']))
+
+
+# Leaves that take (or may take) someone away; rejected ones do not
+ACTIVE_LEAVE_STATUSES = ("pending", "approved")
+
+
+def leave_dates(leave: Dict[str, Any]) -> Tuple[str, str]:
+    """A leave's inclusive (start, end) dates, never ending before it starts."""
+    start, end = leave['start_date'], leave['end_date']
+    return start, (end if end >= start else start)
+
+
+def attendance_matches(record: Dict[str, Any], user_id: Optional[int],
+             start_date: Optional[str], end_date: Optional[str]) -> bool:
+    """Whether an attendance record passes the scan filters.
+
+    Dates are ``YYYY-MM-DD`` strings, so they compare correctly as text.
+    """
+    if user_id is not None and record['user_id'] != user_id:
+        return False
+    if start_date is not None and record['date'] < start_date:
+        return False
+    if end_date is not None and record['date'] > end_date:
+        return False
+    return True
@@ -0,0 +1,236 @@
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from serialization import dumps, loads
+from config import COMPACT_RECORDS
+from utils import FrozenDict, file_signature, read_json_records, write_json_file
+from storage.locks import InterProcessLock
+from storage.records import AttendanceRecord
+from storage.sequences import SequenceAllocator, sequence_path
+
+
+class AttendanceEventLog:
+    """Append-only storage for attendance records.
+
+    Every create/update appends one small JSON line to ``log_path`` instead
+    of rewriting the whole attendance file. The current state is the
+    snapshot at ``snapshot_path`` with the log replayed on top of it;
+    ``compact()`` folds the log back into the snapshot.
+
+    Several processes can share the files. Writers take an
+    InterProcessLock and catch up before appending, and every read first
+    replays whatever other processes appended since (``refresh``). A
+    compaction replaces both files, which makes the others reload.
+
+    ``listener``, if set, is told about every change: ``reset(records)``
+    after a full load and ``changed(old, new)`` for each applied record.
+
+    Records are built with ``record_type`` and never change; an update
+    replaces the record with a new one.
+    """
+
+    def __init__(self, log_path: str, snapshot_path: str, compact_every: int = 5000,
+                 ids: Optional[SequenceAllocator] = None, record_type=None):
+        self.log_path = log_path
+        self.snapshot_path = snapshot_path
+        self.compact_every = compact_every
+        self.listener = None
+        self.record_type = record_type or (AttendanceRecord if COMPACT_RECORDS else FrozenDict)
+        self.file_lock = InterProcessLock(log_path)
+        self._lock = threading.RLock()
+        self._records: List[Dict[str, Any]] = []
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._by_key: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        # Shared with JsonAttendanceRepository, so switching modes keeps counting
+        self.ids = ids or SequenceAllocator(sequence_path(snapshot_path))
+        self._pending = 0
+        self._loaded = False
+        self._snapshot_signature = None
+        # Inode of the log and how many bytes of it have been replayed
+        self._log_inode = None
+        self._offset = 0
+
+    def load(self) -> None:
+        """Rebuild the in-memory state from the snapshot plus the log."""
+        with self._lock:
+            self._records = []
+            self._by_id = {}
+            self._by_key = {}
+            self._snapshot_signature = file_signature(self.snapshot_path)
+            # Parsed rather than cached: the log keeps its own records
+            for record in read_json_records(self.snapshot_path, self.record_type):
+                self._apply(record, notify=False)
+            self._pending = 0
+            self._log_inode = None
+            self._offset = 0
+            self._tail(notify=False)
+            if self._records:
+                self.ids.observe(self._records[-1]['id'])
+            self._loaded = True
+            if self.listener is not None:
+                self.listener.reset(self._records)
+
+    def refresh(self) -> None:
+        """Catch up with what other processes wrote since we last looked."""
+        with self._lock:
+            if not self._loaded or file_signature(self.snapshot_path) != self._snapshot_signature:
+                self.load()
+                return
+            try:
+                st = os.stat(self.log_path)
+            except FileNotFoundError:
+                if self._log_inode is not None:
+                    self.load()
+                return
+            if self._log_inode is not None and (st.st_ino != self._log_inode or st.st_size < self._offset):
+                # Compacted by another process
+                self.load()
+            elif st.st_size > self._offset:
+                self._tail()
+
+    def _tail(self, notify: bool = True) -> None:
+        """Replay the complete lines appended after ``_offset``."""
+        try:
+            f = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            if self._log_inode is not None and inode != self._log_inode:
+                # Replaced between refresh()'s stat and our open
+                self.load()
+                return
+            self._log_inode = inode
+            f.seek(self._offset)
+            data = f.read()
+        position = 0
+        while True:
+            end = data.find(b'\n', position)
+            if end < 0:
+                # An incomplete line is still being written; it is picked
+                # up once its newline lands
+                break
+            try:
+                event = loads(data[position:end])
+            except ValueError:
+                # A torn line from a crash mid-append
+                event = None
+            position = end + 1
+            if event is not None:
+                self._apply(event['record'], notify)
+                self._pending += 1
+        self._offset += position
+        if self._records:
+            self.ids.observe(self._records[-1]['id'])
+
+    def _apply(self, record: Dict[str, Any], notify: bool = True) -> None:
+        if type(record) is not self.record_type:
+            record = self.record_type(record)
+        old = self._by_id.get(record['id'])
+        if old is not None:
+            position = bisect_left(self._records, record['id'], key=lambda r: r['id'])
+            self._records[position] = record
+            key = (old['user_id'], old['date'])
+            if self._by_key.get(key) is old:
+                del self._by_key[key]
+        elif self._records and self._records[-1]['id'] > record['id']:
+            # From another worker's id block: keep the list in id order
+            self._records.insert(bisect_right(self._records, record['id'], key=lambda r: r['id']), record)
+        else:
+            self._records.append(record)
+        self._by_id[record['id']] = record
+        self._by_key[(record['user_id'], record['date'])] = record
+        if notify and self.listener is not None:
+            self.listener.changed(old, record)
+
+    def _append(self, op: str, record: Dict[str, Any]) -> None:
+        # Called inside transaction(), so we are caught up and alone
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        line = dumps({"op": op, "record": record}) + b'\n'
+        with open(self.log_path, 'ab') as f:
+            if f.tell() > self._offset:
+                # Terminate a torn line left by a crashed writer
+                line = b'\n' + line
+            f.write(line)
+        self._tail()
+
+    @contextmanager
+    def transaction(self):
+        """Hold off writers in this and other processes, starting up to date."""
+        with self.file_lock, self._lock:
+            self.refresh()
+            yield self
+
+    def records(self) -> List[Dict[str, Any]]:
+        self.refresh()
+        return self._records
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        self.refresh()
+        return self._by_id.get(record_id)
+
+    def find(self, user_id: int, date: str) -> Optional[Dict[str, Any]]:
+        self.refresh()
+        return self._by_key.get((user_id, date))
+
+    def create(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        with self.transaction():
+            record = {"id": self.ids.next(), **fields}
+            self._append("create", record)
+        self._maybe_compact()
+        return self._by_id[record['id']]
+
+    def update(self, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self.transaction():
+            existing = self._by_id.get(record_id)
+            if existing is None:
+                return None
+            self._append("update", {**existing, **fields})
+        self._maybe_compact()
+        return self._by_id[record_id]
+
+    def delete_many(self, record_ids: Iterable[int]) -> int:
+        """Drop records and fold the log into a snapshot without them.
+
+        Deletions are not log events: the snapshot is rewritten at once. A
+        crash before the log is replaced can bring the records back from
+        it, so callers that must not lose a deletion re-run it (see
+        storage/archive.py).
+        """
+        record_ids = set(record_ids)
+        with self.transaction():
+            kept = [r for r in self._records if r['id'] not in record_ids]
+            removed = len(self._records) - len(kept)
+            if removed:
+                self._records = kept
+                self._by_id = {r['id']: r for r in kept}
+                # In id order, so the latest record of a (user, day) wins as in _apply
+                self._by_key = {(r['user_id'], r['date']): r for r in kept}
+                self.compact()
+                if self.listener is not None:
+                    self.listener.reset(kept)
+        return removed
+
+    def _maybe_compact(self) -> None:
+        if self.compact_every and self._pending >= self.compact_every:
+            self.compact()
+
+    def compact(self) -> None:
+        """Fold the log into the snapshot and start a new, empty log.
+
+        Replaying a record that is already in the snapshot is harmless, so a
+        crash between writing the snapshot and replacing the log loses
+        nothing. The log is replaced rather than truncated so other
+        processes see a new inode and reload.
+        """
+        with self.transaction():
+            write_json_file(self.snapshot_path, self._records)
+            tmp_path = self.log_path + '.tmp'
+            open(tmp_path, 'wb').close()
+            os.replace(tmp_path, self.log_path)
+            self._snapshot_signature = file_signature(self.snapshot_path)
+            self._log_inode = os.stat(self.log_path).st_ino
+            self._offset = 0
+            self._pending = 0
@@ -0,0 +1,269 @@
+from bisect import bisect_right
+from operator import itemgetter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from utils import gc_paused
+
+Record = Dict[str, Any]
+# (start, end, record)
+Interval = Tuple[Any, Any, Record]
+
+
+class HashIndex:
+    """Maps a key derived from each record to the record(s) having it.
+
+    A unique index maps each key to one record; a non-unique index maps it
+    to the records in id order, which is the order the JSON files keep.
+    """
+
+    def __init__(self, key: Callable[[Record], Hashable], unique: bool = False):
+        self.key = key
+        self.unique = unique
+        self._map: Dict[Hashable, Any] = {}
+        # Buckets that received a record out of id order and must be
+        # re-sorted before they are next read
+        self._unsorted = set()
+
+    def empty(self) -> "HashIndex":
+        return HashIndex(self.key, self.unique)
+
+    def clear(self) -> None:
+        self._map = {}
+        self._unsorted = set()
+
+    def add(self, record: Record) -> None:
+        key = self.key(record)
+        if self.unique:
+            self._map[key] = record
+            return
+        bucket = self._map.setdefault(key, {})
+        if bucket and record['id'] < next(reversed(bucket)):
+            self._unsorted.add(key)
+        bucket[record['id']] = record
+
+    def remove(self, record: Record) -> None:
+        key = self.key(record)
+        if self.unique:
+            if self._map.get(key) is not None and self._map[key]['id'] == record['id']:
+                del self._map[key]
+            return
+        bucket = self._map.get(key)
+        if bucket is not None:
+            bucket.pop(record['id'], None)
+            if not bucket:
+                del self._map[key]
+                self._unsorted.discard(key)
+
+    def get(self, key: Hashable) -> Optional[Record]:
+        """The record for ``key`` in a unique index."""
+        return self._map.get(key)
+
+    def get_all(self, key: Hashable) -> List[Record]:
+        """The records for ``key`` in a non-unique index, in id order."""
+        bucket = self._map.get(key)
+        if not bucket:
+            return []
+        if key in self._unsorted:
+            bucket = dict(sorted(bucket.items()))
+            self._map[key] = bucket
+            self._unsorted.discard(key)
+        return list(bucket.values())
+
+    def snapshot(self) -> Dict[Hashable, Any]:
+        if self.unique:
+            return {k: r['id'] for k, r in self._map.items()}
+        return {k: sorted(bucket) for k, bucket in self._map.items()}
+
+
+class IndexManager:
+    """A primary id index plus named secondary indexes over one table.
+
+    ``build`` indexes a freshly loaded table; ``insert``/``update``/``delete``
+    keep the indexes in step with each write so lookups never scan. Any
+    object with ``empty``/``clear``/``add``/``remove``/``snapshot`` can be
+    registered, not just a HashIndex; one that also has ``build(records)``
+    is built with that instead.
+    """
+
+    def __init__(self, indexes: Dict[str, Any]):
+        self.by_id = HashIndex(lambda r: r['id'], unique=True)
+        self.indexes = indexes
+
+    def _all(self) -> Iterable[Any]:
+        yield self.by_id
+        yield from self.indexes.values()
+
+    def build(self, records: Iterable[Record]) -> None:
+        records = records if isinstance(records, list) else list(records)
+        for index in self._all():
+            if hasattr(index, 'build'):
+                # Indexes that are cheaper to build in bulk than record by record
+                index.build(records)
+                continue
+            index.clear()
+            for record in records:
+                index.add(record)
+
+    def insert(self, record: Record) -> None:
+        for index in self._all():
+            index.add(record)
+
+    def update(self, old: Record, new: Record) -> None:
+        for index in self._all():
+            index.remove(old)
+            index.add(new)
+
+    def delete(self, record: Record) -> None:
+        for index in self._all():
+            index.remove(record)
+
+    def get(self, record_id: int) -> Optional[Record]:
+        return self.by_id.get(record_id)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.indexes[name]
+
+    def verify(self, records: Iterable[Record]) -> bool:
+        """True if the indexes match what a rebuild from ``records`` gives."""
+        fresh = IndexManager({name: index.empty() for name, index in self.indexes.items()})
+        fresh.build(records)
+        return all(
+            mine.snapshot() == theirs.snapshot()
+            for mine, theirs in zip(self._all(), fresh._all())
+        )
+
+
+class IntervalTree:
+    """A static centered interval tree over inclusive ``(start, end)`` ranges.
+
+    Endpoints only need to be comparable; ``YYYY-MM-DD`` strings are. Each
+    node keeps the intervals containing its center sorted both by start and
+    by end, so a stabbing query reports what it finds without looking at
+    anything it will not report: O(log n + k).
+    """
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, intervals: List[Interval]):
+        # ``intervals`` is sorted by start, so those right of the center are a suffix
+        center = self.center = intervals[len(intervals) // 2][0]
+        split = bisect_right(intervals, center, key=itemgetter(0))
+        right = intervals[split:]
+        left = [interval for interval in intervals[:split] if interval[1] < center]
+        here = [interval for interval in intervals[:split] if interval[1] >= center]
+        self.by_start = here
+        self.by_end = sorted(here, key=itemgetter(1), reverse=True)
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def stab(self, point: Any, out: List[Record]) -> None:
+        """Append the records whose interval contains ``point``."""
+        node = self
+        while node is not None:
+            if point < node.center:
+                for start, _, record in node.by_start:
+                    if start > point:
+                        break
+                    out.append(record)
+                node = node.left
+            elif point > node.center:
+                for _, end, record in node.by_end:
+                    if end < point:
+                        break
+                    out.append(record)
+                node = node.right
+            else:
+                out.extend(record for _, _, record in node.by_start)
+                return
+
+
+class IntervalIndex:
+    """Records indexed by an inclusive range, e.g. a leave's dates.
+
+    ``overlapping(start, end)`` returns the records whose range overlaps
+    ``[start, end]`` in O(log n + k): the ones running at ``start`` come
+    from an IntervalTree, the ones beginning after it from a list sorted by
+    start. ``include`` limits the index to the records that matter, such
+    as leaves that are not rejected.
+
+    The tree is built on the first query after a (re)load, so reloads and
+    tables nobody asks about do not pay for it. Later writes are kept in
+    ``added``/``removed`` beside it and folded in once they outnumber
+    ``REBUILD_AT`` (or the square root of the size, if larger). Writers
+    replace that state as a whole, so a concurrent reader sees either the
+    old or the new one.
+    """
+
+    REBUILD_AT = 32
+
+    def __init__(self, bounds: Callable[[Record], Tuple[Any, Any]],
+                 include: Callable[[Record], bool] = lambda r: True):
+        self.bounds = bounds
+        self.include = include
+        # (base records by id, their tree or None until queried, added by id, removed ids)
+        self._state: Tuple[Dict[int, Record], Any, Dict[int, Record], frozenset] = ({}, None, {}, frozenset())
+
+    def empty(self) -> "IntervalIndex":
+        return IntervalIndex(self.bounds, self.include)
+
+    def clear(self) -> None:
+        self._state = ({}, None, {}, frozenset())
+
+    def build(self, records: Iterable[Record]) -> None:
+        include = self.include
+        self._state = ({record['id']: record for record in records if include(record)}, None, {}, frozenset())
+
+    def _changed(self, added: Dict[int, Record], removed: frozenset) -> None:
+        base, built, _, _ = self._state
+        if len(added) + len(removed) <= max(self.REBUILD_AT, int(len(base) ** 0.5)):
+            self._state = (base, built, added, removed)
+            return
+        base = {i: record for i, record in base.items() if i not in removed}
+        base.update(added)
+        self._state = (base, None, {}, frozenset())
+
+    def add(self, record: Record) -> None:
+        if not self.include(record):
+            return
+        _, _, added, removed = self._state
+        self._changed({**added, record['id']: record}, removed)
+
+    def remove(self, record: Record) -> None:
+        base, _, added, removed = self._state
+        if record['id'] in added:
+            self._changed({i: r for i, r in added.items() if i != record['id']}, removed)
+        elif record['id'] in base and record['id'] not in removed:
+            self._changed(added, removed | {record['id']})
+
+    def _build_tree(self, state: Tuple) -> Tuple[Optional[IntervalTree], List[Any], List[Interval]]:
+        base, built, added, removed = state
+        if built is None:
+            with gc_paused():
+                intervals = sorted(((*self.bounds(r), r) for r in base.values()), key=itemgetter(0))
+                built = (IntervalTree(intervals) if intervals else None, [i[0] for i in intervals], intervals)
+            if self._state is state:
+                # Unless a writer moved on meanwhile; the next query builds then
+                self._state = (base, built, added, removed)
+        return built
+
+    def overlapping(self, start: Any, end: Any) -> List[Record]:
+        """Records whose range overlaps ``[start, end]``, by start then id."""
+        state = self._state
+        _, _, added, removed = state
+        tree, starts, by_start = self._build_tree(state)
+        found: List[Record] = []
+        if tree is not None:
+            # Those already running at ``start``, then those beginning within
+            tree.stab(start, found)
+            found.extend(record for _, _, record in by_start[bisect_right(starts, start):bisect_right(starts, end)])
+        if removed:
+            found = [record for record in found if record['id'] not in removed]
+        for record in added.values():
+            first, last = self.bounds(record)
+            if first <= end and last >= start:
+                found.append(record)
+        found.sort(key=lambda r: (self.bounds(r)[0], r['id']))
+        return found
+
+    def snapshot(self) -> List[int]:
+        base, _, added, removed = self._state
+        return sorted((set(base) - removed) | set(added))
@@ -0,0 +1,364 @@
+import threading
+from bisect import bisect_right
+from datetime import date
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from utils import FrozenDict, FrozenList, file_signature, read_json_file, read_json_records, write_json_file
+from config import COMPACT_RECORDS, JSON_GROUP_COMMIT_MS
+from storage.base import (
+    ACTIVE_LEAVE_STATUSES, AttendanceRepository, LeavesRepository, Repository, UsersRepository,
+    attendance_matches, leave_dates
+)
+from storage.event_log import AttendanceEventLog
+from storage.indexes import HashIndex, IndexManager, IntervalIndex
+from storage.locks import InterProcessLock
+from storage.records import AttendanceRecord, LeaveRecord, user_record
+from storage.sequences import SequenceAllocator, sequence_path
+from storage.writer import GroupCommitWriter
+from analytics.rollups import DailyRollups
+
+
+def _after(records: List[Dict[str, Any]], after_id: Optional[int]) -> Iterator[Dict[str, Any]]:
+    """Records of an id-ordered list that come after ``after_id``."""
+    if after_id is None:
+        return iter(records)
+    return islice(records, bisect_right(records, after_id, key=lambda r: r['id']), None)
+
+
+class JsonRepository(Repository):
+    """A table stored as one JSON array, rewritten on every change.
+
+    The parsed records and their indexes stay in memory for as long as the
+    file's signature is the one this process last read or wrote, so lookups
+    are hash probes and writes only re-index the record they touch. If
+    another process rewrites the file, the next access reloads it.
+
+    Records handed out are read-only; ``update`` replaces a record with a
+    new one rather than changing it in place.
+
+    Mutations are serialized by the repository lock and written atomically
+    through a GroupCommitWriter: concurrent changes share one file write,
+    and each call returns once its change is on disk. Other processes are
+    held off by an InterProcessLock from the start of a transaction until
+    its write is done; since every access checks the file's signature, the
+    transaction starts from their latest write and never overwrites it.
+
+    New ids come from a SequenceAllocator (by default ``<file>.seq``), so
+    an insert never looks at the other records to number itself.
+
+    Records are FrozenDicts shared with the JSON file cache unless a
+    subclass sets ``record_type``, which builds each record from its dict;
+    such a table is parsed on its own and only the converted records are
+    kept (see storage/records.py).
+    """
+
+    record_type = FrozenDict
+
+    def __init__(self, file_path: str, ids: Optional[SequenceAllocator] = None):
+        self.file_path = file_path
+        self._lock = threading.RLock()
+        self._signature = None
+        self._loaded = False
+        self._records: List[Dict[str, Any]] = FrozenList()
+        self._positions: Dict[int, int] = {}
+        self.ids = ids or SequenceAllocator(sequence_path(file_path))
+        self._version = 0
+        self._local = threading.local()
+        self._writing = False
+        self.file_lock = InterProcessLock(file_path)
+        self.writer = GroupCommitWriter(
+            self._lock, self._snapshot, self._write, JSON_GROUP_COMMIT_MS / 1000
+        )
+        self.indexes = IndexManager(self.build_indexes())
+
+    def build_indexes(self) -> Dict[str, HashIndex]:
+        return {}
+
+    def _state(self) -> List[Dict[str, Any]]:
+        signature = file_signature(self.file_path)
+        if self._loaded and (signature == self._signature or self._writing):
+            return self._records
+        with self._lock:
+            signature = file_signature(self.file_path)
+            # While our own write is in flight the file may already be the
+            # new one; memory is the newer state either way
+            if not self._loaded or (signature != self._signature and not self._writing):
+                if self.record_type is FrozenDict:
+                    records = FrozenList(read_json_file(self.file_path, readonly=True))
+                else:
+                    records = FrozenList(read_json_records(self.file_path, self.record_type))
+                self.indexes.build(records)
+                self._positions = {r['id']: i for i, r in enumerate(records)}
+                # The file is in id order, so the last record has the highest
+                self.ids.observe(records[-1]['id'] if records else 0)
+                self._records = records
+                self._signature = signature
+                self._loaded = True
+                self._version += 1
+        return self._records
+
+    def _save(self) -> None:
+        # Called under the lock; the write happens when the transaction ends
+        self._version += 1
+        self._local.ticket = self.writer.submit()
+
+    def _snapshot(self) -> List[Dict[str, Any]]:
+        # Records are immutable, so a shallow copy can be written unlocked
+        self._writing = True
+        return list(self._records)
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        try:
+            write_json_file(self.file_path, records)
+        finally:
+            with self._lock:
+                self._signature = file_signature(self.file_path)
+                self._writing = False
+
+    @contextmanager
+    def transaction(self):
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            # Held until our changes are on disk, so no other process can
+            # write the file between our read and our write
+            self.file_lock.acquire()
+        try:
+            try:
+                with self._lock:
+                    self._local.depth = depth + 1
+                    try:
+                        yield self
+                    finally:
+                        self._local.depth = depth
+            finally:
+                ticket = getattr(self._local, 'ticket', None)
+                if depth == 0 and ticket is not None:
+                    self._local.ticket = None
+                    self.writer.wait(ticket)
+        finally:
+            if depth == 0:
+                self.file_lock.release()
+
+    def version(self) -> int:
+        self._state()
+        return self._version
+
+    def list(self) -> List[Dict[str, Any]]:
+        return self._state()
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        self._state()
+        return self.indexes.get(record_id)
+
+    def scan(self, after_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        return _after(self._state(), after_id)
+
+    def create(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        with self.transaction():
+            records = self._state()
+            if 'id' in fields:
+                record = self.record_type(fields)
+                self.ids.observe(record['id'])
+            else:
+                record = self.record_type({"id": self.ids.next(), **fields})
+            position = len(records)
+            if records and records[-1]['id'] > record['id']:
+                # A record brought in with its own (older) id: keep id order
+                position = bisect_right(records, record['id'], key=lambda r: r['id'])
+                for later in records[position:]:
+                    self._positions[later['id']] += 1
+            # The list is frozen for callers; only the repository inserts
+            list.insert(records, position, record)
+            self._positions[record['id']] = position
+            self.indexes.insert(record)
+            self._save()
+        return record
+
+    def update(self, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self.transaction():
+            records = self._state()
+            old = self.indexes.get(record_id)
+            if old is None:
+                return None
+            record = self.record_type({**old, **fields})
+            list.__setitem__(records, self._positions[record_id], record)
+            self.indexes.update(old, record)
+            self._save()
+        return record
+
+    def delete(self, record_id: int) -> Optional[Dict[str, Any]]:
+        with self.transaction():
+            records = self._state()
+            record = self.indexes.get(record_id)
+            if record is None:
+                return None
+            position = self._positions.pop(record_id)
+            list.pop(records, position)
+            for later in records[position:]:
+                self._positions[later['id']] -= 1
+            self.indexes.delete(record)
+            self._save()
+        return record
+
+    def delete_many(self, record_ids: Iterable[int]) -> int:
+        record_ids = set(record_ids)
+        with self.transaction():
+            records = self._state()
+            kept = [r for r in records if r['id'] not in record_ids]
+            removed = len(records) - len(kept)
+            if removed:
+                # One pass and one write instead of shifting positions per
+                # record; readers still iterating the old list keep it whole
+                records = self._records = FrozenList(kept)
+                self._positions = {r['id']: i for i, r in enumerate(records)}
+                self.indexes.build(records)
+                self._save()
+        return removed
+
+
+class JsonUsersRepository(JsonRepository, UsersRepository):
+    record_type = staticmethod(user_record) if COMPACT_RECORDS else FrozenDict
+
+    def build_indexes(self) -> Dict[str, HashIndex]:
+        return {"email": HashIndex(lambda u: u['email'], unique=True)}
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        self._state()
+        return self.indexes["email"].get(email)
+
+
+class JsonAttendanceRepository(JsonRepository, AttendanceRepository):
+    record_type = AttendanceRecord if COMPACT_RECORDS else FrozenDict
+
+    def build_indexes(self) -> Dict[str, HashIndex]:
+        return {
+            "user_date": HashIndex(lambda a: (a['user_id'], a['date']), unique=True),
+            "user_id": HashIndex(lambda a: a['user_id']),
+            "daily": DailyRollups(),
+        }
+
+    def find(self, user_id: int, date: str) -> Optional[Dict[str, Any]]:
+        self._state()
+        return self.indexes["user_date"].get((user_id, date))
+
+    def daily_counts(self, start: date, end: date) -> Dict[date, Tuple[int, int]]:
+        self._state()
+        return self.indexes["daily"].counts(start, end)
+
+    def scan(self, after_id: Optional[int] = None, user_id: Optional[int] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        records = self._state()
+        if user_id is not None:
+            records = self.indexes["user_id"].get_all(user_id)
+        for record in _after(records, after_id):
+            if attendance_matches(record, None, start_date, end_date):
+                yield record
+
+
+class JsonLeavesRepository(JsonRepository, LeavesRepository):
+    record_type = LeaveRecord if COMPACT_RECORDS else FrozenDict
+
+    def build_indexes(self) -> Dict[str, HashIndex]:
+        return {
+            "user_id": HashIndex(lambda l: l['user_id']),
+            "status": HashIndex(lambda l: l['status']),
+            "dates": IntervalIndex(leave_dates, include=lambda l: l['status'] in ACTIVE_LEAVE_STATUSES),
+        }
+
+    def list_by_user(self, user_id: int) -> List[Dict[str, Any]]:
+        self._state()
+        return self.indexes["user_id"].get_all(user_id)
+
+    def list_by_status(self, status: str) -> List[Dict[str, Any]]:
+        self._state()
+        return self.indexes["status"].get_all(status)
+
+    def overlapping(self, start_date: str, end_date: str,
+                    user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        if user_id is None:
+            self._state()
+            return self.indexes["dates"].overlapping(start_date, end_date)
+        # One person's leaves are few enough to check directly
+        return super().overlapping(start_date, end_date, user_id)
+
+    def scan(self, after_id: Optional[int] = None, user_id: Optional[int] = None,
+             status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        if user_id is not None:
+            records = self.list_by_user(user_id)
+        elif status is not None:
+            records = self.list_by_status(status)
+        else:
+            records = self._state()
+        for record in _after(records, after_id):
+            if (user_id is None or record['user_id'] == user_id) and \
+                    (status is None or record['status'] == status):
+                yield record
+
+
+class LoggedAttendanceRepository(AttendanceRepository):
+    """Attendance kept in memory and persisted through an append-only log."""
+
+    def __init__(self, log: AttendanceEventLog):
+        self.log = log
+        self.rollups = DailyRollups()
+        self._version = 0
+        # Every change, ours or another process's, reaches the rollups
+        log.listener = self
+
+    def reset(self, records: List[Dict[str, Any]]) -> None:
+        self.rollups.rebuild(records)
+        self._version += 1
+
+    def changed(self, old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> None:
+        if old is not None:
+            self.rollups.remove(old)
+        self.rollups.add(new)
+        self._version += 1
+
+    def load(self) -> None:
+        self.log.load()
+
+    def version(self) -> int:
+        self.log.refresh()
+        return self._version
+
+    def list(self) -> List[Dict[str, Any]]:
+        return self.log.records()
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        return self.log.get(record_id)
+
+    def find(self, user_id: int, date: str) -> Optional[Dict[str, Any]]:
+        return self.log.find(user_id, date)
+
+    def daily_counts(self, start: date, end: date) -> Dict[date, Tuple[int, int]]:
+        self.log.refresh()
+        return self.rollups.counts(start, end)
+
+    def scan(self, after_id: Optional[int] = None, user_id: Optional[int] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        for record in _after(self.list(), after_id):
+            if attendance_matches(record, user_id, start_date, end_date):
+                yield record
+
+    def create(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        return self.log.create(fields)
+
+    def update(self, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self.log.update(record_id, fields)
+
+    def transaction(self):
+        return self.log.transaction()
+
+    def delete(self, record_id: int) -> Optional[Dict[str, Any]]:
+        with self.log.transaction():
+            record = self.log.get(record_id)
+            if record is None:
+                return None
+            self.log.delete_many([record_id])
+        return record
+
+    def delete_many(self, record_ids: Iterable[int]) -> int:
+        # Deletions rewrite the snapshot rather than going into the log
+        return self.log.delete_many(record_ids)
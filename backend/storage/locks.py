@@ -0,0 +1,55 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows: single-process only
+    fcntl = None
+
+
+class InterProcessLock:
+    """Advisory lock on ``<path>.lock`` held on behalf of the whole process.
+
+    Several worker processes (uvicorn --workers, or replicas sharing a data
+    volume) serialize their writes to one data file through it. Inside a
+    process it is shared: the first thread to acquire it takes the
+    ``flock`` and the last one to release it gives it up, so the threads of
+    one worker keep group-committing together. Threads still need the
+    owner's own lock to exclude each other.
+
+    Without ``fcntl`` it does nothing, which is only safe for one process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path + '.lock'
+        self._mutex = threading.Lock()
+        self._holders = 0
+        self._fd = None
+
+    def acquire(self) -> None:
+        with self._mutex:
+            if self._holders == 0 and fcntl is not None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self._fd = fd
+            self._holders += 1
+
+    def release(self) -> None:
+        with self._mutex:
+            self._holders -= 1
+            if self._holders == 0 and self._fd is not None:
+                fd, self._fd = self._fd, None
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
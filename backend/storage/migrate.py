@@ -0,0 +1,43 @@
+"""Import the JSON data files into the SQLite database.
+
+Usage: python -m storage.migrate [--sqlite PATH]
+
+Existing rows with the same id are replaced, so the migration can be re-run.
+A pending attendance log (ATTENDANCE_STORAGE=log) is replayed first.
+"""
+import argparse
+from config import (
+    SQLITE_FILE, USERS_FILE, ATTENDANCE_FILE, LEAVES_FILE,
+    ATTENDANCE_LOG_FILE
+)
+from utils import read_json_file
+from storage.event_log import AttendanceEventLog
+from storage.sqlite_store import (
+    SqliteAttendanceRepository, SqliteDatabase, SqliteLeavesRepository,
+    SqliteUsersRepository
+)
+
+
+def migrate(sqlite_path: str = SQLITE_FILE) -> dict:
+    db = SqliteDatabase(sqlite_path)
+    log = AttendanceEventLog(ATTENDANCE_LOG_FILE, ATTENDANCE_FILE, compact_every=0)
+    log.load()
+    tables = {
+        "users": (SqliteUsersRepository(db), read_json_file(USERS_FILE)),
+        "attendance": (SqliteAttendanceRepository(db), log.records()),
+        "leaves": (SqliteLeavesRepository(db), read_json_file(LEAVES_FILE)),
+    }
+    counts = {}
+    for name, (repository, records) in tables.items():
+        repository.insert_many(records)
+        counts[name] = len(records)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import JSON data files into SQLite")
+    parser.add_argument("--sqlite", default=SQLITE_FILE, help="Target database file")
+    args = parser.parse_args()
+    for table, count in migrate(args.sqlite).items():
+        print(f"{table}: {count} records imported")
+    print(f"Set STORAGE_BACKEND=sqlite to serve from {args.sqlite}")
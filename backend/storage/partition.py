@@ -0,0 +1,38 @@
+"""Split attendance.json into the month partitions used by ATTENDANCE_STORAGE=partitioned.
+
+Usage: python -m storage.partition [--dir PATH]
+
+A pending attendance log (ATTENDANCE_STORAGE=log) is replayed first. Each
+partition is rewritten from scratch, so the split can be re-run; the source
+file is left in place.
+"""
+import argparse
+import os
+from typing import Dict, List
+from config import ATTENDANCE_FILE, ATTENDANCE_LOG_FILE, ATTENDANCE_PARTITION_DIR
+from utils import write_json_file
+from storage.event_log import AttendanceEventLog
+from storage.partitioned import month_key
+
+
+def partition(directory: str = ATTENDANCE_PARTITION_DIR) -> Dict[str, int]:
+    log = AttendanceEventLog(ATTENDANCE_LOG_FILE, ATTENDANCE_FILE, compact_every=0)
+    log.load()
+    months: Dict[str, List[dict]] = {}
+    max_id = 0
+    for record in sorted(log.records(), key=lambda r: r['id']):
+        months.setdefault(month_key(record['date']), []).append(dict(record))
+        max_id = max(max_id, record['id'])
+    for month, records in months.items():
+        write_json_file(os.path.join(directory, f"{month}.json"), records)
+    write_json_file(os.path.join(directory, 'meta.json'), {"max_id": max_id})
+    return {month: len(records) for month, records in sorted(months.items())}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split attendance.json into month partitions")
+    parser.add_argument("--dir", default=ATTENDANCE_PARTITION_DIR, help="Target partition directory")
+    args = parser.parse_args()
+    for month, count in partition(args.dir).items():
+        print(f"{month}: {count} records")
+    print(f"Set ATTENDANCE_STORAGE=partitioned to serve from {args.dir}")
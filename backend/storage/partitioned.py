@@ -0,0 +1,204 @@
+import heapq
+import os
+import threading
+from collections import Counter, OrderedDict
+from contextlib import ExitStack, contextmanager
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from storage.base import AttendanceRepository
+from storage.json_store import JsonAttendanceRepository
+from storage.sequences import SequenceAllocator
+from utils import file_signature
+
+
+def month_key(day: str) -> str:
+    """``YYYY-MM`` partition name for a ``YYYY-MM-DD`` date."""
+    return day[:7]
+
+
+class PartitionedAttendanceRepository(AttendanceRepository):
+    """Attendance split into one JSON file per month.
+
+    ``<directory>/2026-10.json`` holds the records dated in October 2026 and
+    is an ordinary JsonAttendanceRepository, with its own indexes and
+    rollups. Check-ins and today's lookups only ever open the current
+    month; date-bounded reads open the months they cover. At most
+    ``max_loaded`` partitions stay in memory, least recently used first out.
+
+    Ids stay unique across partitions, and across processes: all partitions
+    share one SequenceAllocator whose high-water mark is kept in
+    ``<directory>/meta.json``.
+    """
+
+    def __init__(self, directory: str, max_loaded: int = 3):
+        self.directory = directory
+        self.max_loaded = max_loaded
+        self.meta_path = os.path.join(directory, 'meta.json')
+        self.ids = SequenceAllocator(self.meta_path, floor=self._highest_id)
+        self._lock = threading.RLock()
+        self._partitions: "OrderedDict[str, JsonAttendanceRepository]" = OrderedDict()
+        self._pinned: Counter = Counter()
+        self._version = 0
+
+    def months(self) -> List[str]:
+        """Names of the partitions on disk, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name[:-5] for name in os.listdir(self.directory)
+            if name.endswith('.json') and name != 'meta.json'
+        )
+
+    def partition(self, month: str) -> JsonAttendanceRepository:
+        with self._lock:
+            repository = self._partitions.get(month)
+            if repository is None:
+                repository = JsonAttendanceRepository(os.path.join(self.directory, f"{month}.json"), self.ids)
+                self._partitions[month] = repository
+                current = month_key(date.today().isoformat())
+                for loaded in list(self._partitions):
+                    if len(self._partitions) <= self.max_loaded:
+                        break
+                    if loaded not in (month, current) and not self._pinned[loaded]:
+                        del self._partitions[loaded]
+            else:
+                self._partitions.move_to_end(month)
+            return repository
+
+    def _partitions_for(self, start_date: Optional[str], end_date: Optional[str]) -> List[JsonAttendanceRepository]:
+        months = self.months()
+        if start_date is not None:
+            months = [m for m in months if m >= month_key(start_date)]
+        if end_date is not None:
+            months = [m for m in months if m <= month_key(end_date)]
+        return [self.partition(m) for m in months]
+
+    def _highest_id(self) -> int:
+        # Only needed when meta.json is missing: every partition is in id
+        # order, so its last record has its highest id
+        return max(
+            (records[-1]['id'] for records in (p.list() for p in self._partitions_for(None, None)) if records),
+            default=0
+        )
+
+    def _locate(self, record_id: int) -> Optional[JsonAttendanceRepository]:
+        """The partition holding ``record_id``, trying loaded ones first."""
+        with self._lock:
+            loaded = list(reversed(self._partitions.values()))
+        for repository in loaded:
+            if repository.get(record_id) is not None:
+                return repository
+        for month in reversed(self.months()):
+            repository = self.partition(month)
+            if repository.get(record_id) is not None:
+                return repository
+        return None
+
+    def version(self) -> Tuple:
+        # From the files on disk, not from which months happen to be loaded:
+        # a full-history read cycles every month through memory, and that
+        # must not look like a change. The counter covers this process's
+        # writes that are not on disk yet.
+        return (self._version,) + tuple(
+            (month, file_signature(os.path.join(self.directory, f"{month}.json"))) for month in self.months()
+        )
+
+    def list(self) -> List[Dict[str, Any]]:
+        return list(self.scan())
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        repository = self._locate(record_id)
+        return repository.get(record_id) if repository else None
+
+    def find(self, user_id: int, date: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.directory, f"{month_key(date)}.json")
+        if month_key(date) not in self._partitions and not os.path.exists(path):
+            return None
+        return self.partition(month_key(date)).find(user_id, date)
+
+    def daily_counts(self, start: date, end: date) -> Dict[date, Tuple[int, int]]:
+        counts: Dict[date, Tuple[int, int]] = {}
+        months = [m for m in self.months() if month_key(start.isoformat()) <= m <= month_key(end.isoformat())]
+        for month in months:
+            # Each partition only answers for the days of its own month
+            first = date(int(month[:4]), int(month[5:7]), 1)
+            last = date(first.year + first.month // 12, first.month % 12 + 1, 1) - timedelta(days=1)
+            counts.update(self.partition(month).daily_counts(max(start, first), min(end, last)))
+        return counts
+
+    def scan(self, after_id: Optional[int] = None, user_id: Optional[int] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        partitions = self._partitions_for(start_date, end_date)
+        # Ids are global, so merge the partitions back into id order
+        return heapq.merge(
+            *(p.scan(after_id, user_id, start_date, end_date) for p in partitions),
+            key=lambda r: r['id']
+        )
+
+    def transaction(self):
+        # Check-ins only touch today, so the current month's lock covers them
+        return self.partition(month_key(date.today().isoformat())).transaction()
+
+    @contextmanager
+    def transaction_for(self, dates: Iterable[str]):
+        months = sorted({month_key(day) for day in dates})
+        with self._lock:
+            # Pinned partitions are not evicted, so no other thread can open
+            # a second repository on a file this transaction has locked
+            self._pinned.update(months)
+        try:
+            with ExitStack() as stack:
+                # Always lock in month order so concurrent batches cannot deadlock
+                for month in months:
+                    stack.enter_context(self.partition(month).transaction())
+                yield self
+        finally:
+            with self._lock:
+                self._pinned.subtract(months)
+
+    def create(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        record = self.partition(month_key(fields['date'])).create(fields)
+        self._version += 1
+        return record
+
+    def update(self, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        repository = self._locate(record_id)
+        if repository is None:
+            return None
+        old = repository.get(record_id)
+        if 'date' in fields and month_key(fields['date']) != month_key(old['date']):
+            # Moving to another month: re-home the record
+            repository.delete(record_id)
+            record = self.partition(month_key(fields['date'])).create({**old, **fields})
+        else:
+            record = repository.update(record_id, fields)
+        self._version += 1
+        return record
+
+    def delete(self, record_id: int) -> Optional[Dict[str, Any]]:
+        repository = self._locate(record_id)
+        if repository is None:
+            return None
+        self._version += 1
+        return repository.delete(record_id)
+
+    def delete_many(self, record_ids: Iterable[int]) -> int:
+        record_ids = set(record_ids)
+        removed = 0
+        for month in self.months():
+            repository = self.partition(month)
+            with repository.transaction():
+                records = repository.list()
+                if records and all(r['id'] in record_ids for r in records):
+                    # A month removed (archived) entirely leaves no file
+                    # behind; the repository reloads it as empty
+                    os.remove(repository.file_path)
+                    removed += len(records)
+                else:
+                    removed += repository.delete_many(record_ids)
+                    continue
+            with self._lock:
+                if self._partitions.get(month) is repository and not self._pinned[month]:
+                    del self._partitions[month]
+        self._version += 1
+        return removed
@@ -0,0 +1,239 @@
+"""Compact in-memory records for the attendance and leaves tables.
+
+A dict per record costs about 450 bytes for an attendance row, most of it
+the hash table and a fresh copy of its date string. The classes here keep
+the same fields in ``__slots__`` instead: dates as day ordinals shared
+through a cache, user ids and repeated strings such as a leave's status
+interned. Timestamps stay the exact strings they were written as, since
+turning an integer back into ISO text costs more than the ~85 bytes it
+would save, on every write and every response.
+
+Records are read-only Mappings with the keys, values and key order of the
+dicts they replace, so repositories, indexes and routes use them as
+before; ``to_dict()`` turns one back into a dict, which is what
+``serialization.dumps`` does when it writes them to a file or a response.
+A value a slot cannot hold (a date in another format, a field the class
+does not know) is kept as given beside the slots.
+"""
+import sys
+from collections.abc import Mapping
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from utils import FrozenDict
+
+# Marks a field that was missing from the dict the record was built from
+_ABSENT = object()
+
+# 'YYYY-MM-DD' <-> day ordinal, one shared object per distinct day
+_ordinals: Dict[str, int] = {}
+_days: Dict[int, str] = {}
+# One int object per distinct user id instead of one per record
+_ints: Dict[int, int] = {}
+
+
+def _encode_day(value: Any) -> Optional[int]:
+    ordinal = _ordinals.get(value)
+    if ordinal is None and type(value) is str:
+        try:
+            day = date.fromisoformat(value)
+        except ValueError:
+            return None
+        if day.isoformat() != value:
+            return None
+        ordinal = _ordinals.setdefault(value, day.toordinal())
+        _days.setdefault(ordinal, value)
+    return ordinal
+
+
+def _decode_day(ordinal: int) -> str:
+    value = _days.get(ordinal)
+    if value is None:
+        value = _days.setdefault(ordinal, date.fromordinal(ordinal).isoformat())
+    return value
+
+
+def _encode_int(value: Any) -> Optional[int]:
+    return value if type(value) is int else None
+
+
+def _encode_shared_int(value: Any) -> Optional[int]:
+    return _ints.setdefault(value, value) if type(value) is int else None
+
+
+def _encode_text(value: Any) -> Optional[str]:
+    return value if type(value) is str else None
+
+
+def _encode_interned(value: Any) -> Optional[str]:
+    return sys.intern(value) if type(value) is str else None
+
+
+# Field kinds: (encode, decode); decode None means the value is stored as is
+ID = (_encode_int, None)
+USER_ID = (_encode_shared_int, None)
+TEXT = (_encode_text, None)
+LABEL = (_encode_interned, None)
+DAY = (_encode_day, _decode_day)
+
+
+class CompactRecord(Mapping):
+    """A read-only record stored in slots; subclasses declare ``FIELDS``.
+
+    ``FIELDS`` lists (key, kind) in dict order; keys in ``OPTIONAL`` are
+    left out of the mapping when missing, like a leave's ``approved_at``.
+    """
+
+    __slots__ = ('_extra',)
+    FIELDS: Tuple[Tuple[str, Tuple[Callable, Optional[Callable]]], ...] = ()
+    OPTIONAL: frozenset = frozenset()
+    _decoders: Dict[str, Optional[Callable]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._decoders = {key: kind[1] for key, kind in cls.FIELDS}
+
+    def __init__(self, fields: Mapping):
+        extra = None
+        for key, (encode, _) in self.FIELDS:
+            value = fields.get(key, _ABSENT)
+            stored = None if value is None or value is _ABSENT else encode(value)
+            setattr(self, key, stored)
+            if stored is None and not (value is None and key not in self.OPTIONAL) \
+                    and not (value is _ABSENT and key in self.OPTIONAL):
+                # Kept verbatim: an explicit None in an optional field, a
+                # missing required one, or a value the slot cannot hold
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        if len(fields) > len(self.FIELDS) - len(self.OPTIONAL) or extra:
+            for key in fields:
+                if key not in self._decoders:
+                    if extra is None:
+                        extra = {}
+                    extra[key] = fields[key]
+        self._extra = extra
+
+    def __getitem__(self, key: str) -> Any:
+        decode = self._decoders.get(key, _ABSENT)
+        if decode is not _ABSENT:
+            value = getattr(self, key)
+            if value is not None:
+                return value if decode is None else decode(value)
+        extra = self._extra
+        if extra is not None and key in extra:
+            value = extra[key]
+            if value is not _ABSENT:
+                return value
+        elif decode is not _ABSENT and key not in self.OPTIONAL:
+            return None
+        raise KeyError(key)
+
+    def keys(self) -> List[str]:
+        extra = self._extra
+        keys = []
+        for key, _ in self.FIELDS:
+            if getattr(self, key) is not None:
+                keys.append(key)
+            elif extra is not None and key in extra:
+                if extra[key] is not _ABSENT:
+                    keys.append(key)
+            elif key not in self.OPTIONAL:
+                keys.append(key)
+        if extra is not None:
+            keys.extend(key for key in extra if key not in self._decoders)
+        return keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return (type(self), (self.to_dict(),))
+
+
+class AttendanceRecord(CompactRecord):
+    __slots__ = ('id', 'user_id', 'date', 'check_in', 'check_out')
+    FIELDS = (
+        ('id', ID), ('user_id', USER_ID), ('date', DAY),
+        ('check_in', TEXT), ('check_out', TEXT),
+    )
+
+    def __init__(self, fields: Mapping):
+        # The common case, spelled out: tables are loaded a record at a time
+        if len(fields) == 5:
+            try:
+                record_id, user_id, ordinal = fields['id'], fields['user_id'], _ordinals[fields['date']]
+                check_in, check_out = fields['check_in'], fields['check_out']
+            except (KeyError, TypeError):
+                pass
+            else:
+                if type(record_id) is int and type(user_id) is int and \
+                        (check_in is None or type(check_in) is str) and \
+                        (check_out is None or type(check_out) is str):
+                    self.id = record_id
+                    self.user_id = _ints.setdefault(user_id, user_id)
+                    self.date = ordinal
+                    self.check_in = check_in
+                    self.check_out = check_out
+                    self._extra = None
+                    return
+        super().__init__(fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self._extra is not None:
+            return super().to_dict()
+        # The common case, spelled out: this runs for every record written
+        day = self.date
+        return {
+            'id': self.id, 'user_id': self.user_id,
+            'date': None if day is None else _days[day],
+            'check_in': self.check_in, 'check_out': self.check_out,
+        }
+
+
+class LeaveRecord(CompactRecord):
+    __slots__ = (
+        'id', 'user_id', 'start_date', 'end_date', 'reason', 'status',
+        'created_at', 'approved_at', 'rejected_at'
+    )
+    FIELDS = (
+        ('id', ID), ('user_id', USER_ID), ('start_date', DAY), ('end_date', DAY),
+        ('reason', TEXT), ('status', LABEL), ('created_at', TEXT),
+        ('approved_at', TEXT), ('rejected_at', TEXT),
+    )
+    OPTIONAL = frozenset(('approved_at', 'rejected_at'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self._extra is not None:
+            return super().to_dict()
+        start, end = self.start_date, self.end_date
+        record = {
+            'id': self.id, 'user_id': self.user_id,
+            'start_date': None if start is None else _days[start],
+            'end_date': None if end is None else _days[end],
+            'reason': self.reason, 'status': self.status, 'created_at': self.created_at,
+        }
+        if self.approved_at is not None:
+            record['approved_at'] = self.approved_at
+        if self.rejected_at is not None:
+            record['rejected_at'] = self.rejected_at
+        return record
+
+
+def user_record(fields: Mapping) -> FrozenDict:
+    """A user as a FrozenDict whose role and department strings are shared."""
+    record = FrozenDict(fields)
+    for key in ('role', 'department'):
+        value = record.get(key)
+        if type(value) is str:
+            dict.__setitem__(record, key, sys.intern(value))
+    return record
+
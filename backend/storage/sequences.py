@@ -0,0 +1,114 @@
+import threading
+import weakref
+from typing import Callable, Dict, Optional
+from config import ID_BLOCK_SIZE
+from serialization import loads
+from utils import file_signature, write_json_file
+from storage.locks import InterProcessLock
+
+_allocators: "weakref.WeakSet[SequenceAllocator]" = weakref.WeakSet()
+
+
+def sequence_path(file_path: str) -> str:
+    """Where the id sequence of the table stored at ``file_path`` lives."""
+    return file_path + '.seq'
+
+
+class SequenceAllocator:
+    """Hands out the ids of one table, durably and without scanning it.
+
+    The file at ``path`` holds ``{"max_id": n}``, the highest id any process
+    has reserved. A process reserves ``block_size`` ids at a time under an
+    InterProcessLock and then hands them out from memory, so ``next()`` only
+    touches the file once per block and workers do not queue behind each
+    other for every insert.
+
+    A block is on disk before any of its ids is used, so after a crash the
+    sequence never goes back; the unused rest of the block is skipped.
+    ``release()`` (on shutdown) gives it back if nobody reserved after us.
+    If the file is missing or unreadable, counting resumes after ``floor()``
+    and after the highest id ``observe()`` has seen in the data itself.
+
+    Callers take ids while holding the table's write lock, and a block is
+    only used while it is the latest one reserved: once another process
+    has reserved since (the file changed), the rest of ours is dropped and
+    a new block taken. Every id handed out is then above every id already
+    written by anyone, so ids follow commit order across processes and a
+    keyset page (``after_id``) never skips a record that lands later. A
+    single busy worker still reserves once per block; workers taking turns
+    reserve about once per insert.
+    """
+
+    def __init__(self, path: str, block_size: int = ID_BLOCK_SIZE,
+                 floor: Optional[Callable[[], int]] = None):
+        self.path = path
+        self.block_size = max(1, block_size)
+        self.floor = floor
+        self.file_lock = InterProcessLock(path)
+        self._lock = threading.Lock()
+        # The next id to hand out and the last one of the reserved block
+        self._next = 1
+        self._end = 0
+        self._observed = 0
+        # The file as our last reservation left it
+        self._signature = None
+        self.reservations = 0
+        _allocators.add(self)
+
+    def _read(self) -> Optional[int]:
+        try:
+            with open(self.path, 'rb') as f:
+                return int(loads(f.read())['max_id'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _reserve(self) -> None:
+        with self.file_lock:
+            high = self._read()
+            if high is None:
+                high = self.floor() if self.floor is not None else 0
+            high = max(high, self._observed)
+            write_json_file(self.path, {"max_id": high + self.block_size})
+            self._signature = file_signature(self.path)
+        self._next, self._end = high + 1, high + self.block_size
+        self.reservations += 1
+
+    def next(self) -> int:
+        with self._lock:
+            if self._next > self._end or file_signature(self.path) != self._signature:
+                self._reserve()
+            self._next += 1
+            return self._next - 1
+
+    def observe(self, record_id: int) -> None:
+        """Note the highest id in the data, for when the sequence file is lost.
+
+        Ids within blocks other processes reserved are expected and left
+        alone; only ids beyond the stored sequence (data written by an
+        import, or a file restored without its ``.seq``) move it on.
+        """
+        with self._lock:
+            self._observed = max(self._observed, record_id)
+
+    def release(self) -> None:
+        """Return the unused part of our block, if it is still the latest."""
+        with self._lock:
+            if self._next > self._end:
+                return
+            with self.file_lock:
+                if self._read() == self._end:
+                    write_json_file(self.path, {"max_id": self._next - 1})
+                    self._signature = file_signature(self.path)
+            self._end = self._next - 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "reservations": self.reservations,
+                "remaining": self._end - self._next + 1,
+            }
+
+
+def release_sequences() -> None:
+    for allocator in list(_allocators):
+        allocator.release()
@@ -0,0 +1,333 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from storage.base import (
+    ACTIVE_LEAVE_STATUSES, AttendanceRepository, DuplicateRecordError, LeavesRepository, Repository,
+    UsersRepository
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL,
+    department TEXT
+);
+DROP INDEX IF EXISTS idx_users_email;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_unique ON users (email);
+
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    check_in TEXT,
+    check_out TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_user_date ON attendance (user_id, date);
+CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date);
+
+CREATE TABLE IF NOT EXISTS leaves (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    reason TEXT,
+    status TEXT NOT NULL,
+    created_at TEXT,
+    approved_at TEXT,
+    rejected_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_leaves_status ON leaves (status);
+CREATE INDEX IF NOT EXISTS idx_leaves_user ON leaves (user_id);
+CREATE INDEX IF NOT EXISTS idx_leaves_dates ON leaves (start_date, end_date);
+
+-- A change counter per table, moved by triggers inside the writing
+-- transaction, so every connection in every process sees it move
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+""" + "".join(
+    f"INSERT OR IGNORE INTO table_versions (name, version) VALUES ('{table}', 0);\n" + "".join(
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table}
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+END;
+""" for event in ("INSERT", "UPDATE", "DELETE")
+    )
+    for table in ("users", "attendance", "leaves")
+)
+
+
+class SqliteDatabase:
+    """One SQLite file in WAL mode with a connection per thread.
+
+    Writes go through ``transaction()``, which starts with BEGIN IMMEDIATE:
+    SQLite's write lock is taken before the first read, so a "find, then
+    create" sequence is atomic across worker processes as well as threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def open(self) -> sqlite3.Connection:
+        """A new connection, for work that outlives one call (e.g. streaming)."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(SCHEMA)
+                self._initialized = True
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self.open()
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """This thread's connection inside one write transaction.
+
+        Nested transactions join the outer one, which commits (or rolls
+        back) when it exits.
+        """
+        conn = self.connection()
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                conn.rollback()
+            raise
+        self._local.depth = depth
+        if depth == 0:
+            conn.commit()
+
+
+class SqliteRepository(Repository):
+    table: str = ""
+    columns: Tuple[str, ...] = ()
+    # Reported when a write breaks a UNIQUE index
+    duplicate_detail = "Record already exists"
+    # Columns left out of the record dict when NULL, matching the JSON
+    # files where e.g. ``approved_at`` only exists once a leave is approved
+    optional_columns: Tuple[str, ...] = ()
+
+    def __init__(self, db: SqliteDatabase):
+        self.db = db
+
+    @contextmanager
+    def transaction(self):
+        try:
+            with self.db.transaction():
+                yield self
+        except sqlite3.IntegrityError as e:
+            raise DuplicateRecordError(self.duplicate_detail) from e
+
+    def version(self) -> int:
+        row = self.db.connection().execute(
+            "SELECT version FROM table_versions WHERE name = ?", (self.table,)
+        ).fetchone()
+        return row[0]
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        for column in self.optional_columns:
+            if record.get(column) is None:
+                record.pop(column, None)
+        return record
+
+    def _check_columns(self, fields: Dict[str, Any]) -> List[str]:
+        unknown = set(fields) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown {self.table} columns: {sorted(unknown)}")
+        return list(fields)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        rows = self.db.connection().execute(sql, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def list(self) -> List[Dict[str, Any]]:
+        return self._query(f"SELECT * FROM {self.table} ORDER BY id")
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        rows = self._query(f"SELECT * FROM {self.table} WHERE id = ?", (record_id,))
+        return rows[0] if rows else None
+
+    def _scan(self, after_id: Optional[int], conditions: List[str], params: List[Any]) -> Iterator[Dict[str, Any]]:
+        """Stream matching rows in id order without materializing them all."""
+        conditions, params = list(conditions), list(params)
+        if after_id is not None:
+            conditions.append("id > ?")
+            params.append(after_id)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        conn = self.db.open()
+        try:
+            cursor = conn.execute(f"SELECT * FROM {self.table}{where} ORDER BY id", params)
+            while True:
+                rows = cursor.fetchmany(500)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._to_dict(row)
+        finally:
+            conn.close()
+
+    def scan(self, after_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        return self._scan(after_id, [], [])
+
+    def create(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        columns = self._check_columns(fields)
+        placeholders = ", ".join("?" for _ in columns)
+        with self.transaction():
+            cursor = self.db.connection().execute(
+                f"INSERT INTO {self.table} ({', '.join(columns)}) VALUES ({placeholders})",
+                tuple(fields[c] for c in columns)
+            )
+        return self.get(cursor.lastrowid)
+
+    def insert_many(self, records: List[Dict[str, Any]]) -> None:
+        """Insert or replace records that already carry their ids."""
+        with self.transaction():
+            conn = self.db.connection()
+            for record in records:
+                columns = ['id'] + self._check_columns(
+                    {k: v for k, v in record.items() if k != 'id'}
+                )
+                placeholders = ", ".join("?" for _ in columns)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} ({', '.join(columns)}) VALUES ({placeholders})",
+                    tuple(record.get(c) for c in columns)
+                )
+
+    def update(self, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        columns = self._check_columns(fields)
+        if columns:
+            assignments = ", ".join(f"{c} = ?" for c in columns)
+            with self.transaction():
+                self.db.connection().execute(
+                    f"UPDATE {self.table} SET {assignments} WHERE id = ?",
+                    tuple(fields[c] for c in columns) + (record_id,)
+                )
+        return self.get(record_id)
+
+    def delete(self, record_id: int) -> Optional[Dict[str, Any]]:
+        with self.transaction():
+            record = self.get(record_id)
+            if record is not None:
+                self.db.connection().execute(f"DELETE FROM {self.table} WHERE id = ?", (record_id,))
+        return record
+
+    def delete_many(self, record_ids: Iterable[int]) -> int:
+        record_ids = list(record_ids)
+        removed = 0
+        with self.transaction():
+            conn = self.db.connection()
+            # Batches stay under SQLite's limit on bound parameters
+            for start in range(0, len(record_ids), 500):
+                batch = record_ids[start:start + 500]
+                placeholders = ", ".join("?" for _ in batch)
+                removed += conn.execute(
+                    f"DELETE FROM {self.table} WHERE id IN ({placeholders})", batch
+                ).rowcount
+        return removed
+
+
+class SqliteUsersRepository(SqliteRepository, UsersRepository):
+    table = "users"
+    columns = ("id", "name", "email", "password", "role", "department")
+    duplicate_detail = "Email already exists"
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM users WHERE email = ? LIMIT 1", (email,))
+        return rows[0] if rows else None
+
+
+class SqliteAttendanceRepository(SqliteRepository, AttendanceRepository):
+    table = "attendance"
+    columns = ("id", "user_id", "date", "check_in", "check_out")
+    # The one UNIQUE index is (user_id, date): a second record for the day
+    duplicate_detail = "Already checked in today"
+
+    def find(self, user_id: int, date: str) -> Optional[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT * FROM attendance WHERE user_id = ? AND date = ?", (user_id, date)
+        )
+        return rows[0] if rows else None
+
+    def daily_counts(self, start: date, end: date) -> Dict[date, Tuple[int, int]]:
+        rows = self.db.connection().execute(
+            """
+            SELECT date,
+                   SUM(COALESCE(check_in, '') != '' AND COALESCE(check_out, '') != ''),
+                   SUM(COALESCE(check_in, '') != '')
+            FROM attendance
+            WHERE date BETWEEN ? AND ?
+            GROUP BY date
+            """,
+            (start.isoformat(), end.isoformat())
+        ).fetchall()
+        return {date.fromisoformat(row[0]): (row[1], row[2]) for row in rows}
+
+    def scan(self, after_id: Optional[int] = None, user_id: Optional[int] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        conditions, params = [], []
+        for condition, value in (("user_id = ?", user_id), ("date >= ?", start_date), ("date <= ?", end_date)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        return self._scan(after_id, conditions, params)
+
+
+class SqliteLeavesRepository(SqliteRepository, LeavesRepository):
+    table = "leaves"
+    columns = (
+        "id", "user_id", "start_date", "end_date", "reason", "status",
+        "created_at", "approved_at", "rejected_at"
+    )
+    optional_columns = ("approved_at", "rejected_at")
+
+    def list_by_user(self, user_id: int) -> List[Dict[str, Any]]:
+        return self._query("SELECT * FROM leaves WHERE user_id = ? ORDER BY id", (user_id,))
+
+    def list_by_status(self, status: str) -> List[Dict[str, Any]]:
+        return self._query("SELECT * FROM leaves WHERE status = ? ORDER BY id", (status,))
+
+    def scan(self, after_id: Optional[int] = None, user_id: Optional[int] = None,
+             status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        conditions, params = [], []
+        for condition, value in (("user_id = ?", user_id), ("status = ?", status)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        return self._scan(after_id, conditions, params)
+
+    def overlapping(self, start_date: str, end_date: str,
+                    user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        # The date index bounds the start; the end is checked per row
+        sql = (
+            "SELECT * FROM leaves WHERE status IN (?, ?) AND start_date <= ? "
+            "AND MAX(start_date, end_date) >= ?"
+        )
+        params = [*ACTIVE_LEAVE_STATUSES, end_date, start_date]
+        if user_id is not None:
+            sql += " AND user_id = ?"
+            params.append(user_id)
+        return self._query(sql + " ORDER BY start_date, id", tuple(params))
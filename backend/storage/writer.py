@@ -0,0 +1,67 @@
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+class GroupCommitWriter:
+    """Coalesces the writes of one file into as few disk writes as possible.
+
+    The owner applies a mutation in memory while holding ``lock`` and calls
+    ``submit()`` to get a ticket; once it has released the lock it calls
+    ``wait(ticket)``, which returns when a write containing that mutation
+    is on disk. The first waiter becomes the leader: it lingers ``window``
+    seconds so concurrent mutations can join, takes ``snapshot()`` under
+    ``lock`` and then calls ``write(snapshot)`` once, outside the lock, for
+    all of them. Mutations made during a write go out with the next one.
+    """
+
+    def __init__(self, lock, snapshot: Callable[[], Any], write: Callable[[Any], None],
+                 window: float = 0.002):
+        self.lock = lock
+        self.snapshot = snapshot
+        self.write = write
+        self.window = window
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._durable = 0
+        self._leader = False
+        self.writes = 0
+
+    def submit(self) -> int:
+        """Register a mutation; call with ``lock`` held."""
+        with self._cond:
+            self._submitted += 1
+            return self._submitted
+
+    def wait(self, ticket: int) -> None:
+        """Block until mutation ``ticket`` has been written; call without ``lock``."""
+        with self._cond:
+            while self._durable < ticket:
+                if self._leader:
+                    self._cond.wait()
+                    continue
+                self._leader = True
+                self._cond.release()
+                target, written = 0, False
+                try:
+                    if self.window:
+                        time.sleep(self.window)
+                    with self.lock:
+                        # Everything submitted so far is applied in memory,
+                        # since submit() is only called under the lock
+                        with self._cond:
+                            target = self._submitted
+                        data = self.snapshot()
+                    self.write(data)
+                    written = True
+                finally:
+                    self._cond.acquire()
+                    self._leader = False
+                    if written:
+                        self._durable = max(self._durable, target)
+                        self.writes += 1
+                    self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"mutations": self._submitted, "writes": self.writes}
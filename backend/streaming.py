@@ -0,0 +1,120 @@
+import csv
+import io
+import zlib
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from serialization import FastJSONResponse, dumps
+
+# ?format= values accepted by the listing endpoints
+LISTING_FORMATS = "^(json|stream|ndjson)$"
+MAX_PAGE_SIZE = 10000
+# Page size of listings that must not return a whole table by default
+DEFAULT_PAGE_SIZE = 1000
+CHUNK_RECORDS = 500
+# zlib level for gzip-compressed exports: fast, most of the size win on CSV
+GZIP_LEVEL = 6
+
+
+def json_array_chunks(records: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Encode records as one JSON array, a few hundred records per chunk."""
+    yield b"["
+    first = True
+    batch = []
+    for record in records:
+        batch.append(dumps(record))
+        if len(batch) >= CHUNK_RECORDS:
+            yield (b"" if first else b",") + b",".join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield (b"" if first else b",") + b",".join(batch)
+    yield b"]"
+
+
+def ndjson_chunks(records: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Encode records as newline-delimited JSON, one record per line."""
+    batch = []
+    for record in records:
+        batch.append(dumps(record))
+        if len(batch) >= CHUNK_RECORDS:
+            yield b"\n".join(batch) + b"\n"
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+
+def csv_chunks(header: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """Encode rows as UTF-8 CSV under a header line, a few hundred rows per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\r\n")
+    writer.writerow(header)
+    # The header goes out at once, before the first row is produced
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK_RECORDS:
+            writer.writerows(batch)
+            batch = []
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    writer.writerows(batch)
+    yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a chunk stream into one gzip member as it goes."""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def csv_response(header: Sequence[str], rows: Iterable[Sequence[Any]], filename: str,
+                 compress: bool = False) -> StreamingResponse:
+    """Stream rows from a lazy iterator as a CSV download.
+
+    Rows are encoded as they are produced, so memory stays flat however
+    long the export and the first bytes leave before the iterator is done.
+    ``compress`` sends ``<filename>.gz``, gzip-compressed on the fly.
+    """
+    chunks = csv_chunks(header, rows)
+    media_type = "text/csv"
+    if compress:
+        chunks, media_type, filename = gzip_chunks(chunks), "application/gzip", filename + ".gz"
+    return StreamingResponse(
+        chunks, media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def listing_response(records: Iterable[Dict[str, Any]], limit: Optional[int] = None,
+                     format: str = "json") -> Response:
+    """Turn a lazy record iterator into a listing endpoint's response.
+
+    ``format=json`` returns a plain list as these endpoints always have,
+    encoded directly rather than through FastAPI's validation pass; when a
+    ``limit`` cuts the page short, the id to pass as ``after_id`` for the
+    next page is sent in the ``X-Next-After-Id`` header.
+    ``format=stream`` (a JSON array) and ``format=ndjson`` stream records
+    from the iterator as they are produced, so the full result is never
+    held in memory; the next page starts after the last id received.
+    """
+    if limit is not None:
+        records = islice(records, limit)
+    if format == "ndjson":
+        return StreamingResponse(ndjson_chunks(records), media_type="application/x-ndjson")
+    if format == "stream":
+        return StreamingResponse(json_array_chunks(records), media_type="application/json")
+    page = list(records)
+    headers = {}
+    if limit is not None and len(page) == limit:
+        headers["X-Next-After-Id"] = str(page[-1]['id'])
+    return FastJSONResponse(page, headers=headers)
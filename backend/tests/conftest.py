@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Before any app module reads the configuration
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="attendance-tests-")
+
+import storage
+
+
+@pytest.fixture
+def use_storage(monkeypatch, tmp_path):
+    """Point the storage layer at an empty ``tmp_path`` with a given configuration.
+
+    ``use_storage("sqlite")`` or ``use_storage("json", attendance="partitioned")``;
+    the repositories are rebuilt on first use and dropped afterwards.
+    """
+    def configure(backend: str = "json", attendance: str = "json"):
+        monkeypatch.setattr(storage, "STORAGE_BACKEND", backend)
+        monkeypatch.setattr(storage, "ATTENDANCE_STORAGE", attendance)
+        monkeypatch.setattr(storage, "SQLITE_FILE", str(tmp_path / "attendance.db"))
+        monkeypatch.setattr(storage, "USERS_FILE", str(tmp_path / "users.json"))
+        monkeypatch.setattr(storage, "ATTENDANCE_FILE", str(tmp_path / "attendance.json"))
+        monkeypatch.setattr(storage, "LEAVES_FILE", str(tmp_path / "leaves.json"))
+        monkeypatch.setattr(storage, "ATTENDANCE_LOG_FILE", str(tmp_path / "attendance.log"))
+        monkeypatch.setattr(storage, "ATTENDANCE_PARTITION_DIR", str(tmp_path / "attendance"))
+        storage._repositories.clear()
+        return storage
+
+    yield configure
+    storage._repositories.clear()
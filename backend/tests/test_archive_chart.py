@@ -0,0 +1,124 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from starlette.requests import Request
+
+import storage
+from response_cache import ResponseCache
+from serialization import dumps, loads
+from storage.archive import AttendanceArchive
+
+DAYS = 75
+
+
+@pytest.fixture
+def chart(use_storage, monkeypatch, tmp_path):
+    use_storage("json")
+    monkeypatch.setattr(storage, "_archive", AttendanceArchive(str(tmp_path / "archive")))
+    from routes import dashboard
+    monkeypatch.setattr(dashboard, "response_cache", ResponseCache(1 << 20))
+
+    def get():
+        request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+        response = dashboard.get_attendance_chart(request, days=DAYS, current_user={"id": 1, "role": "admin"})
+        return loads(response.body)
+
+    return get
+
+
+def _seed(attendance, first, last):
+    day = first
+    while day <= last:
+        for user_id in range(1, 6):
+            if (day.toordinal() + user_id) % 4:
+                attendance.create({
+                    "user_id": user_id, "date": day.isoformat(), "check_in": f"{day}T09:00:00",
+                    "check_out": f"{day}T17:00:00" if (day.toordinal() + user_id) % 3 else None,
+                })
+        day += timedelta(days=1)
+
+
+def _cutoff():
+    return date.today().replace(day=1).isoformat()
+
+
+def test_chart_is_unchanged_by_archiving(chart):
+    attendance, archive = storage.get_attendance_repository(), storage.get_attendance_archive()
+    _seed(attendance, date.today() - timedelta(days=DAYS + 5), date.today())
+    before = chart()
+    assert archive.archive(attendance, _cutoff())
+    assert all(r['date'] >= _cutoff() for r in attendance.list())
+    assert chart() == before
+
+
+def test_late_rows_in_an_archived_month_add_up(chart):
+    attendance, archive = storage.get_attendance_repository(), storage.get_attendance_archive()
+    first = date.today() - timedelta(days=DAYS - 1)
+    _seed(attendance, first, date.today())
+    archive.archive(attendance, _cutoff())
+    late = date.fromisoformat(_cutoff()) - timedelta(days=1)
+    attendance.create({"user_id": 9, "date": late.isoformat(), "check_in": f"{late}T09:00:00", "check_out": None})
+    before = chart()
+    # Archiving the late row again merges it into the stored day counts
+    archive.archive(attendance, _cutoff())
+    assert chart() == before
+    assert next(d for d in before if d['date'] == late.isoformat())['checked_in'] == \
+        sum((late.toordinal() + u) % 4 != 0 for u in range(1, 6)) + 1
+
+
+def test_archives_without_day_counts_are_read_from_their_segments(chart):
+    attendance, archive = storage.get_attendance_repository(), storage.get_attendance_archive()
+    _seed(attendance, date.today() - timedelta(days=DAYS + 5), date.today())
+    before = chart()
+    archive.archive(attendance, _cutoff())
+    # As an archive run before per-day counts were kept left it
+    manifest = dict(archive.manifest())
+    del manifest['days']
+    with open(archive.manifest_path, 'wb') as f:
+        f.write(dumps(manifest))
+    assert chart() == before
+
+
+def test_reset_clears_the_archive(chart, monkeypatch):
+    import init_data
+    from routes import dashboard, export
+    attendance, archive = storage.get_attendance_repository(), storage.get_attendance_archive()
+    for name in ("USERS_FILE", "ATTENDANCE_FILE", "LEAVES_FILE", "ATTENDANCE_LOG_FILE", "ATTENDANCE_PARTITION_DIR"):
+        monkeypatch.setattr(init_data, name, getattr(storage, name))
+    monkeypatch.setattr(init_data, "ATTENDANCE_ARCHIVE_DIR", archive.directory)
+    _seed(attendance, date.today() - timedelta(days=DAYS + 5), date.today())
+    archive.archive(attendance, _cutoff())
+    assert init_data.initialize_data(reset=True)
+
+    assert all(day['present'] == day['checked_in'] == 0 for day in chart())
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    admin = {"id": 1, "role": "admin"}
+    performance = loads(dashboard.get_employee_performance(request, current_user=admin).body)
+    assert performance and all(row['total_attendance_records'] == 0 for row in performance)
+    response = export.export_attendance(month=None, start_date=None, end_date=None, department=None,
+                                         user_id=None, gzip=False, current_user=admin)
+
+    async def body():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    assert asyncio.run(body()).decode().strip().splitlines() == [",".join(export.ATTENDANCE_COLUMNS)]
+
+
+def test_archived_days_are_not_counted_twice(chart):
+    from routes.attendance import SwipeBatch, batch_swipes
+    attendance, archive = storage.get_attendance_repository(), storage.get_attendance_archive()
+    _seed(attendance, date.today() - timedelta(days=DAYS + 5), date.today())
+    archive.archive(attendance, _cutoff())
+    archived = next(iter(archive.scan()))
+    before = archive.user_totals()[archived['user_id']]
+
+    swipe = {"user_id": archived['user_id'], "action": "check_in", "timestamp": f"{archived['date']}T10:00:00"}
+    result = batch_swipes(SwipeBatch(events=[swipe]), current_user={"id": 1, "role": "admin"})
+    assert result["results"][0]["status"] == "archived" and result["applied"] == 0
+
+    # A row on an archived day that got into the hot store some other way
+    attendance.create({**{k: v for k, v in archived.items() if k != 'id'}})
+    archive.archive(attendance, _cutoff())
+    records, present, days = archive.user_totals()[archived['user_id']]
+    assert (records, days) == (before[0] + 1, before[2])
@@ -0,0 +1,23 @@
+import pytest
+
+MODES = [("json", "json"), ("json", "log"), ("json", "partitioned"), ("sqlite", "json")]
+
+
+@pytest.mark.parametrize("backend,attendance", MODES)
+def test_delete_removes_one_record_and_persists(use_storage, backend, attendance):
+    storage = use_storage(backend, attendance)
+    repository = storage.get_attendance_repository()
+    records = [
+        repository.create({"user_id": user_id, "date": "2026-03-02",
+                           "check_in": "2026-03-02T09:00:00", "check_out": None})
+        for user_id in (1, 2, 3)
+    ]
+    removed = repository.delete(records[1]['id'])
+    assert removed is not None and removed['user_id'] == 2
+    assert repository.get(records[1]['id']) is None
+    assert repository.find(2, "2026-03-02") is None
+    assert repository.delete(records[1]['id']) is None
+
+    # A fresh repository reads the deletion back from disk
+    storage = use_storage(backend, attendance)
+    assert [r['user_id'] for r in storage.get_attendance_repository().list()] == [1, 3]
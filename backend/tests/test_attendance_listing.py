@@ -0,0 +1,36 @@
+import pytest
+
+from serialization import loads
+
+
+@pytest.fixture
+def listing(use_storage, monkeypatch):
+    storage = use_storage("json")
+    from routes import attendance as routes
+    monkeypatch.setattr(routes, "DEFAULT_PAGE_SIZE", 4)
+    records = storage.get_attendance_repository()
+    for day in range(1, 11):
+        records.create({"user_id": 1 + day % 2, "date": f"2026-03-{day:02d}", "check_in": "t", "check_out": None})
+
+    def get(**params):
+        params = {"limit": None, "after_id": None, "user_id": None, "start_date": None,
+                  "end_date": None, "format": "json", **params}
+        response = routes.get_all_attendance(**params, current_user={"id": 1, "role": "admin"})
+        return response.headers.get("X-Next-After-Id"), response
+
+    return get
+
+
+def test_unfiltered_listing_is_paged_by_default(listing):
+    cursor, response = listing()
+    assert [r['id'] for r in loads(response.body)] == [1, 2, 3, 4]
+    assert cursor == "4"
+    cursor, response = listing(after_id=int(cursor))
+    assert [r['id'] for r in loads(response.body)] == [5, 6, 7, 8]
+
+
+def test_filtered_and_explicit_listings_keep_their_size(listing):
+    cursor, response = listing(user_id=1)
+    assert len(loads(response.body)) == 5 and cursor is None
+    cursor, response = listing(limit=6)
+    assert len(loads(response.body)) == 6 and cursor == "6"
@@ -0,0 +1,82 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import storage
+from authentication import get_current_user
+from events import ATTENDANCE_BATCH
+from storage.archive import AttendanceArchive
+
+ADMIN = {"id": 1, "role": "admin"}
+MODES = [("json", "json"), ("json", "log"), ("json", "partitioned"), ("sqlite", "json")]
+
+
+@pytest.fixture
+def swipe(use_storage, monkeypatch, tmp_path, request):
+    use_storage(*request.param)
+    monkeypatch.setattr(storage, "_archive", AttendanceArchive(str(tmp_path / "archive")))
+    from routes import attendance as routes
+    published = []
+    monkeypatch.setattr(routes, "publish", lambda kind, data: published.append((kind, data)))
+
+    def post(*events):
+        batch = routes.SwipeBatch(events=[
+            {"user_id": user_id, "action": action, "timestamp": f"2026-03-02T{time}"}
+            for user_id, action, time in events
+        ])
+        return routes.batch_swipes(batch, current_user=ADMIN)
+
+    post.published = published
+    return post
+
+
+@pytest.mark.parametrize("swipe", MODES, indirect=True)
+def test_results_come_back_in_request_order(swipe):
+    result = swipe(
+        (1, "check_out", "17:00:00"),  # buffered ahead of its check-in
+        (2, "check_in", "09:30:00"),
+        (1, "check_in", "09:00:00"),
+        (2, "check_in", "09:45:00"),   # a second check-in the same day
+        (3, "check_out", "17:00:00"),
+    )
+    assert [(r['user_id'], r['action'], r['status']) for r in result['results']] == [
+        (1, "check_out", "applied"),
+        (2, "check_in", "applied"),
+        (1, "check_in", "applied"),
+        (2, "check_in", "duplicate"),
+        (3, "check_out", "must_check_in_first"),
+    ]
+    assert result['applied'] == 3
+
+    record = storage.get_attendance_repository().find(1, "2026-03-02")
+    assert (record['check_in'], record['check_out']) == ("2026-03-02T09:00:00", "2026-03-02T17:00:00")
+    assert storage.get_attendance_repository().find(2, "2026-03-02")['check_in'] == "2026-03-02T09:30:00"
+
+
+@pytest.mark.parametrize("swipe", MODES[:1], indirect=True)
+def test_a_batch_publishes_one_event(swipe):
+    swipe((1, "check_in", "09:00:00"), (1, "check_out", "17:00:00"), (2, "check_in", "09:00:00"))
+    assert len(swipe.published) == 1
+    kind, data = swipe.published[0]
+    records = storage.get_attendance_repository().list()
+    # The check-in and check-out of user 1 leave one, final, record
+    assert kind == ATTENDANCE_BATCH and data['ids'] == [r['id'] for r in records]
+    assert data['records'] == records
+
+    # A batch that changes nothing publishes nothing
+    swipe((1, "check_in", "10:00:00"))
+    assert len(swipe.published) == 1
+
+
+def test_oversized_batches_are_rejected(use_storage):
+    use_storage("json")
+    from routes.attendance import MAX_BATCH_SIZE, router
+    app = FastAPI()
+    app.include_router(router, prefix="/api/attendance")
+    app.dependency_overrides[get_current_user] = lambda: ADMIN
+    client = TestClient(app)
+    event = {"user_id": 1, "action": "check_in", "timestamp": "2026-03-02T09:00:00"}
+
+    assert client.post("/api/attendance/batch", json={"events": [event] * (MAX_BATCH_SIZE + 1)}).status_code == 422
+    assert storage.get_attendance_repository().list() == []
+    assert client.post("/api/attendance/batch", json={"events": [event] * MAX_BATCH_SIZE}).status_code == 200
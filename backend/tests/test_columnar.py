@@ -0,0 +1,67 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import analytics.columnar as columnar
+
+
+def _data():
+    rng = random.Random(7)
+    users = [
+        {"id": i, "name": f"User {i}", "email": f"u{i}@example.com", "department": "D",
+         "role": "admin" if i == 1 else "employee"}
+        for i in range(1, 41)
+    ]
+    attendance = []
+    for offset in range(70):
+        day = (date(2026, 1, 1) + timedelta(days=offset)).isoformat()
+        for user in rng.sample(users, 25):
+            attendance.append({
+                "id": len(attendance) + 1, "user_id": user['id'], "date": day,
+                "check_in": f"{day}T09:00:00" if rng.random() < 0.95 else None,
+                "check_out": f"{day}T17:00:00" if rng.random() < 0.8 else None,
+            })
+    leaves = [
+        {"id": i + 1, "user_id": rng.choice(users)['id'],
+         "status": rng.choice(["pending", "approved", "rejected", "unknown"])}
+        for i in range(60)
+    ]
+    # Archived months, as storage/archive.py reports them
+    performance_archive = {user['id']: (20, 15, 20) for user in users[::3]}
+    month_archive = {user['id']: (18, 17, 12) for user in users[::4]}
+    return users, attendance, leaves, performance_archive, month_archive
+
+
+def _payloads(monkeypatch, numpy_module):
+    monkeypatch.setattr(columnar, "np", numpy_module)
+    users, attendance, leaves, performance_archive, month_archive = _data()
+    attendance_cols = columnar.AttendanceColumns(attendance)
+    leave_cols = columnar.LeaveColumns(leaves)
+    assert attendance_cols.numeric == leave_cols.numeric == (numpy_module is not None)
+    payloads = [columnar.employee_performance(users, attendance_cols, leave_cols)]
+    payloads.append(columnar.employee_performance(users, attendance_cols, leave_cols, performance_archive))
+    for year, month in ((2026, 1), (2026, 3), (2025, 12), (2026, 13)):
+        payloads.append(columnar.monthly_report(users, attendance_cols, month, year))
+        payloads.append(columnar.monthly_report(users, attendance_cols, month, year, month_archive))
+    return payloads
+
+
+def test_numpy_and_pure_python_paths_agree(monkeypatch):
+    numpy_module = pytest.importorskip("numpy")
+    assert _payloads(monkeypatch, numpy_module) == _payloads(monkeypatch, None)
+
+
+def test_pure_python_path_counts(monkeypatch):
+    monkeypatch.setattr(columnar, "np", None)
+    users, attendance, leaves, _, _ = _data()
+    performance = columnar.employee_performance(
+        users, columnar.AttendanceColumns(attendance), columnar.LeaveColumns(leaves)
+    )
+    for row in performance:
+        mine = [a for a in attendance if a['user_id'] == row['user_id']]
+        assert row['total_attendance_records'] == len(mine)
+        assert row['present_days'] == sum(bool(a['check_in'] and a['check_out']) for a in mine)
+        assert row['approved_leaves'] == sum(
+            l['user_id'] == row['user_id'] and l['status'] == 'approved' for l in leaves
+        )
@@ -0,0 +1,23 @@
+import pytest
+from fastapi import HTTPException
+
+
+def _export(month):
+    from routes.export import export_attendance
+    return export_attendance(month=month, start_date=None, end_date=None, department=None,
+                             user_id=None, gzip=False, current_user={"id": 1, "role": "admin"})
+
+
+@pytest.mark.parametrize("month", ["2026-03", "2026-3", " 2026-03", "+2026-03"])
+def test_month_export_is_named_from_the_parsed_month(use_storage, month):
+    use_storage("json")
+    response = _export(month)
+    assert response.headers["Content-Disposition"] == 'attachment; filename="attendance-2026-03.csv"'
+
+
+@pytest.mark.parametrize("month", ["2026-13", "2026", "March"])
+def test_invalid_months_are_refused(use_storage, month):
+    use_storage("json")
+    with pytest.raises(HTTPException) as error:
+        _export(month)
+    assert error.value.status_code == 400
@@ -0,0 +1,157 @@
+import random
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from storage.base import ACTIVE_LEAVE_STATUSES, leave_dates
+from utils import read_json_file
+
+USER_IDS = range(1, 9)
+DAYS = [f"2026-01-{day:02d}" for day in range(1, 11)]
+
+
+def _by_id(records):
+    return sorted((dict(r) for r in records), key=lambda r: r['id'])
+
+
+def _check_on_disk(repository):
+    on_disk = read_json_file(repository.file_path)
+    assert repository.list() == on_disk
+    assert repository.indexes.verify(on_disk)
+
+
+@pytest.fixture
+def json_storage(use_storage):
+    return use_storage("json")
+
+
+def test_users_email_index_matches_a_scan(json_storage):
+    users = json_storage.get_users_repository()
+    rng = random.Random(1)
+    emails = [f"u{i}@example.com" for i in range(12)]
+    for _ in range(200):
+        ids = [u['id'] for u in users.list()]
+        choice = rng.random()
+        if choice < 0.4 or not ids:
+            email = rng.choice(emails)
+            if users.get_by_email(email) is None:
+                users.create({"name": "u", "email": email, "password": "x", "role": "employee", "department": "D"})
+        elif choice < 0.7:
+            email = rng.choice(emails)
+            if users.get_by_email(email) is None:
+                users.update(rng.choice(ids), {"email": email})
+        else:
+            users.delete(rng.choice(ids))
+
+        records = users.list()
+        for email in emails:
+            expected = next((u for u in records if u['email'] == email), None)
+            assert users.get_by_email(email) == expected, email
+        for record in records:
+            assert users.get(record['id']) == record
+        _check_on_disk(users)
+
+
+def test_attendance_indexes_match_a_scan(json_storage):
+    attendance = json_storage.get_attendance_repository()
+    rng = random.Random(2)
+    for _ in range(300):
+        ids = [a['id'] for a in attendance.list()]
+        user_id, day = rng.choice(USER_IDS), rng.choice(DAYS)
+        choice = rng.random()
+        if choice < 0.5 or not ids:
+            existing = attendance.find(user_id, day)
+            if existing is None:
+                attendance.create({"user_id": user_id, "date": day, "check_in": f"{day}T09:00:00", "check_out": None})
+            elif not existing.get('check_out'):
+                attendance.update(existing['id'], {"check_out": f"{day}T17:00:00"})
+        elif choice < 0.65:
+            attendance.update(rng.choice(ids), {"check_in": None, "check_out": None})
+        elif choice < 0.9:
+            attendance.delete(rng.choice(ids))
+        else:
+            attendance.delete_many(rng.sample(ids, min(3, len(ids))))
+
+        records = attendance.list()
+        for user_id in USER_IDS:
+            mine = [a for a in records if a['user_id'] == user_id]
+            assert _by_id(attendance.scan(user_id=user_id)) == _by_id(mine)
+            for day in DAYS:
+                expected = next((a for a in mine if a['date'] == day), None)
+                assert attendance.find(user_id, day) == expected, (user_id, day)
+
+        start, end = date(2026, 1, 1), date(2026, 1, 10)
+        expected_counts = {}
+        for offset in range((end - start).days + 1):
+            day = (start + timedelta(days=offset)).isoformat()
+            today = [a for a in records if a['date'] == day]
+            present = sum(bool(a.get('check_in')) and bool(a.get('check_out')) for a in today)
+            checked_in = sum(bool(a.get('check_in')) for a in today)
+            if present or checked_in:
+                expected_counts[start + timedelta(days=offset)] = (present, checked_in)
+        counts = {d: c for d, c in attendance.daily_counts(start, end).items() if c != (0, 0)}
+        assert counts == expected_counts
+        _check_on_disk(attendance)
+
+
+def test_leaves_indexes_match_a_scan(json_storage):
+    leaves = json_storage.get_leaves_repository()
+    rng = random.Random(3)
+    statuses = ("pending", "approved", "rejected")
+    for _ in range(300):
+        ids = [l['id'] for l in leaves.list()]
+        choice = rng.random()
+        if choice < 0.45 or not ids:
+            start = date(2026, 2, 1) + timedelta(days=rng.randrange(20))
+            end = start + timedelta(days=rng.randrange(-1, 6))
+            leaves.create({
+                "user_id": rng.choice(USER_IDS), "start_date": start.isoformat(), "end_date": end.isoformat(),
+                "reason": "r", "status": "pending", "created_at": "2026-01-01T09:00:00"
+            })
+        elif choice < 0.8:
+            leaves.update(rng.choice(ids), {"status": rng.choice(statuses)})
+        else:
+            leaves.delete(rng.choice(ids))
+
+        records = leaves.list()
+        for user_id in USER_IDS:
+            assert _by_id(leaves.list_by_user(user_id)) == _by_id(l for l in records if l['user_id'] == user_id)
+        for status in statuses:
+            assert _by_id(leaves.list_by_status(status)) == _by_id(l for l in records if l['status'] == status)
+        for _ in range(5):
+            start = date(2026, 1, 28) + timedelta(days=rng.randrange(30))
+            end = (start + timedelta(days=rng.randrange(7))).isoformat()
+            start = start.isoformat()
+            expected = sorted(
+                (l for l in records
+                 if l['status'] in ACTIVE_LEAVE_STATUSES
+                 and leave_dates(l)[0] <= end and leave_dates(l)[1] >= start),
+                key=lambda l: (l['start_date'], l['id'])
+            )
+            assert leaves.overlapping(start, end) == expected, (start, end)
+        _check_on_disk(leaves)
+
+
+def test_daily_counts_see_writes_to_memoized_past_days(json_storage):
+    attendance = json_storage.get_attendance_repository()
+    start, end = date(2026, 1, 1), date(2026, 1, 10)
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            attendance.daily_counts(start, end)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    try:
+        for n in range(200):
+            day = DAYS[n % len(DAYS)]
+            attendance.create({"user_id": n, "date": day, "check_in": f"{day}T09:00:00", "check_out": None})
+            # Each write to a past day must show in the next read, memo or not
+            assert attendance.daily_counts(start, end)[date.fromisoformat(day)][1] == n // len(DAYS) + 1
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
@@ -0,0 +1,42 @@
+from storage.base import LeavesRepository
+
+LEAVES = [
+    # user, start, end, status
+    (1, "2026-03-01", "2026-03-05", "approved"),
+    (1, "2026-03-10", "2026-03-10", "pending"),
+    (2, "2026-02-25", "2026-03-02", "rejected"),
+    (2, "2026-03-04", "2026-03-01", "approved"),  # ends before it starts
+    (3, "2026-02-01", "2026-04-30", "pending"),
+    (3, "2026-05-01", "2026-05-02", "approved"),
+]
+RANGES = [
+    ("2026-03-01", "2026-03-01"), ("2026-03-04", "2026-03-04"), ("2026-03-06", "2026-03-09"),
+    ("2026-01-01", "2026-12-31"), ("2026-05-02", "2026-05-09"), ("2025-01-01", "2025-01-31"),
+]
+
+
+def _seed(leaves):
+    for user_id, start, end, status in LEAVES:
+        leaves.create({
+            "user_id": user_id, "start_date": start, "end_date": end, "reason": "r",
+            "status": status, "created_at": "2026-01-01T09:00:00",
+        })
+
+
+def test_sqlite_leaves_answer_overlaps_with_a_query(use_storage):
+    leaves = use_storage("sqlite").get_leaves_repository()
+    assert type(leaves).overlapping is not LeavesRepository.overlapping
+    _seed(leaves)
+    for start, end in RANGES:
+        for user_id in (None, 1, 2, 3):
+            expected = LeavesRepository.overlapping(leaves, start, end, user_id)
+            assert leaves.overlapping(start, end, user_id=user_id) == expected, (start, end, user_id)
+
+
+def test_backends_agree_on_overlaps(use_storage):
+    json_leaves = use_storage("json").get_leaves_repository()
+    _seed(json_leaves)
+    json_answers = [[l['id'] for l in json_leaves.overlapping(s, e)] for s, e in RANGES]
+    sqlite_leaves = use_storage("sqlite").get_leaves_repository()
+    _seed(sqlite_leaves)
+    assert [[l['id'] for l in sqlite_leaves.overlapping(s, e)] for s, e in RANGES] == json_answers
@@ -0,0 +1,37 @@
+from storage.partitioned import PartitionedAttendanceRepository
+
+
+def _repository(tmp_path, months=5, max_loaded=2):
+    repository = PartitionedAttendanceRepository(str(tmp_path / "attendance"), max_loaded)
+    for month in range(1, months + 1):
+        for user_id in (1, 2):
+            repository.create({"user_id": user_id, "date": f"2025-{month:02d}-03",
+                               "check_in": f"2025-{month:02d}-03T09:00:00", "check_out": None})
+    return repository
+
+
+def test_reading_every_month_does_not_change_the_version(tmp_path):
+    repository = _repository(tmp_path)
+    version = repository.version()
+    # More months than fit in memory: each full read evicts and reloads them
+    for _ in range(3):
+        assert len(repository.list()) == 10
+        assert repository.version() == version
+
+
+def test_writes_change_the_version(tmp_path):
+    repository = _repository(tmp_path)
+    version = repository.version()
+    record = repository.create({"user_id": 3, "date": "2025-02-04", "check_in": None, "check_out": None})
+    assert repository.version() != version
+    version = repository.version()
+    repository.update(record['id'], {"check_in": "2025-02-04T09:00:00"})
+    assert repository.version() != version
+
+
+def test_another_process_writing_changes_the_version(tmp_path):
+    repository = _repository(tmp_path)
+    version = repository.version()
+    other = PartitionedAttendanceRepository(repository.directory, 2)
+    other.create({"user_id": 4, "date": "2025-01-05", "check_in": None, "check_out": None})
+    assert repository.version() != version
@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+from starlette.requests import Request
+
+from response_cache import ResponseCache
+from storage.sqlite_store import SqliteAttendanceRepository, SqliteDatabase
+
+ADMIN = {"id": 1, "role": "admin"}
+
+
+def _get(dashboard, etag=None):
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+    return dashboard.get_attendance_chart(request, days=7, current_user=ADMIN)
+
+
+@pytest.mark.parametrize("backend, attendance", [("sqlite", "json"), ("json", "json"), ("json", "partitioned")])
+def test_dashboard_answers_304_until_the_data_changes(use_storage, monkeypatch, backend, attendance):
+    storage = use_storage(backend, attendance)
+    from routes import dashboard
+    monkeypatch.setattr(dashboard, "response_cache", ResponseCache(1 << 20))
+    storage.get_users_repository().create(
+        {"name": "A", "email": "a@example.com", "password": "x", "role": "employee", "department": "D"}
+    )
+
+    first = _get(dashboard)
+    etag = first.headers.get("ETag")
+    assert first.status_code == 200 and etag
+    assert _get(dashboard, etag).status_code == 304
+
+    storage.get_attendance_repository().create(
+        {"user_id": 1, "date": date.today().isoformat(), "check_in": "t", "check_out": None}
+    )
+    changed = _get(dashboard, etag)
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+
+def test_sqlite_versions_see_other_connections(tmp_path):
+    path = str(tmp_path / "attendance.db")
+    mine, theirs = SqliteAttendanceRepository(SqliteDatabase(path)), SqliteAttendanceRepository(SqliteDatabase(path))
+    before = mine.version()
+    theirs.create({"user_id": 1, "date": "2026-03-02", "check_in": "t", "check_out": None})
+    assert mine.version() != before
+    unchanged = mine.version()
+    # A rolled-back write leaves the version where it was
+    with pytest.raises(RuntimeError):
+        with theirs.transaction():
+            theirs.update(1, {"check_out": "t"})
+            raise RuntimeError
+    assert mine.version() == unchanged
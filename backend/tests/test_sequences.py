@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from storage.json_store import JsonAttendanceRepository
+from storage.sequences import SequenceAllocator
+
+
+def test_a_block_is_dropped_once_another_worker_reserves(tmp_path):
+    path = str(tmp_path / "table.seq")
+    first, second = SequenceAllocator(path, 32), SequenceAllocator(path, 32)
+    assert first.next() == 1
+    assert second.next() == 33
+    # The rest of 1-32 would sort before 33, which is already handed out
+    assert first.next() == 65
+    assert first.next() == 66
+    assert first.stats() == {"reservations": 2, "remaining": 30}
+
+
+def test_ids_follow_write_order_across_workers(tmp_path):
+    # Two repositories on one file stand in for two worker processes
+    path = str(tmp_path / "attendance.json")
+    workers = [JsonAttendanceRepository(path), JsonAttendanceRepository(path)]
+    written = []
+    for n in range(20):
+        worker = workers[(n // 3) % 2]
+        written.append(worker.create({"user_id": n, "date": "2026-03-02", "check_in": "t", "check_out": None}))
+        ids = [r['id'] for r in workers[0].scan()]
+        # A reader that paged up to the last id has seen every record
+        assert ids == sorted(ids) and ids[-1] == written[-1]['id']
+    assert [r['user_id'] for r in workers[1].scan()] == list(range(20))
+
+
+def _append(backend, attendance, directory, worker, count):
+    # A fresh interpreter: point the storage layer at the test's files
+    import storage
+    storage.STORAGE_BACKEND, storage.ATTENDANCE_STORAGE = backend, attendance
+    storage.SQLITE_FILE = os.path.join(directory, "attendance.db")
+    storage.ATTENDANCE_FILE = os.path.join(directory, "attendance.json")
+    storage.ATTENDANCE_LOG_FILE = os.path.join(directory, "attendance.log")
+    storage.ATTENDANCE_PARTITION_DIR = os.path.join(directory, "attendance")
+    repository = storage.get_attendance_repository()
+    return [
+        repository.create({"user_id": worker, "date": f"2026-02-{n + 1:02d}", "check_in": "t", "check_out": None})['id']
+        for n in range(count)
+    ]
+
+
+@pytest.mark.parametrize("backend,attendance", [("json", "json"), ("json", "log"), ("json", "partitioned"), ("sqlite", "json")])
+def test_concurrent_processes_get_unique_ids(use_storage, tmp_path, backend, attendance):
+    # One check-in per worker per day of the month: SQLite enforces (user_id, date)
+    workers, count = 3, 28
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = list(pool.map(_append, *zip(*[(backend, attendance, str(tmp_path), w, count) for w in range(workers)])))
+
+    ids = [record_id for result in results for record_id in result]
+    assert len(set(ids)) == workers * count
+    records = use_storage(backend, attendance).get_attendance_repository().list()
+    assert sorted(r['id'] for r in records) == sorted(ids)
+    for worker, result in enumerate(results):
+        # Each process's own ids still increase
+        assert result == sorted(result)
+        assert sum(r['user_id'] == worker for r in records) == count
@@ -0,0 +1,73 @@
+import multiprocessing
+import time
+
+import pytest
+
+from storage.base import DuplicateRecordError
+from storage.sqlite_store import SqliteAttendanceRepository, SqliteDatabase, SqliteUsersRepository
+
+
+def _check_in(path, started, results):
+    attendance = SqliteAttendanceRepository(SqliteDatabase(path))
+    started.wait()
+    with attendance.transaction():
+        existing = attendance.find(7, "2026-03-02")
+        # Leave the other process time to run the same check
+        time.sleep(0.2)
+        if existing is None:
+            attendance.create({"user_id": 7, "date": "2026-03-02",
+                               "check_in": "2026-03-02T09:00:00", "check_out": None})
+    results.put("created" if existing is None else "found")
+
+
+def test_check_in_is_atomic_across_processes(tmp_path):
+    path = str(tmp_path / "attendance.db")
+    SqliteDatabase(path).open().close()
+    context = multiprocessing.get_context("fork")
+    started, results = context.Event(), context.Queue()
+    workers = [context.Process(target=_check_in, args=(path, started, results)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    started.set()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+    assert sorted(results.get() for _ in workers) == ["created", "found"]
+    assert len(SqliteAttendanceRepository(SqliteDatabase(path)).list()) == 1
+
+
+def test_unique_violations_become_duplicate_record_errors(tmp_path):
+    db = SqliteDatabase(str(tmp_path / "attendance.db"))
+    users = SqliteUsersRepository(db)
+    fields = {"name": "A", "email": "a@example.com", "password": "x", "role": "employee", "department": "D"}
+    users.create(fields)
+    with pytest.raises(DuplicateRecordError, match="Email already exists"):
+        users.create({**fields, "name": "B"})
+    attendance = SqliteAttendanceRepository(db)
+    record = {"user_id": 1, "date": "2026-03-02", "check_in": None, "check_out": None}
+    attendance.create(record)
+    with pytest.raises(DuplicateRecordError, match="Already checked in today"):
+        attendance.create(record)
+    # The failed writes were rolled back and the connection is usable
+    assert len(users.list()) == 1 and len(attendance.list()) == 1
+
+
+def test_nested_transactions_commit_once(tmp_path):
+    db = SqliteDatabase(str(tmp_path / "attendance.db"))
+    attendance = SqliteAttendanceRepository(db)
+    with pytest.raises(RuntimeError):
+        with attendance.transaction():
+            attendance.create({"user_id": 1, "date": "2026-03-02", "check_in": None, "check_out": None})
+            raise RuntimeError("abort")
+    assert attendance.list() == []
+    with attendance.transaction():
+        attendance.create({"user_id": 1, "date": "2026-03-02", "check_in": None, "check_out": None})
+        attendance.create({"user_id": 2, "date": "2026-03-02", "check_in": None, "check_out": None})
+    assert len(attendance.list()) == 2
+
+
+def test_duplicates_reach_the_client_as_400():
+    import main
+    response = main.duplicate_record(None, DuplicateRecordError("Email already exists"))
+    assert response.status_code == 400
+    assert response.body == b'{"detail":"Email already exists"}'
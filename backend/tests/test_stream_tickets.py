@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from authentication import create_stream_ticket, get_current_user, get_stream_user
+from utils import create_access_token
+
+
+def _status(call):
+    with pytest.raises(HTTPException) as error:
+        call()
+    return error.value.status_code
+
+
+def test_only_stream_tickets_are_taken_from_the_url(use_storage):
+    storage = use_storage("json")
+    user = storage.get_users_repository().create(
+        {"name": "A", "email": "a@example.com", "password": "x", "role": "admin", "department": "D"}
+    )
+    from routes.events import get_stream_ticket
+    access = create_access_token({"sub": user['email'], "user_id": user['id']})
+    ticket = get_stream_ticket(current_user=get_current_user(f"Bearer {access}"))['token']
+
+    assert get_stream_user(authorization=None, token=ticket)['id'] == user['id']
+    assert get_stream_user(authorization=f"Bearer {access}", token=None)['id'] == user['id']
+    # The access token is not accepted in the URL, nor the ticket as a bearer token
+    assert _status(lambda: get_stream_user(authorization=None, token=access)) == 401
+    assert _status(lambda: get_current_user(f"Bearer {ticket}")) == 401
+
+    expired = create_access_token({"sub": user['email'], "user_id": user['id'], "scope": "stream"},
+                                  expires_delta=timedelta(seconds=-1))
+    assert _status(lambda: get_stream_user(authorization=None, token=expired)) == 401
+    assert create_stream_ticket(user) != access
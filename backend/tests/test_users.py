@@ -0,0 +1,22 @@
+import pytest
+from fastapi import HTTPException
+
+ADMIN = {"id": 99, "role": "admin"}
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_missing_users_are_404_not_500(use_storage, backend):
+    storage = use_storage(backend)
+    from routes.users import UserUpdate, delete_user, update_user
+    users = storage.get_users_repository()
+    user = users.create({"name": "A", "email": "a@example.com", "password": "x", "role": "employee", "department": "D"})
+    change = UserUpdate(name="B", email="b@example.com", role="employee", department="D")
+
+    assert delete_user(user['id'], current_user=ADMIN)['id'] == user['id']
+    # As a request that looked the user up before the delete landed would see it
+    for call in (lambda: update_user(user['id'], change, current_user=ADMIN),
+                 lambda: delete_user(user['id'], current_user=ADMIN)):
+        with pytest.raises(HTTPException) as error:
+            call()
+        assert error.value.status_code == 404
+    assert users.get_by_email("b@example.com") is None
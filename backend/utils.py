@@ -1,10 +1,22 @@
-import json
+import gc
 import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from config import SECRET_KEY, ALGORITHM
+from config import SECRET_KEY, ALGORITHM, DATA_DIR, JSON_CACHE_MAX_BYTES, JSON_FILE_FORMAT
+from metrics import (
+    JSON_FILE_SIZE, JSON_READ_BYTES, JSON_READ_SECONDS, JSON_WRITE_BYTES, JSON_WRITE_SECONDS,
+    JWT_SECONDS
+)
+from serialization import JSONDecodeError, dumps, loads
+
+# Bytes of a data file parsed at a time by read_json_records
+RECORD_CHUNK_BYTES = 1 << 20
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -21,34 +33,270 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     else:
         expire = datetime.utcnow() + timedelta(minutes=30)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    with JWT_SECONDS.time(operation="encode"):
+        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def verify_token(token: str) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with JWT_SECONDS.time(operation="decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
         return None
 
-def read_json_file(file_path: str) -> List[Dict[str, Any]]:
-    if not os.path.exists(file_path):
+class FrozenDict(dict):
+    """A dict that refuses in-place changes; shared cached records use it."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("cached JSON data is read-only; use read_json_file(path) for a mutable copy")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("cached JSON data is read-only; use read_json_file(path) for a mutable copy")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = remove = pop = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        for item in value.values():
+            if isinstance(item, (dict, list)):
+                return FrozenDict((k, _freeze(v)) for k, v in value.items())
+        # Flat records, the common case, are copied in one go
+        return FrozenDict(value)
+    if isinstance(value, list):
+        return FrozenList([_freeze(v) for v in value])
+    return value
+
+
+@contextmanager
+def gc_paused():
+    """Hold off the cyclic collector while building large acyclic data.
+
+    Parsing allocates millions of containers, and every few hundred of them
+    would otherwise trigger a collection that walks all the ones before.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _file_label(file_path: str) -> str:
+    """Metric label for a data file: its path inside DATA_DIR."""
+    relative = os.path.relpath(file_path, DATA_DIR)
+    return os.path.basename(file_path) if relative.startswith('..') else relative
+
+
+def file_signature(file_path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _parse_file(file_path: str, signature: Tuple[int, int, int], convert, parse: bool = True) -> Any:
+    start = time.perf_counter()
+    with open(file_path, 'rb') as f, gc_paused():
+        data = f.read()
+        data = convert(loads(data) if parse else data)
+    label = _file_label(file_path)
+    JSON_READ_SECONDS.observe(time.perf_counter() - start, file=label)
+    JSON_READ_BYTES.inc(signature[1], file=label)
+    JSON_FILE_SIZE.set(signature[1], file=label)
+    return data
+
+
+class JsonFileCache:
+    """Process-wide cache of parsed JSON files.
+
+    Entries are keyed on the path and validated against the file's
+    (mtime_ns, size, inode) on every lookup, so an unchanged file is parsed
+    once no matter how many requests read it. The total size of the cached
+    files is bounded by ``max_bytes``; least recently used entries are
+    evicted first.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int, int], Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, file_path: str) -> Any:
+        signature = file_signature(file_path)
+        if signature is None:
+            self.invalidate(file_path)
+            return None
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(file_path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        data = _parse_file(file_path, signature, _freeze)
+        # Only cache what we know matches the signature: if the file was
+        # replaced while we were parsing, the next lookup will reparse it
+        if file_signature(file_path) == signature:
+            self._put(file_path, signature, data)
+        return data
+
+    def _put(self, file_path: str, signature: Tuple[int, int, int], data: Any) -> None:
+        size = signature[1]
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(file_path, None)
+            if old is not None:
+                self._bytes -= old[0][1]
+            self._entries[file_path] = (signature, data)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (evicted_signature, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_signature[1]
+                self.evictions += 1
+
+    def invalidate(self, file_path: str) -> None:
+        with self._lock:
+            old = self._entries.pop(file_path, None)
+            if old is not None:
+                self._bytes -= old[0][1]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+json_cache = JsonFileCache(JSON_CACHE_MAX_BYTES)
+
+def read_json_file(file_path: str, readonly: bool = False) -> List[Dict[str, Any]]:
+    """Parsed contents of a JSON data file, or [] if it is missing/unreadable.
+
+    By default every record is copied, so callers may mutate the result and
+    write it back. ``readonly=True`` returns the shared cached data itself,
+    which is free but raises TypeError on any attempt to modify it.
+    """
+    try:
+        data = json_cache.get(file_path)
+    except (JSONDecodeError, IOError):
+        return []
+    if data is None:
         return []
+    if readonly:
+        return data
+    # Records are flat, so copying each dict is enough to protect the cache
+    return [dict(item) if isinstance(item, dict) else item for item in data]
+
+def _record_chunks(data: bytes, size: int) -> Iterator[List[Any]]:
+    """The items of a JSON array, parsed about ``size`` bytes at a time.
+
+    Each chunk is cut after a ``}`` and parsed as an array of its own. A cut
+    inside a string (or an unfinished object) leaves the chunk invalid, so
+    the next ``}`` is tried instead; a chunk that parses ends on an item.
+    """
+    position = data.find(b'[') + 1
+    if position == 0 or data[:position].strip() != b'[':
+        # Not an array: no records
+        loads(data)
+        return
+    while True:
+        cut = data.find(b'}', position + size)
+        while cut >= 0:
+            try:
+                items = loads(b'[' + data[position:cut + 1] + b']')
+                break
+            except JSONDecodeError:
+                cut = data.find(b'}', cut + 1)
+        if cut < 0:
+            yield loads(b'[' + data[position:])
+            return
+        yield items
+        position = cut + 1
+        while data[position:position + 1].isspace():
+            position += 1
+        if data[position:position + 1] != b',':
+            yield loads(b'[' + data[position:])
+            return
+        position += 1
+
+
+def read_json_records(file_path: str, record_type: Callable[[Dict[str, Any]], Any]) -> List[Any]:
+    """A data file's records converted with ``record_type``, or [] as above.
+
+    For callers that keep their own representation of a table: the file is
+    parsed afresh and not cached, a chunk at a time, so the parsed dicts of
+    only one chunk exist at once and the process's memory peaks at little
+    more than the converted records.
+    """
+    signature = file_signature(file_path)
+    if signature is None:
+        return []
+
+    def convert(data: bytes) -> List[Any]:
+        return [record_type(item) for chunk in _record_chunks(data, RECORD_CHUNK_BYTES) for item in chunk]
+
     try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
+        return _parse_file(file_path, signature, convert, parse=False)
+    except (JSONDecodeError, IOError):
         return []
 
+def json_cache_stats() -> Dict[str, int]:
+    return json_cache.stats()
+
 def write_json_file(file_path: str, data: List[Dict[str, Any]]) -> None:
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=2, default=str)
-
-def get_next_id(data: List[Dict[str, Any]]) -> int:
-    if not data:
-        return 1
-    return max(int(item.get('id', 0)) for item in data) + 1
+    """Replace a JSON data file atomically.
+
+    The data goes to a temporary file in the same directory, is fsynced and
+    then renamed over the target, so readers see either the old file or the
+    new one, never a partial write. ``JSON_FILE_FORMAT`` picks indented or
+    compact output.
+    """
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    start = time.perf_counter()
+    try:
+        with open(tmp_path, 'wb') as f:
+            size = f.write(dumps(data, indent=JSON_FILE_FORMAT != "compact"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    json_cache.invalidate(file_path)
+    label = _file_label(file_path)
+    JSON_WRITE_SECONDS.observe(time.perf_counter() - start, file=label)
+    JSON_WRITE_BYTES.inc(size, file=label)
+    JSON_FILE_SIZE.set(size, file=label)
 
 # Alias for compatibility
 load_json_file = read_json_file
@@ -0,0 +1,57 @@
+"""Background warm-up after a worker starts.
+
+Startup itself only sizes the executors; loading the data files, building
+the repository indexes and spawning the password processes happen on a
+daemon thread. Everything it touches also loads lazily on first use, so
+requests that arrive early are served correctly, just more slowly. ``/health``
+reports not-ready until the warm-up has finished.
+"""
+import logging
+import threading
+import time
+from datetime import date
+from typing import Optional
+from executors import warm_password_pool
+from storage import get_attendance_repository, get_leaves_repository, get_users_repository, open_storage
+
+logger = logging.getLogger(__name__)
+
+_ready = threading.Event()
+_started_at: Optional[float] = None
+_warm_seconds: Optional[float] = None
+
+
+def _warm() -> None:
+    global _warm_seconds
+    try:
+        open_storage()
+        get_users_repository().list()
+        get_leaves_repository().list()
+        # The current month's attendance is what check-ins and the dashboard read
+        today = date.today()
+        for _ in get_attendance_repository().scan(
+            start_date=today.replace(day=1).isoformat(), end_date=today.isoformat()
+        ):
+            pass
+        warm_password_pool()
+    except Exception:
+        logger.exception("warm-up failed; caches will fill on first use")
+    finally:
+        _warm_seconds = time.perf_counter() - _started_at
+        _ready.set()
+
+
+def start_warmup() -> None:
+    global _started_at
+    if _started_at is not None:
+        return
+    _started_at = time.perf_counter()
+    threading.Thread(target=_warm, name="warmup", daemon=True).start()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def warmup_stats() -> dict:
+    return {"ready": is_ready(), "seconds": _warm_seconds}
@@ -1,19 +1,117 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import axios from 'axios'
 
+const ATTENDANCE_PAGE_SIZE = 500
+
 function AdminPanel({ user, apiBaseUrl }) {
   const [activeTab, setActiveTab] = useState('leaves')
   const [leaveRequests, setLeaveRequests] = useState([])
   const [attendanceRecords, setAttendanceRecords] = useState([])
+  // Keyset cursor for the next page of attendance, or null on the last page
+  const [nextAttendanceId, setNextAttendanceId] = useState(null)
   const [users, setUsers] = useState([])
   const [loading, setLoading] = useState(false)
   const [message, setMessage] = useState('')
+  const userNames = useRef({})
 
   useEffect(() => {
+    fetchAll()
+
+    // Apply live deltas instead of re-fetching the lists after every change
+    let events = null
+    let lastEventId = null
+    let closed = false
+    const applyAttendance = (changed) => {
+      const byId = new Map(changed.map((record) => [record.id, record]))
+      setAttendanceRecords((records) => {
+        const updated = records.map((r) => (byId.has(r.id) ? { ...r, ...byId.get(r.id) } : r))
+        const known = new Set(records.map((r) => r.id))
+        const added = changed
+          .filter((record) => !known.has(record.id))
+          .map((record) => ({ ...record, user_name: userNames.current[record.user_id] || 'Unknown' }))
+        return [...updated, ...added]
+      })
+    }
+    const onAttendance = (e) => applyAttendance([JSON.parse(e.data)])
+    const onAttendanceBatch = (e) => applyAttendance(JSON.parse(e.data).records)
+    const onLeaveRequested = (e) => {
+      const leave = JSON.parse(e.data)
+      const named = { ...leave, user_name: userNames.current[leave.user_id] || 'Unknown' }
+      setLeaveRequests((leaves) => (leaves.some((l) => l.id === leave.id) ? leaves : [...leaves, named]))
+    }
+    const onLeaveDecided = (e) => {
+      const leave = JSON.parse(e.data)
+      setLeaveRequests((leaves) => leaves.filter((l) => l.id !== leave.id))
+    }
+    const onUserChanged = (e) => {
+      const changed = JSON.parse(e.data)
+      userNames.current[changed.id] = changed.name
+      setUsers((list) =>
+        list.some((u) => u.id === changed.id)
+          ? list.map((u) => (u.id === changed.id ? changed : u))
+          : [...list, changed]
+      )
+    }
+    const onUserDeleted = (e) => {
+      const { id } = JSON.parse(e.data)
+      setUsers((list) => list.filter((u) => u.id !== id))
+    }
+    const listeners = {
+      check_in: onAttendance,
+      check_out: onAttendance,
+      attendance_batch: onAttendanceBatch,
+      leave_requested: onLeaveRequested,
+      leave_approved: onLeaveDecided,
+      leave_rejected: onLeaveDecided,
+      user_changed: onUserChanged,
+      user_deleted: onUserDeleted,
+      // Too far behind to replay: start over from full lists
+      reset: fetchAll
+    }
+
+    // The stream takes a ticket that expires after a minute, not the access
+    // token, so every connection (including reconnects) asks for a new one
+    const connect = async () => {
+      let ticket
+      try {
+        const token = localStorage.getItem('token')
+        const response = await axios.post(`${apiBaseUrl}/api/events/ticket`, null, {
+          headers: { Authorization: `Bearer ${token}` }
+        })
+        ticket = response.data.token
+      } catch (error) {
+        console.error('Error opening event stream:', error)
+        if (!closed) setTimeout(connect, 5000)
+        return
+      }
+      if (closed) return
+      const params = new URLSearchParams({ token: ticket })
+      if (lastEventId !== null) params.set('last_id', lastEventId)
+      events = new EventSource(`${apiBaseUrl}/api/events?${params}`)
+      Object.entries(listeners).forEach(([kind, listener]) =>
+        events.addEventListener(kind, (e) => {
+          if (e.lastEventId) lastEventId = e.lastEventId
+          listener(e)
+        })
+      )
+      // The browser would retry with the same, by then expired, ticket
+      events.onerror = () => {
+        events.close()
+        if (!closed) setTimeout(connect, 1000)
+      }
+    }
+    connect()
+    return () => {
+      closed = true
+      if (events) events.close()
+    }
+  }, [])
+
+  const fetchAll = () => {
     fetchLeaveRequests()
     fetchAttendanceRecords()
     fetchUsers()
-  }, [])
+  }
 
   const fetchLeaveRequests = async () => {
     try {
@@ -30,17 +128,24 @@ function AdminPanel({ user, apiBaseUrl }) {
     }
   }
 
-  const fetchAttendanceRecords = async () => {
+  const fetchAttendanceRecords = async (afterId = null) => {
     try {
       const token = localStorage.getItem('token')
       const response = await axios.get(`${apiBaseUrl}/api/attendance/all`, {
+        params: { limit: ATTENDANCE_PAGE_SIZE, ...(afterId !== null && { after_id: afterId }) },
         headers: { Authorization: `Bearer ${token}` }
       })
       console.log('Attendance records fetched:', response.data)
-      setAttendanceRecords(response.data || [])
+      const page = response.data || []
+      setAttendanceRecords((records) => {
+        if (afterId === null) return page
+        const known = new Set(records.map((r) => r.id))
+        return [...records, ...page.filter((r) => !known.has(r.id))]
+      })
+      setNextAttendanceId(response.headers['x-next-after-id'] ?? null)
     } catch (err) {
       console.error('Error fetching attendance records:', err)
-      setAttendanceRecords([])
+      if (afterId === null) setAttendanceRecords([])
     }
   }
 
@@ -51,6 +156,7 @@ function AdminPanel({ user, apiBaseUrl }) {
         headers: { Authorization: `Bearer ${token}` }
       })
       console.log('Users fetched:', response.data)
+      userNames.current = Object.fromEntries((response.data || []).map((u) => [u.id, u.name]))
       setUsers(response.data || [])
     } catch (err) {
       console.error('Error fetching users:', err)
@@ -68,10 +174,13 @@ function AdminPanel({ user, apiBaseUrl }) {
         {},
         { headers: { Authorization: `Bearer ${token}` } }
       )
+      // Do not wait for the SSE delta: the stream may be down or reconnecting
+      setLeaveRequests((leaves) => leaves.filter((l) => l.id !== leaveId))
       setMessage({ type: 'success', text: 'Leave approved successfully!' })
-      fetchLeaveRequests()
     } catch (err) {
       setMessage({ type: 'error', text: err.response?.data?.detail || 'Approval failed' })
+      // E.g. already decided elsewhere: show the list as it is now
+      fetchLeaveRequests()
     } finally {
       setLoading(false)
     }
@@ -87,10 +196,13 @@ function AdminPanel({ user, apiBaseUrl }) {
         {},
         { headers: { Authorization: `Bearer ${token}` } }
       )
+      // Do not wait for the SSE delta: the stream may be down or reconnecting
+      setLeaveRequests((leaves) => leaves.filter((l) => l.id !== leaveId))
       setMessage({ type: 'success', text: 'Leave rejected successfully!' })
-      fetchLeaveRequests()
     } catch (err) {
       setMessage({ type: 'error', text: err.response?.data?.detail || 'Rejection failed' })
+      // E.g. already decided elsewhere: show the list as it is now
+      fetchLeaveRequests()
     } finally {
       setLoading(false)
     }
@@ -274,6 +386,13 @@ function AdminPanel({ user, apiBaseUrl }) {
                       ))}
                     </tbody>
                   </table>
+                  {nextAttendanceId !== null && (
+                    <div className="text-center mt-6">
+                      <button onClick={() => fetchAttendanceRecords(nextAttendanceId)} className="btn-secondary px-4 py-2 text-sm">
+                        Load more
+                      </button>
+                    </div>
+                  )}
                 </div>
               ) : (
                 <div className="text-center py-12">